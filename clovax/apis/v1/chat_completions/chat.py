@@ -1,13 +1,12 @@
 from fastapi import APIRouter, HTTPException, Path
 from schemas.request.chat_completions_request import ChatRequest
 from schemas.response.chat_completions_response import ChatResponse
-from services.clova_chat_service import ClovaService
-from services.chat_memory_service import chat_memory_service
+from services.clova_chat_service import clova_service
+from services.chat_memory_service import chat_memory_service, SessionBusyError
 from services.rag_retrieval_service import rag_retrieval_service, RetrievalConfig
 import uuid
 
 router = APIRouter()
-clova_service = ClovaService()
 
 @router.post("/{model_name}", tags=["chat-completions"], response_model=ChatResponse, responses={
     200: {
@@ -89,7 +88,11 @@ async def chat_completion(
     2. 응답에서 sessionId 확인
     3. 이후 요청: sessionId 포함하여 전송
     4. RAG 사용 시: useRAG=true로 설정
+    
+    **동시 요청:**
+    - 같은 sessionId의 요청은 순서대로 처리 (CHAT_MEMORY_SESSION_CONFLICT=reject이면 409 응답)
     """
+    session_locked = False
     try:
         # 지원 모델 검증
         if model_name not in ["HCX-005", "HCX-DASH-002"]:
@@ -203,10 +206,15 @@ async def chat_completion(
 
         # 멀티턴 지원: 이전 대화 내역과 현재 메시지 결합
         if chat_request.sessionId:
-            messages = chat_memory_service.get_messages_for_clovax(
+            # 대화 내역 조회 ~ 새 턴 저장 구간을 세션 단위로 보호
+            await chat_memory_service.acquire_session(session_id)
+            session_locked = True
+            messages = await chat_memory_service.get_messages_for_clovax(
                 session_id=session_id,
                 current_messages=current_messages,
-                memory_type=chat_request.memoryType or "buffer_window"
+                memory_type=chat_request.memoryType or "buffer_window",
+                model_name=model_name,
+                completion_tokens=chat_request.maxTokens or chat_request.maxCompletionTokens
             )
         else:
             # 세션 ID가 없으면 현재 메시지만 사용 (기존 방식)
@@ -288,11 +296,12 @@ async def chat_completion(
                 ai_response = response.get("result", {}).get("message", {}).get("content", "")
                 
                 # 메모리에 대화 저장
-                chat_memory_service.add_message_to_memory(
+                await chat_memory_service.add_message_to_memory(
                     session_id=session_id,
                     user_message=last_user_message,
                     assistant_message=ai_response,
-                    memory_type=chat_request.memoryType or "buffer_window"
+                    memory_type=chat_request.memoryType or "buffer_window",
+                    model_name=model_name
                 )
         
         # 응답에 sessionId와 RAG 사용 여부 추가
@@ -303,9 +312,14 @@ async def chat_completion(
 
     except HTTPException:
         raise
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"응답 처리 중 오류가 발생했습니다: {str(e)}"
         )
+    finally:
+        if session_locked:
+            chat_memory_service.release_session(session_id)
 
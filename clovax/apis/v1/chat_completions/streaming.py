@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Header
 from fastapi.responses import StreamingResponse
 from schemas.request.chat_completions_request import ChatRequest
 from schemas.response.chat_completions_response import ChatResponse
-from services.clova_chat_service import ClovaService
-from services.chat_memory_service import chat_memory_service
+from services.clova_chat_service import clova_service
+from services.chat_memory_service import chat_memory_service, SessionBusyError
+from services.clova_sse_parser import StreamAccumulator
+from services.streaming_metrics_service import streaming_metrics
+from services.stream_replay_service import stream_replay_registry, ReplayStream
 from services.rag_retrieval_service import rag_retrieval_service, RetrievalConfig
+from core.config import settings
+from contextlib import aclosing
+from typing import Optional
+import asyncio
+import time
 import uuid
 import json
 
 router = APIRouter()
-clova_service = ClovaService()
 
 @router.post("/{model_name}/stream", tags=["chat-completions"], responses={
     200: {
@@ -38,7 +45,8 @@ clova_service = ClovaService()
 })
 async def streaming_chat_completion(
     chat_request: ChatRequest,
-    model_name: str = Path(..., description="모델 이름 (예: HCX-005, HCX-DASH-002)")
+    model_name: str = Path(..., description="모델 이름 (예: HCX-005, HCX-DASH-002)"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID", description="재연결 시 마지막으로 받은 이벤트 ID")
 ):
     """
     스트리밍 채팅 완성 API
@@ -62,8 +70,25 @@ async def streaming_chat_completion(
     - Server-Sent Events (SSE) 형태로 응답
     - data: JSON 형식으로 메시지 전송
     - 완료 시 sessionId 포함
+    - 모든 이벤트에 `id: {streamId}:{seq}` 포함
+    
+    **재연결 (Last-Event-ID):**
+    - 연결이 끊긴 뒤 같은 요청을 Last-Event-ID 헤더와 함께 다시 보내면 새 CLOVA 호출 없이 이어서 수신
+    - 생성이 진행 중이면 그대로 연결되고, 끝났으면 STREAM_REPLAY_TTL_SECONDS 동안 버퍼에서 재전송
+    - 모든 클라이언트가 떠난 뒤 STREAM_RESUME_GRACE_SECONDS 안에 재연결이 없으면 업스트림 생성 취소
+      (부분 응답 저장은 CLOVA_SAVE_PARTIAL_ON_DISCONNECT 설정)
+    
+    **동시 요청:**
+    - 같은 sessionId의 요청은 이전 스트리밍의 응답 저장이 끝난 뒤 처리 (CHAT_MEMORY_SESSION_CONFLICT=reject이면 409 응답)
     """
+    session_locked = False
     try:
+        # 재연결 요청이면 버퍼/진행 중인 생성에서 이어서 전송
+        resumed = stream_replay_registry.resolve(last_event_id)
+        if resumed is not None:
+            stream, last_seq = resumed
+            return _sse_response(stream, last_seq)
+        
         # 지원 모델 검증
         if model_name not in ["HCX-005", "HCX-DASH-002"]:
             raise HTTPException(
@@ -176,10 +201,15 @@ async def streaming_chat_completion(
 
         # 멀티턴 지원: 이전 대화 내역과 현재 메시지 결합
         if chat_request.sessionId:
-            messages = chat_memory_service.get_messages_for_clovax(
+            # 대화 내역 조회 ~ 새 턴 저장 구간을 세션 단위로 보호 (저장은 생성 태스크에서 끝난 뒤 해제)
+            await chat_memory_service.acquire_session(session_id)
+            session_locked = True
+            messages = await chat_memory_service.get_messages_for_clovax(
                 session_id=session_id,
                 current_messages=current_messages,
-                memory_type=chat_request.memoryType or "buffer_window"
+                memory_type=chat_request.memoryType or "buffer_window",
+                model_name=model_name,
+                completion_tokens=chat_request.maxTokens or chat_request.maxCompletionTokens
             )
         else:
             # 세션 ID가 없으면 현재 메시지만 사용 (기존 방식)
@@ -218,55 +248,58 @@ async def streaming_chat_completion(
         if chat_request.seed is not None:
             clova_request["seed"] = chat_request.seed
 
-        # CLOVA Studio API 스트리밍 호출
-        async def generate_stream():
-            ai_response = ""
+        memory_type = chat_request.memoryType or "buffer_window"
+        
+        async def save_turn(ai_response: str):
+            """현재 사용자 메시지와 AI 응답을 메모리에 저장"""
+            user_messages = [msg for msg in current_messages if msg.get("role") == "user"]
+            if not user_messages:
+                return
+            
+            # 마지막 사용자 메시지 추출
+            last_user_message = user_messages[-1].get("content", "")
+            if isinstance(last_user_message, list):
+                # 배열 형태의 content에서 텍스트만 추출
+                text_parts = [
+                    item.get("text", "") 
+                    for item in last_user_message 
+                    if isinstance(item, dict) and item.get("type") == "text"
+                ]
+                last_user_message = " ".join(text_parts)
+            
+            # 메모리에 대화 저장
+            await chat_memory_service.add_message_to_memory(
+                session_id=session_id,
+                user_message=last_user_message,
+                assistant_message=ai_response,
+                memory_type=memory_type,
+                model_name=model_name
+            )
+        
+        # CLOVA Studio API 스트리밍 호출 (클라이언트 연결과 분리된 태스크에서 실행)
+        async def produce(stream: ReplayStream):
+            accumulator = StreamAccumulator()
             try:
                 # 테스트용 초기 응답
-                yield "data: {\"status\": \"streaming_started\", \"message\": \"스트리밍 시작\"}\n\n"
+                stream.append("data: {\"status\": \"streaming_started\", \"message\": \"스트리밍 시작\"}\n\n")
                 
-                async for chunk in clova_service.streaming_chat_completion(model_name, clova_request):
-                    # chunk가 문자열인지 확인하고 SSE 형식으로 전달
-                    if isinstance(chunk, str):
-                        yield chunk
-                        # AI 응답 누적 (메모리 저장용)
-                        if "data: " in chunk:
-                            try:
-                                chunk_data = json.loads(chunk.replace("data: ", "").strip())
-                                if chunk_data.get("result", {}).get("message", {}).get("content"):
-                                    ai_response += chunk_data["result"]["message"]["content"]
-                            except:
-                                pass
-                    else:
-                        # dict인 경우 JSON으로 변환
-                        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
-                        # AI 응답 누적
-                        if chunk.get("result", {}).get("message", {}).get("content"):
-                            ai_response += chunk["result"]["message"]["content"]
+                # aclosing: 생성이 취소되면 업스트림 요청도 즉시 닫힘
+                async with aclosing(clova_service.streaming_chat_completion(model_name, clova_request)) as events:
+                    async for event in events:
+                        # 파싱된 이벤트를 SSE 프레임으로 버퍼에 추가하고 AI 응답 누적 (메모리 저장용)
+                        stream.append(event.to_sse(include_id=False))
+                        if event.is_token:
+                            stream.mark_first_token()
+                        accumulator.add(event)
+                
+                ai_response = accumulator.text
+                streaming_metrics.record_completion(
+                    (accumulator.usage or {}).get("completionTokens") or accumulator.token_count
+                )
                 
                 # 멀티턴 지원: 대화 내용을 메모리에 저장
                 if ai_response.strip():
-                    # 현재 사용자 메시지와 AI 응답을 메모리에 저장
-                    user_messages = [msg for msg in current_messages if msg.get("role") == "user"]
-                    if user_messages:
-                        # 마지막 사용자 메시지 추출
-                        last_user_message = user_messages[-1].get("content", "")
-                        if isinstance(last_user_message, list):
-                            # 배열 형태의 content에서 텍스트만 추출
-                            text_parts = [
-                                item.get("text", "") 
-                                for item in last_user_message 
-                                if isinstance(item, dict) and item.get("type") == "text"
-                            ]
-                            last_user_message = " ".join(text_parts)
-                        
-                        # 메모리에 대화 저장
-                        chat_memory_service.add_message_to_memory(
-                            session_id=session_id,
-                            user_message=last_user_message,
-                            assistant_message=ai_response,
-                            memory_type=chat_request.memoryType or "buffer_window"
-                        )
+                    await save_turn(ai_response)
                 
                 # 스트리밍 완료 신호 (sessionId와 RAG 사용 여부 포함)
                 completion_data = {
@@ -275,7 +308,18 @@ async def streaming_chat_completion(
                     "sessionId": session_id,
                     "ragUsed": bool(chat_request.useRAG and rag_context)
                 }
-                yield f"data: {json.dumps(completion_data, ensure_ascii=False)}\n\n"
+                stream.append(f"data: {json.dumps(completion_data, ensure_ascii=False)}\n\n")
+            
+            except asyncio.CancelledError:
+                # 모든 클라이언트가 떠남: 업스트림은 aclosing으로 이미 닫힘
+                streaming_metrics.record_cancellation(
+                    accumulator.token_count,
+                    chat_request.maxTokens or chat_request.maxCompletionTokens
+                )
+                partial_response = accumulator.text
+                if settings.CLOVA_SAVE_PARTIAL_ON_DISCONNECT and partial_response.strip():
+                    await save_turn(partial_response)
+                raise
                 
             except Exception as e:
                 # 에러 발생 시 에러 메시지 전달
@@ -284,22 +328,56 @@ async def streaming_chat_completion(
                     "status": "error",
                     "sessionId": session_id
                 }
-                yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+                stream.append(f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n")
+            
+            finally:
+                # sessionId가 있으면 엔드포인트에서 잠금을 획득한 상태
+                if chat_request.sessionId:
+                    chat_memory_service.release_session(session_id)
 
-        return StreamingResponse(
-            generate_stream(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache", 
-                "Connection": "keep-alive"
-            }
-        )
+        stream = stream_replay_registry.start(produce)
+        # 이후 세션 잠금 해제는 생성 태스크가 담당
+        session_locked = False
+        return _sse_response(stream)
 
     except HTTPException:
         raise
+    except SessionBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"스트리밍 응답 처리 중 오류가 발생했습니다: {str(e)}"
         )
+    finally:
+        if session_locked:
+            chat_memory_service.release_session(session_id)
+
 
+def _sse_response(stream: ReplayStream, last_seq: int = -1) -> StreamingResponse:
+    """ReplayStream 구독 결과를 SSE 응답으로 반환 (도착 간격에 따라 여러 이벤트를 한 프레임으로 묶음)"""
+    async def generate_stream():
+        frames = 0
+        events = 0
+        ttft_recorded = last_seq >= 0
+        async for batch in stream.subscribe(
+            last_seq,
+            flush_window_ms=settings.STREAM_FLUSH_WINDOW_MS,
+            flush_max_bytes=settings.STREAM_FLUSH_MAX_BYTES
+        ):
+            frames += 1
+            events += len(batch)
+            if not ttft_recorded and stream.first_token_seq is not None and batch[-1][0] >= stream.first_token_seq:
+                streaming_metrics.record_first_token(time.monotonic() - stream.started_at)
+                ttft_recorded = True
+            yield "".join(f"id: {stream.event_id(seq)}\n{frame}" for seq, frame in batch)
+        streaming_metrics.record_frames(frames, events)
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache", 
+            "Connection": "keep-alive"
+        }
+    )
@@ -14,6 +14,9 @@ from services.rag_text_spliter_service import clova_text_splitter_service, Chunk
 from services.rag_embedding_service import clova_embedding_service
 from services.rag_indexing_service import chroma_indexing_service
 from services.rag_retrieval_service import rag_retrieval_service, RetrievalConfig
+from services.rag_ingest_checkpoint import IngestCheckpoint, ingest_checkpoint_store, make_upload_key, chunk_id
+from services.vector_similarity import stack_embeddings
+from core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -31,6 +34,9 @@ class DocumentIndexResponse(BaseModel):
     document_count: int = Field(..., description="총 문서 개수")
     chunk_count: int = Field(..., description="총 청크 개수")
     indexed_ids: List[str] = Field(..., description="색인된 문서 ID 리스트")
+    upload_id: Optional[str] = Field(None, description="업로드 식별 키 (같은 파일 재업로드 시 이어서 색인)")
+    resumed_chunk_count: int = Field(0, description="이전 업로드에서 이미 색인되어 건너뛴 청크 개수")
+    failed_chunks: List[Dict[str, Any]] = Field(default_factory=list, description="임베딩 실패 청크 (chunk_index, error)")
 
 class SearchRequest(BaseModel):
     """검색 요청"""
@@ -78,6 +84,9 @@ async def upload_and_index_document(
     
     **지원 파일:** PDF만 가능
     **최대 파일 크기:** 50MB
+    
+    임베딩에 실패한 청크가 있으면 성공한 청크는 색인된 상태로 `failed_chunks`를 반환합니다.
+    같은 파일을 같은 설정으로 다시 업로드하면 남은 청크부터 이어서 색인합니다.
     """
     try:
         # 파일 확장자 확인
@@ -95,48 +104,109 @@ async def upload_and_index_document(
             tmp_file_path = tmp_file.name
         
         try:
-            # 1. 문서 추출 및 전처리
-            logger.info(f"PDF 문서 추출 시작: {file.filename}")
-            documents = document_loader_service.load_and_preprocess(tmp_file_path)
-            
-            if not documents:
-                raise HTTPException(status_code=400, detail="문서에서 추출된 내용이 없습니다.")
-            
-            # 2. 청킹 설정
+            # 청킹 설정
             chunking_config = ChunkingConfig(
                 alpha=alpha,
                 post_process_max_size=post_process_max_size,
                 post_process_min_size=post_process_min_size
             )
             
-            # 3. 문서 청크 분할
-            logger.info("문서 청크 분할 시작")
-            chunked_documents = await clova_text_splitter_service.split_documents_async(
-                documents, chunking_config
-            )
+            # 이전에 실패한 같은 업로드가 있으면 분할 결과와 진행 상황을 이어서 사용
+            upload_key = make_upload_key(file_content, document_source, {
+                "alpha": alpha,
+                "post_process_max_size": post_process_max_size,
+                "post_process_min_size": post_process_min_size
+            })
+            checkpoint = await asyncio.to_thread(ingest_checkpoint_store.load, upload_key)
             
-            if not chunked_documents:
-                raise HTTPException(status_code=500, detail="문서 청크 분할에 실패했습니다.")
+            if checkpoint is None:
+                # 1. 문서 추출 및 전처리
+                logger.info(f"PDF 문서 추출 시작: {file.filename}")
+                documents = document_loader_service.load_and_preprocess(tmp_file_path)
+                
+                if not documents:
+                    raise HTTPException(status_code=400, detail="문서에서 추출된 내용이 없습니다.")
+                
+                # 2. 문서 청크 분할
+                logger.info("문서 청크 분할 시작")
+                chunked_documents = await clova_text_splitter_service.split_documents_async(
+                    documents, chunking_config
+                )
+                
+                if not chunked_documents:
+                    raise HTTPException(status_code=500, detail="문서 청크 분할에 실패했습니다.")
+                
+                checkpoint = IngestCheckpoint(
+                    upload_key=upload_key,
+                    document_source=document_source,
+                    document_count=len(documents),
+                    chunks=chunked_documents
+                )
+                await asyncio.to_thread(ingest_checkpoint_store.create, checkpoint)
+            else:
+                logger.info(
+                    f"이전 색인 진행 상황에서 이어서 진행: {file.filename} "
+                    f"({len(checkpoint.done)}/{len(checkpoint.chunks)}개 청크 완료)"
+                )
             
-            # 4. 임베딩 생성
-            logger.info(f"{len(chunked_documents)}개 청크 임베딩 생성 시작")
-            texts = [doc.page_content for doc in chunked_documents]
-            embeddings = await clova_embedding_service.aembed_documents(texts)
+            resumed_chunk_count = len(checkpoint.done)
+            pending_indices = checkpoint.pending_indices
+            failed_chunks = []
             
-            # 5. 벡터 색인
-            logger.info("벡터 색인 시작")
-            indexed_ids = chroma_indexing_service.add_documents(
-                documents=chunked_documents,
-                embeddings=embeddings,
-                document_source=document_source
-            )
+            # 3. 배치 단위 임베딩 생성 및 벡터 색인 (배치마다 진행 상황 기록)
+            logger.info(f"{len(pending_indices)}개 청크 임베딩 생성 및 색인 시작 (전체 {len(checkpoint.chunks)}개)")
+            batch_size = max(1, settings.RAG_INGEST_BATCH_SIZE)
+            for start in range(0, len(pending_indices), batch_size):
+                batch_indices = pending_indices[start:start + batch_size]
+                texts = [checkpoint.chunks[i].page_content for i in batch_indices]
+                results = await clova_embedding_service.aembed_documents_with_results(texts)
+                
+                succeeded = []
+                for chunk_index, result in zip(batch_indices, results):
+                    if result.ok:
+                        succeeded.append((chunk_index, result.embedding))
+                    else:
+                        failed_chunks.append({"chunk_index": chunk_index, "error": result.error})
+                
+                if succeeded:
+                    await asyncio.to_thread(
+                        chroma_indexing_service.upsert_documents,
+                        documents=[checkpoint.chunks[i] for i, _ in succeeded],
+                        embeddings=stack_embeddings(
+                            [embedding for _, embedding in succeeded], clova_embedding_service.embedding_dimension
+                        ),
+                        ids=[chunk_id(upload_key, i) for i, _ in succeeded],
+                        document_source=document_source
+                    )
+                    await asyncio.to_thread(
+                        ingest_checkpoint_store.mark_done, checkpoint, [i for i, _ in succeeded]
+                    )
+            
+            indexed_ids = [chunk_id(upload_key, i) for i in sorted(checkpoint.done)]
+            if failed_chunks:
+                return DocumentIndexResponse(
+                    success=False,
+                    message=(
+                        f"문서 '{file.filename}' 일부 색인 실패 ({len(failed_chunks)}개 청크). "
+                        f"같은 파일을 다시 업로드하면 실패한 청크부터 이어서 색인합니다."
+                    ),
+                    document_count=checkpoint.document_count,
+                    chunk_count=len(checkpoint.chunks),
+                    indexed_ids=indexed_ids,
+                    upload_id=upload_key,
+                    resumed_chunk_count=resumed_chunk_count,
+                    failed_chunks=failed_chunks
+                )
             
+            await asyncio.to_thread(ingest_checkpoint_store.delete, upload_key)
             return DocumentIndexResponse(
                 success=True,
                 message=f"문서 '{file.filename}' 색인 완료",
-                document_count=len(documents),
-                chunk_count=len(chunked_documents),
-                indexed_ids=indexed_ids
+                document_count=checkpoint.document_count,
+                chunk_count=len(checkpoint.chunks),
+                indexed_ids=indexed_ids,
+                upload_id=upload_key,
+                resumed_chunk_count=resumed_chunk_count
             )
             
         finally:
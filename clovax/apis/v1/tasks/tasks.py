@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Path
 from schemas.request.chat_completions_request import ChatRequest
 from schemas.response.chat_completions_response import ChatResponse
+from services.clova_chat_service import clova_service
 
 router = APIRouter()
 
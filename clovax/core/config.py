@@ -10,6 +10,109 @@ class Settings(BaseModel):
     # CLOVA Studio API 키 및 기본 URL
     CLOVA_STUDIO_API_KEY: str = os.getenv("CLOVA_STUDIO_API_KEY", "")
     CLOVA_STUDIO_BASE_URL: str = os.getenv("CLOVA_STUDIO_BASE_URL", "https://clovastudio.stream.ntruss.com")
+
+    # CLOVA Studio HTTP 클라이언트 (프로세스당 1개, keep-alive 커넥션 풀)
+    CLOVA_HTTP_MAX_CONNECTIONS: int = int(os.getenv("CLOVA_HTTP_MAX_CONNECTIONS", "100"))
+    CLOVA_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("CLOVA_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    CLOVA_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("CLOVA_HTTP_KEEPALIVE_EXPIRY", "30"))
+    CLOVA_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("CLOVA_HTTP_CONNECT_TIMEOUT", "5"))
+    CLOVA_HTTP_READ_TIMEOUT: float = float(os.getenv("CLOVA_HTTP_READ_TIMEOUT", "120"))
+    CLOVA_HTTP_POOL_TIMEOUT: float = float(os.getenv("CLOVA_HTTP_POOL_TIMEOUT", "10"))
+    CLOVA_HTTP2: bool = os.getenv("CLOVA_HTTP2", "false").lower() == "true"
+
+    # CLOVA Studio 스트리밍 설정
+    CLOVA_STREAM_READ_TIMEOUT: float = float(os.getenv("CLOVA_STREAM_READ_TIMEOUT", "60"))
+    CLOVA_STREAM_CHUNK_BYTES: int = int(os.getenv("CLOVA_STREAM_CHUNK_BYTES", "4096"))
+    CLOVA_STREAM_MAX_LINE_BYTES: int = int(os.getenv("CLOVA_STREAM_MAX_LINE_BYTES", "1048576"))
+    # 클라이언트 연결 종료로 취소된 응답을 메모리에 저장할지 여부
+    CLOVA_SAVE_PARTIAL_ON_DISCONNECT: bool = os.getenv("CLOVA_SAVE_PARTIAL_ON_DISCONNECT", "true").lower() == "true"
+
+    # RAG 임베딩 / 분할 API HTTP 클라이언트 (서비스별 1개, keep-alive 커넥션 풀)
+    RAG_HTTP_MAX_CONNECTIONS: int = int(os.getenv("RAG_HTTP_MAX_CONNECTIONS", "20"))
+    RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    RAG_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("RAG_HTTP_KEEPALIVE_EXPIRY", "30"))
+    RAG_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("RAG_HTTP_CONNECT_TIMEOUT", "5"))
+    RAG_HTTP_POOL_TIMEOUT: float = float(os.getenv("RAG_HTTP_POOL_TIMEOUT", "30"))
+    CLOVA_EMBEDDING_READ_TIMEOUT: float = float(os.getenv("CLOVA_EMBEDDING_READ_TIMEOUT", "60"))
+    CLOVA_SEGMENTATION_READ_TIMEOUT: float = float(os.getenv("CLOVA_SEGMENTATION_READ_TIMEOUT", "30"))
+    # Clova 임베딩 요청 제어 (동시 요청 수 / 초당 요청 수 / 한도 초과·일시 오류 시 백오프 재시도)
+    CLOVA_EMBEDDING_MAX_CONCURRENCY: int = int(os.getenv("CLOVA_EMBEDDING_MAX_CONCURRENCY", "8"))
+    CLOVA_EMBEDDING_RATE_PER_SECOND: float = float(os.getenv("CLOVA_EMBEDDING_RATE_PER_SECOND", "10"))
+    # 순간 허용 요청 수 (기본값: 동시 요청 수)
+    CLOVA_EMBEDDING_BURST: int = int(os.getenv("CLOVA_EMBEDDING_BURST", os.getenv("CLOVA_EMBEDDING_MAX_CONCURRENCY", "8")))
+    CLOVA_EMBEDDING_MAX_RETRIES: int = int(os.getenv("CLOVA_EMBEDDING_MAX_RETRIES", "5"))
+    CLOVA_EMBEDDING_BACKOFF_BASE: float = float(os.getenv("CLOVA_EMBEDDING_BACKOFF_BASE", "0.5"))
+    CLOVA_EMBEDDING_BACKOFF_MAX: float = float(os.getenv("CLOVA_EMBEDDING_BACKOFF_MAX", "30"))
+    # 백엔드 재시도 후에도 실패한 청크를 다시 모아 요청하는 횟수
+    CLOVA_EMBEDDING_RETRY_ROUNDS: int = int(os.getenv("CLOVA_EMBEDDING_RETRY_ROUNDS", "1"))
+
+    # RAG 임베딩 백엔드 ("clova": Clova Studio API, "local": 디스크의 BGE-M3 모델로 CPU 추론)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "clova")
+    # 주 백엔드 요청이 제한 시간 안에 끝나지 않거나 실패할 때 쓸 대체 백엔드 (비우면 사용 안 함)
+    # 제한 시간은 요청 하나에만 적용 (동시 요청 / 속도 제한 / 추론 대기열 대기 시간 제외)
+    EMBEDDING_FALLBACK_BACKEND: str = os.getenv("EMBEDDING_FALLBACK_BACKEND", "")
+    EMBEDDING_FALLBACK_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_FALLBACK_TIMEOUT_SECONDS", "3"))
+    # 로컬 임베딩 모델 ("sentence-transformers": 모델 디렉토리, "onnx": model.onnx + tokenizer.json 디렉토리)
+    LOCAL_EMBEDDING_MODEL_PATH: str = os.getenv("LOCAL_EMBEDDING_MODEL_PATH", "")
+    LOCAL_EMBEDDING_ENGINE: str = os.getenv("LOCAL_EMBEDDING_ENGINE", "sentence-transformers")
+    LOCAL_EMBEDDING_BATCH_SIZE: int = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "16"))
+    LOCAL_EMBEDDING_NUM_THREADS: int = int(os.getenv("LOCAL_EMBEDDING_NUM_THREADS", "0"))
+    LOCAL_EMBEDDING_MAX_LENGTH: int = int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "8192"))
+
+    # RAG 문서 임베딩 캐시 (SQLite 경로가 비어 있으면 메모리 LRU만 사용)
+    CLOVA_EMBEDDING_CACHE_PATH: str = os.getenv("CLOVA_EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+    CLOVA_EMBEDDING_CACHE_MEMORY_ENTRIES: int = int(os.getenv("CLOVA_EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+    # 쿼리 임베딩 캐시 (정규화한 쿼리 기준 LRU + TTL)
+    CLOVA_QUERY_EMBEDDING_CACHE_ENTRIES: int = int(os.getenv("CLOVA_QUERY_EMBEDDING_CACHE_ENTRIES", "2048"))
+    CLOVA_QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = float(os.getenv("CLOVA_QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+
+    # RAG 문서 색인 진행 상황 (배치마다 기록, 실패 후 같은 파일 재업로드 시 이어서 색인)
+    RAG_INGEST_CHECKPOINT_DIR: str = os.getenv("RAG_INGEST_CHECKPOINT_DIR", "./ingest_checkpoints")
+    # 마지막 기록 후 이 시간이 지난(재업로드되지 않은) 체크포인트는 삭제 (0이면 만료 없음)
+    RAG_INGEST_CHECKPOINT_TTL_SECONDS: float = float(os.getenv("RAG_INGEST_CHECKPOINT_TTL_SECONDS", "604800"))
+    RAG_INGEST_BATCH_SIZE: int = int(os.getenv("RAG_INGEST_BATCH_SIZE", "64"))
+
+    # 스트리밍 재연결(Last-Event-ID) 설정
+    STREAM_REPLAY_TTL_SECONDS: float = float(os.getenv("STREAM_REPLAY_TTL_SECONDS", "120"))
+    STREAM_REPLAY_MAX_EVENTS: int = int(os.getenv("STREAM_REPLAY_MAX_EVENTS", "4096"))
+    # 동시에 보관하는 최대 스트림 수 (넘으면 종료된 스트림부터 오래된 순으로 제거)
+    STREAM_REPLAY_MAX_STREAMS: int = int(os.getenv("STREAM_REPLAY_MAX_STREAMS", "1000"))
+    # 모든 클라이언트가 떠난 뒤 업스트림 생성을 취소하기까지 재연결을 기다리는 시간
+    STREAM_RESUME_GRACE_SECONDS: float = float(os.getenv("STREAM_RESUME_GRACE_SECONDS", "5"))
+
+    # SSE 프레임 묶음 전송 (0이면 이벤트마다 즉시 전송)
+    STREAM_FLUSH_WINDOW_MS: float = float(os.getenv("STREAM_FLUSH_WINDOW_MS", "30"))
+    STREAM_FLUSH_MAX_BYTES: int = int(os.getenv("STREAM_FLUSH_MAX_BYTES", "4096"))
+    
+    # 대화 메모리 저장소 (memory: 워커별 프로세스 메모리, redis: 워커 간 공유)
+    CHAT_MEMORY_BACKEND: str = os.getenv("CHAT_MEMORY_BACKEND", "memory")
+    CHAT_MEMORY_REDIS_URL: str = os.getenv("CHAT_MEMORY_REDIS_URL", "redis://localhost:6379/0")
+    # 대화 메모리 세션 저장소 (워커당 최대 세션 수 / 바이트 예산 / 유휴 만료 시간)
+    CHAT_MEMORY_MAX_SESSIONS: int = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "10000"))
+    CHAT_MEMORY_MAX_BYTES: int = int(os.getenv("CHAT_MEMORY_MAX_BYTES", "268435456"))
+    CHAT_MEMORY_IDLE_TTL_SECONDS: float = float(os.getenv("CHAT_MEMORY_IDLE_TTL_SECONDS", "3600"))
+    # token_buffer: 응답용으로 남겨 둘 토큰 수 (요청에 maxTokens가 없을 때) / 보관할 최대 메시지 수
+    CHAT_MEMORY_COMPLETION_RESERVE_TOKENS: int = int(os.getenv("CHAT_MEMORY_COMPLETION_RESERVE_TOKENS", "4096"))
+    CHAT_MEMORY_TOKEN_BUFFER_MAX_MESSAGES: int = int(os.getenv("CHAT_MEMORY_TOKEN_BUFFER_MAX_MESSAGES", "1000"))
+    # summary: 메시지가 TRIGGER_TURNS턴 이상 쌓이면 최근 KEEP_TURNS턴을 제외한 대화를 백그라운드에서 요약
+    CHAT_MEMORY_SUMMARY_TRIGGER_TURNS: int = int(os.getenv("CHAT_MEMORY_SUMMARY_TRIGGER_TURNS", "8"))
+    CHAT_MEMORY_SUMMARY_KEEP_TURNS: int = int(os.getenv("CHAT_MEMORY_SUMMARY_KEEP_TURNS", "4"))
+    CHAT_MEMORY_SUMMARY_MODEL: str = os.getenv("CHAT_MEMORY_SUMMARY_MODEL", "HCX-DASH-002")
+    CHAT_MEMORY_SUMMARY_MAX_TOKENS: int = int(os.getenv("CHAT_MEMORY_SUMMARY_MAX_TOKENS", "512"))
+    # 같은 sessionId 동시 요청 처리 (serialize: 이전 요청이 끝날 때까지 대기, reject: 409 응답) / 최대 대기 시간
+    CHAT_MEMORY_SESSION_CONFLICT: str = os.getenv("CHAT_MEMORY_SESSION_CONFLICT", "serialize")
+    CHAT_MEMORY_SESSION_LOCK_TIMEOUT: float = float(os.getenv("CHAT_MEMORY_SESSION_LOCK_TIMEOUT", "120"))
+    # semantic 메모리: 과거 턴 임베딩 검색 (최근 턴 + 질문과 관련된 턴)
+    # 저장소에는 MAX_TURNS턴까지 원문을 유지하고, 워커별 임베딩 색인은 재시작 / 다른 워커에서 원문으로 다시 만듦
+    CHAT_MEMORY_SEMANTIC_RECENT_TURNS: int = int(os.getenv("CHAT_MEMORY_SEMANTIC_RECENT_TURNS", "2"))
+    CHAT_MEMORY_SEMANTIC_TOP_K: int = int(os.getenv("CHAT_MEMORY_SEMANTIC_TOP_K", "4"))
+    CHAT_MEMORY_SEMANTIC_MIN_SCORE: float = float(os.getenv("CHAT_MEMORY_SEMANTIC_MIN_SCORE", "0.3"))
+    CHAT_MEMORY_SEMANTIC_MAX_TURNS: int = int(os.getenv("CHAT_MEMORY_SEMANTIC_MAX_TURNS", "500"))
+    CHAT_MEMORY_SEMANTIC_MAX_BYTES: int = int(os.getenv("CHAT_MEMORY_SEMANTIC_MAX_BYTES", "268435456"))
+    # 프로세스 메모리 저장소 저널 (비어 있으면 사용 안 함, 단일 워커 전용)
+    CHAT_MEMORY_JOURNAL_PATH: str = os.getenv("CHAT_MEMORY_JOURNAL_PATH", "")
+    CHAT_MEMORY_JOURNAL_SYNC_SECONDS: float = float(os.getenv("CHAT_MEMORY_JOURNAL_SYNC_SECONDS", "1"))
+    CHAT_MEMORY_JOURNAL_COMPACT_MIN_BYTES: int = int(os.getenv("CHAT_MEMORY_JOURNAL_COMPACT_MIN_BYTES", "67108864"))
     
     # 서버 설정
     HOST: str = os.getenv("HOST", "0.0.0.0")
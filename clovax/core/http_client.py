@@ -0,0 +1,49 @@
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def create_async_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+    connect_timeout: float = 5.0,
+    read_timeout: float = 60.0,
+    pool_timeout: float = 10.0,
+    http2: bool = False
+) -> httpx.AsyncClient:
+    """
+    keep-alive 커넥션 풀을 사용하는 httpx.AsyncClient 생성
+
+    Args:
+        max_connections: 최대 동시 커넥션 수
+        max_keepalive_connections: 유지할 최대 keep-alive 커넥션 수
+        keepalive_expiry: 유휴 keep-alive 커넥션 유지 시간 (초)
+        connect_timeout: 연결 타임아웃 (초)
+        read_timeout: 읽기 타임아웃 (초)
+        pool_timeout: 풀에서 커넥션을 기다리는 최대 시간 (초)
+        http2: HTTP/2 사용 여부 (h2 패키지 필요)
+
+    Returns:
+        httpx.AsyncClient: 공유용 비동기 클라이언트
+    """
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2 패키지가 설치되어 있지 않아 HTTP/1.1로 동작합니다. (pip install httpx[http2])")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+    timeout = httpx.Timeout(
+        connect=connect_timeout,
+        read=read_timeout,
+        write=connect_timeout,
+        pool=pool_timeout
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
@@ -6,6 +6,12 @@ from apis.v1.chat_completions import router as chat_completions_router
 from apis.v1.tasks import router as tasks_router
 from apis.v1.models import router as models_router
 from apis.v1.rag import router as rag_router
+from services.clova_chat_service import clova_service
+from services.streaming_metrics_service import streaming_metrics
+from services.stream_replay_service import stream_replay_registry
+from services.chat_memory_service import chat_memory_service
+from services.rag_embedding_service import clova_embedding_service
+from services.rag_text_spliter_service import clova_text_splitter_service
 
 
 
@@ -56,6 +62,24 @@ app.include_router(tasks_router, prefix=settings.API_V1_STR)
 app.include_router(models_router, prefix=settings.API_V1_STR)
 app.include_router(rag_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+async def startup_event():
+    # 공유 HTTP 클라이언트(커넥션 풀) 준비
+    await clova_service.startup()
+    await clova_embedding_service.startup()
+    await clova_text_splitter_service.startup()
+    # 대화 메모리 저장소 준비 (저널 사용 시 색인 생성)
+    await chat_memory_service.startup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # 공유 HTTP 클라이언트 종료
+    await clova_service.aclose()
+    await clova_embedding_service.aclose()
+    await clova_text_splitter_service.aclose()
+    # 대화 메모리 저장소 연결 정리
+    await chat_memory_service.aclose()
+
 @app.get("/")
 async def root():
     return {
@@ -68,6 +92,15 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "streaming": streaming_metrics.get_stats(),
+        "stream_replay": stream_replay_registry.get_stats(),
+        "chat_memory": chat_memory_service.get_store_stats(),
+        "embedding": clova_embedding_service.get_stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
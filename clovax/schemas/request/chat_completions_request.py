@@ -32,7 +32,7 @@ class ChatRequest(BaseModel):
     messages: List[Message] = Field(..., description="메시지 목록")
     requestId: Optional[str] = Field(None, description="요청 ID")
     sessionId: Optional[str] = Field(None, description="세션 ID (멀티턴 대화용)")
-    memoryType: Optional[str] = Field("buffer_window", description="메모리 타입 (buffer_window, token_buffer)")
+    memoryType: Optional[str] = Field("buffer_window", description="메모리 타입 (buffer_window, token_buffer: 모델 컨텍스트 윈도우 기준 토큰 예산, summary: 오래된 대화 요약, semantic: 최근 턴 + 질문과 관련된 과거 턴)")
     memoryK: Optional[int] = Field(10, description="메모리 윈도우 크기")
     topP: Optional[float] = Field(0.8, description="Top-p 샘플링 값")
     topK: Optional[int] = Field(0, description="Top-k 샘플링 값")
@@ -0,0 +1,602 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.chat_session_store import SessionStore
+from services.token_estimator import estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# 세션 크기 추정용 고정 오버헤드 (SessionHistory 객체 / 메시지 딕셔너리 + 토큰 수당 바이트)
+SESSION_OVERHEAD_BYTES = 512
+MESSAGE_OVERHEAD_BYTES = 256
+
+
+def _message_bytes(content: Any) -> int:
+    """메시지 하나의 메모리 사용량 추정치"""
+    text = content if isinstance(content, str) else str(content)
+    return len(text.encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+
+def _trim_to_budget(
+    entries: List[Tuple[str, str, int]],
+    total_tokens: int,
+    max_tokens: Optional[int]
+) -> List[Dict[str, Any]]:
+    """(role, content, tokens) 목록에서 오래된 턴부터 건너뛰어 max_tokens 안에 드는 대화 내역 반환"""
+    start = 0
+    if max_tokens is not None:
+        # 사용자 메시지 + AI 응답 한 쌍(턴) 단위로 제외
+        while start < len(entries) and total_tokens > max_tokens:
+            for entry in entries[start:start + 2]:
+                total_tokens -= entry[2]
+            start += 2
+    return [{"role": role, "content": content} for role, content, _ in entries[start:]]
+
+
+class SessionHistory:
+    """
+    세션 하나의 대화 내역 (모든 메모리 타입 공용)
+
+    전송용 {"role", "content"} 딕셔너리를 메시지 추가 시 한 번만 만들어 리스트에 쌓아 두고,
+    오래된 메시지는 시작 위치(head)만 옮겨 제거한다. 따라서 프롬프트 조립은 리스트 슬라이스 한 번이고,
+    추가/제거 비용은 새로 추가·제거되는 메시지 수에만 비례한다.
+    반환된 딕셔너리는 다음 요청에서도 재사용되므로 수정하면 안 된다.
+    """
+
+    __slots__ = ("messages", "tokens", "head", "total_tokens", "summary")
+
+    # head 앞쪽의 제거된 항목이 이 개수를 넘고 절반 이상이면 리스트를 실제로 줄임
+    COMPACT_THRESHOLD = 64
+
+    def __init__(self):
+        self.messages: List[Dict[str, str]] = []
+        self.tokens: List[int] = []
+        self.head = 0
+        self.total_tokens = 0
+        # summary 타입: 오래된 턴의 누적 요약
+        self.summary: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.messages) - self.head
+
+    def append(self, role: str, content: str) -> int:
+        """메시지 추가 후 추정 바이트 반환"""
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        self.messages.append({"role": role, "content": content})
+        self.tokens.append(tokens)
+        self.total_tokens += tokens
+        return _message_bytes(content)
+
+    def pop_front(self, count: int) -> int:
+        """가장 오래된 메시지 count개 제거 후 제거된 추정 바이트 반환"""
+        end = min(self.head + count, len(self.messages))
+        removed_bytes = 0
+        for i in range(self.head, end):
+            removed_bytes += _message_bytes(self.messages[i]["content"])
+            self.total_tokens -= self.tokens[i]
+        self.head = end
+
+        if self.head >= self.COMPACT_THRESHOLD and self.head * 2 >= len(self.messages):
+            del self.messages[:self.head]
+            del self.tokens[:self.head]
+            self.head = 0
+        return removed_bytes
+
+    def trim(self, max_tokens: Optional[int], max_messages: int) -> int:
+        """개수/토큰 한도를 넘는 오래된 턴(사용자 메시지 + AI 응답) 제거 후 제거된 추정 바이트 반환"""
+        overflow = len(self) - max_messages
+        removed_bytes = self.pop_front(overflow + overflow % 2) if overflow > 0 else 0
+        if max_tokens is not None:
+            while len(self) and self.total_tokens > max_tokens:
+                removed_bytes += self.pop_front(2)
+        return removed_bytes
+
+    def history(self, max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """max_tokens 안에 드는 최근 대화 내역 (summary가 있으면 맨 앞에 system 메시지로 포함)"""
+        start = self.head
+        if max_tokens is not None:
+            total_tokens = self.total_tokens
+            while start < len(self.messages) and total_tokens > max_tokens:
+                total_tokens -= sum(self.tokens[start:start + 2])
+                start += 2
+
+        messages = self.messages[start:]
+        if self.summary:
+            messages.insert(0, _summary_message(self.summary))
+        return messages
+
+
+def _summary_message(summary: str) -> Dict[str, Any]:
+    """누적 요약을 대화 내역 맨 앞에 붙일 system 메시지로 변환"""
+    return {"role": "system", "content": f"[이전 대화 요약]\n{summary}"}
+
+
+class ChatMemoryBackend:
+    """
+    대화 메모리 저장소 인터페이스
+
+    세션별 대화 내역을 {"role", "content"} 딕셔너리 목록으로 저장하고 반환한다.
+    """
+
+    name = "base"
+
+    async def append_turn(
+        self,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        memory_type: str,
+        max_messages: int,
+        max_tokens: Optional[int] = None
+    ):
+        """
+        한 턴(사용자 메시지 + AI 응답) 추가 후 최근 max_messages개(및 max_tokens 토큰)만 유지하고 메시지 수 반환
+
+        Args:
+            session_id: 세션 ID
+            user_message: 사용자 메시지
+            assistant_message: AI 응답
+            memory_type: 메모리 타입
+            max_messages: 보관할 최대 메시지 수
+            max_tokens: 보관할 최대 추정 토큰 수 (token_buffer, None이면 제한 없음)
+
+        Returns:
+            int: 추가 후 세션의 메시지 수
+        """
+        raise NotImplementedError
+
+    async def get_history(
+        self,
+        session_id: str,
+        memory_type: str,
+        max_tokens: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        세션의 이전 대화 내역 (오래된 순, summary 타입은 누적 요약 system 메시지가 맨 앞)
+
+        Args:
+            session_id: 세션 ID
+            memory_type: 메모리 타입
+            max_tokens: 반환할 내역의 최대 추정 토큰 수 (token_buffer, 오래된 메시지부터 제외)
+        """
+        raise NotImplementedError
+
+    async def get_summary_source(
+        self,
+        session_id: str,
+        keep_messages: int
+    ) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        요약 대상 조회 (summary 타입)
+
+        Args:
+            session_id: 세션 ID
+            keep_messages: 원문으로 남길 최근 메시지 수
+
+        Returns:
+            Tuple[Optional[str], List[Dict[str, Any]]]: 기존 요약, 요약에 합칠 오래된 메시지 목록
+        """
+        raise NotImplementedError
+
+    async def compact(
+        self,
+        session_id: str,
+        summary: str,
+        previous_summary: Optional[str],
+        summarized_messages: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        새 요약 저장 후 요약에 합쳐진 가장 오래된 메시지 제거
+
+        요약하는 동안 추가된 턴은 뒤쪽에 붙으므로 앞에서부터 제거해도 유지된다.
+        단, 그 사이 다른 요약 작업(다른 워커 포함)이 먼저 압축했거나 개수 제한으로 앞쪽 메시지가
+        밀려났으면 요약하지 않은 턴이 지워지므로, 기존 요약과 앞쪽 메시지가 get_summary_source 결과와
+        그대로일 때만 압축한다.
+
+        Args:
+            session_id: 세션 ID
+            summary: 새 요약
+            previous_summary: get_summary_source로 읽은 기존 요약
+            summarized_messages: get_summary_source로 읽은 요약 대상 메시지
+
+        Returns:
+            bool: 압축 여부 (세션이 바뀌어 건너뛰었으면 False)
+        """
+        raise NotImplementedError
+
+    async def count(self, session_id: str) -> Optional[int]:
+        """세션의 메시지 수 (세션이 없으면 None)"""
+        raise NotImplementedError
+
+    async def clear(self, session_id: str):
+        """세션 삭제"""
+        raise NotImplementedError
+
+    async def start(self):
+        """애플리케이션 시작 시 준비 작업"""
+
+    async def close(self):
+        """연결 정리"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """저장소 지표"""
+        return {"backend": self.name}
+
+
+class InProcessMemoryBackend(ChatMemoryBackend):
+    """
+    프로세스 메모리에 SessionHistory로 보관하는 저장소 (워커 간 공유 안 됨)
+
+    journal이 있으면 모든 변경을 저널 파일에 추가 기록하고, 메모리에 없는 세션은 처음 사용될 때
+    저널에서 복원한다. 따라서 재시작 후에도 대화가 이어지고, 바이트 예산으로 제거된 세션도 다시 불러올 수 있다.
+    """
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_sessions: int,
+        max_bytes: int,
+        idle_ttl_seconds: float,
+        journal=None,
+        journal_sync_seconds: float = 1.0
+    ):
+        # 세션별 메모리 저장소 (최대 세션 수 / 바이트 예산 / 유휴 TTL 제한, LRU 제거)
+        self._session_memories: SessionStore[SessionHistory] = SessionStore(
+            max_sessions=max_sessions,
+            max_bytes=max_bytes,
+            idle_ttl_seconds=idle_ttl_seconds
+        )
+        # 대화 메모리 저널 (ChatMemoryJournal, None이면 재시작 시 대화 내역 유실)
+        self.journal = journal
+        self.journal_sync_seconds = journal_sync_seconds
+        self._journal_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """저널을 열어 색인을 만들고(스레드) 주기적 fsync/압축 작업 시작"""
+        if self.journal is None or self.journal.is_open:
+            return
+        try:
+            opened = await asyncio.to_thread(self.journal.open)
+        except OSError as e:
+            logger.error(f"대화 메모리 저널을 열 수 없어 저널 없이 실행합니다: {str(e)}")
+            opened = False
+        if not opened:
+            self.journal = None
+            return
+        self._journal_task = asyncio.create_task(self._journal_loop())
+
+    async def _journal_loop(self):
+        while True:
+            await asyncio.sleep(self.journal_sync_seconds)
+            try:
+                await self.journal.sync_async()
+                if self.journal.needs_compaction():
+                    await self.journal.compact()
+            except OSError as e:
+                logger.error(f"대화 메모리 저널 기록 실패: {str(e)}")
+
+    def _load(self, session_id: str, touch: bool = True) -> Optional[SessionHistory]:
+        """메모리에서 세션 조회, 없으면 저널에서 복원"""
+        if touch:
+            memory = self._session_memories.get(session_id)
+        else:
+            memory = self._session_memories.peek(session_id)
+        if memory is not None or self.journal is None or session_id not in self.journal:
+            return memory
+
+        memory = self.journal.load(session_id)
+        if memory is not None:
+            size = SESSION_OVERHEAD_BYTES + len((memory.summary or "").encode("utf-8"))
+            size += sum(_message_bytes(message["content"]) for message in memory.messages[memory.head:])
+            self._session_memories.put(session_id, memory, size)
+        return memory
+
+    def get_or_create_memory(self, session_id: str) -> SessionHistory:
+        """세션 ID에 따른 대화 내역 생성 또는 반환"""
+        memory = self._load(session_id)
+        if memory is None:
+            memory = SessionHistory()
+            self._session_memories.put(session_id, memory, SESSION_OVERHEAD_BYTES)
+        return memory
+
+    async def append_turn(self, session_id, user_message, assistant_message, memory_type, max_messages, max_tokens=None):
+        memory = self.get_or_create_memory(session_id)
+
+        # 메시지 추가 후 보관 한도 밖의 오래된 턴 제거, 저장소 바이트 예산 반영
+        added_bytes = memory.append("user", user_message) + memory.append("assistant", assistant_message)
+        added_bytes -= memory.trim(max_tokens, max_messages)
+        if self.journal is not None:
+            self.journal.record_turn(session_id, user_message, assistant_message, max_messages, max_tokens)
+        self._session_memories.add_size(session_id, added_bytes)
+        return len(memory)
+
+    async def get_history(self, session_id, memory_type, max_tokens=None):
+        memory = self._load(session_id)
+        if memory is None:
+            return []
+        return memory.history(max_tokens)
+
+    async def get_summary_source(self, session_id, keep_messages):
+        memory = self._load(session_id, touch=False)
+        if memory is None:
+            return None, []
+        fold_count = max(0, len(memory) - keep_messages)
+        return memory.summary, memory.messages[memory.head:memory.head + fold_count]
+
+    async def compact(self, session_id, summary, previous_summary, summarized_messages):
+        memory = self._load(session_id, touch=False)
+        if memory is None:
+            return False
+        summarized_count = len(summarized_messages)
+        # get_summary_source가 반환한 딕셔너리가 그대로 앞쪽에 있어야 함 (동일 객체 비교)
+        current = memory.messages[memory.head:memory.head + summarized_count]
+        if memory.summary != previous_summary or len(current) != summarized_count or any(
+            a is not b for a, b in zip(current, summarized_messages)
+        ):
+            return False
+        removed_bytes = memory.pop_front(summarized_count)
+        added_bytes = len(summary.encode("utf-8")) - len((memory.summary or "").encode("utf-8"))
+        memory.summary = summary
+        if self.journal is not None:
+            self.journal.record_compact(session_id, summary, summarized_count)
+        self._session_memories.add_size(session_id, added_bytes - removed_bytes)
+        return True
+
+    async def count(self, session_id):
+        memory = self._load(session_id, touch=False)
+        if memory is None:
+            return None
+        return len(memory)
+
+    async def clear(self, session_id):
+        self._session_memories.pop(session_id)
+        if self.journal is not None and session_id in self.journal:
+            self.journal.record_clear(session_id)
+
+    async def close(self):
+        if self._journal_task is not None:
+            self._journal_task.cancel()
+            await asyncio.gather(self._journal_task, return_exceptions=True)
+            self._journal_task = None
+        if self.journal is not None:
+            await asyncio.to_thread(self.journal.close)
+
+    def get_stats(self):
+        stats = {"backend": self.name, **self._session_memories.get_stats()}
+        if self.journal is not None:
+            stats.update(self.journal.get_stats())
+        return stats
+
+
+# 턴 추가 후 개수 / 토큰 한도를 넘는 오래된 턴 제거 (token_buffer, 프로세스 메모리 저장소의 trim과 같은 규칙)
+# KEYS[1]: 세션 키 / ARGV: 사용자 메시지, AI 응답, max_messages, max_tokens, idle_ttl_seconds
+_APPEND_WITH_TOKEN_BUDGET_SCRIPT = """
+local key = KEYS[1]
+redis.call('RPUSH', key, ARGV[1], ARGV[2])
+redis.call('LTRIM', key, -tonumber(ARGV[3]), -1)
+local max_tokens = tonumber(ARGV[4])
+local items = redis.call('LRANGE', key, 0, -1)
+local tokens = {}
+local total = 0
+for i, item in ipairs(items) do
+    tokens[i] = cjson.decode(item)['tokens'] or 0
+    total = total + tokens[i]
+end
+local start = 1
+while start <= #items and total > max_tokens do
+    total = total - tokens[start] - (tokens[start + 1] or 0)
+    start = start + 2
+end
+if start > 1 then
+    redis.call('LTRIM', key, start - 1, -1)
+end
+local ttl = tonumber(ARGV[5])
+if ttl > 0 then
+    redis.call('EXPIRE', key, ttl)
+end
+return redis.call('LLEN', key)
+"""
+
+# 기존 요약과 앞쪽 메시지가 요약 시작 시점 그대로일 때만 새 요약 저장 + 요약된 메시지 제거
+# KEYS[1]: 세션 키, KEYS[2]: 요약 키 / ARGV: 새 요약, 기존 요약("" = 없음), [[role, content], ...] JSON, idle_ttl_seconds
+_COMPACT_IF_UNCHANGED_SCRIPT = """
+local current = redis.call('GET', KEYS[2]) or ''
+if current ~= ARGV[2] then
+    return 0
+end
+local expected = cjson.decode(ARGV[3])
+local items = redis.call('LRANGE', KEYS[1], 0, #expected - 1)
+if #items ~= #expected then
+    return 0
+end
+for i, item in ipairs(items) do
+    local message = cjson.decode(item)
+    if message['role'] ~= expected[i][1] or message['content'] ~= expected[i][2] then
+        return 0
+    end
+end
+local ttl = tonumber(ARGV[4])
+if ttl > 0 then
+    redis.call('SET', KEYS[2], ARGV[1], 'EX', ttl)
+else
+    redis.call('SET', KEYS[2], ARGV[1])
+end
+redis.call('LTRIM', KEYS[1], #expected, -1)
+return 1
+"""
+
+
+class RedisMemoryBackend(ChatMemoryBackend):
+    """
+    Redis 리스트로 보관하는 저장소 (모든 워커가 같은 세션을 공유)
+
+    세션마다 JSON 메시지 리스트 하나를 사용한다. 추가(RPUSH + LTRIM + EXPIRE)와
+    조회(LRANGE + EXPIRE)는 각각 파이프라인 한 번(왕복 1회)으로 처리한다.
+    메시지마다 추정 토큰 수를 함께 저장하여 토큰 예산 적용 시 다시 계산하지 않는다.
+    토큰 예산이 있으면(token_buffer) 추가와 예산 초과 턴 제거를 Lua 스크립트 한 번으로 처리한다.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, idle_ttl_seconds: float, key_prefix: str = "chat:memory:"):
+        """
+        Args:
+            client: redis.asyncio.Redis 클라이언트 (decode_responses=True)
+            idle_ttl_seconds: 마지막 사용 후 세션 유지 시간 (0이면 만료 없음)
+            key_prefix: 세션 키 접두사
+        """
+        self._redis = client
+        self.idle_ttl_seconds = int(idle_ttl_seconds)
+        self.key_prefix = key_prefix
+        self.round_trips = 0
+        self._append_with_token_budget = client.register_script(_APPEND_WITH_TOKEN_BUDGET_SCRIPT)
+        self._compact_if_unchanged = client.register_script(_COMPACT_IF_UNCHANGED_SCRIPT)
+
+    @classmethod
+    def from_url(cls, redis_url: str, idle_ttl_seconds: float) -> "RedisMemoryBackend":
+        import redis.asyncio as redis_asyncio
+        return cls(redis_asyncio.from_url(redis_url, decode_responses=True), idle_ttl_seconds)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:summary"
+
+    async def append_turn(self, session_id, user_message, assistant_message, memory_type, max_messages, max_tokens=None):
+        key = self._key(session_id)
+        if max_tokens is not None:
+            length = await self._append_with_token_budget(
+                keys=[key],
+                args=[
+                    self._encode("user", user_message),
+                    self._encode("assistant", assistant_message),
+                    max_messages,
+                    max_tokens,
+                    self.idle_ttl_seconds
+                ]
+            )
+            self.round_trips += 1
+            return length
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.rpush(
+            key,
+            self._encode("user", user_message),
+            self._encode("assistant", assistant_message)
+        )
+        pipe.ltrim(key, -max_messages, -1)
+        pipe.llen(key)
+        if self.idle_ttl_seconds > 0:
+            pipe.expire(key, self.idle_ttl_seconds)
+        results = await pipe.execute()
+        self.round_trips += 1
+        return results[2]
+
+    @staticmethod
+    def _encode(role: str, content: str) -> str:
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        return json.dumps({"role": role, "content": content, "tokens": tokens}, ensure_ascii=False)
+
+    async def get_history(self, session_id, memory_type, max_tokens=None):
+        key = self._key(session_id)
+        summary_key = self._summary_key(session_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.lrange(key, 0, -1)
+        pipe.get(summary_key)
+        if self.idle_ttl_seconds > 0:
+            pipe.expire(key, self.idle_ttl_seconds)
+            pipe.expire(summary_key, self.idle_ttl_seconds)
+        results = await pipe.execute()
+        self.round_trips += 1
+
+        entries = []
+        total_tokens = 0
+        for item in results[0]:
+            message = json.loads(item)
+            tokens = message.get("tokens") or (estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS)
+            entries.append((message["role"], message["content"], tokens))
+            total_tokens += tokens
+        history = _trim_to_budget(entries, total_tokens, max_tokens)
+        if results[1]:
+            history.insert(0, _summary_message(results[1]))
+        return history
+
+    async def get_summary_source(self, session_id, keep_messages):
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.get(self._summary_key(session_id))
+        pipe.lrange(self._key(session_id), 0, -keep_messages - 1)
+        summary, items = await pipe.execute()
+        self.round_trips += 1
+        messages = []
+        for item in items:
+            message = json.loads(item)
+            messages.append({"role": message["role"], "content": message["content"]})
+        return summary, messages
+
+    async def compact(self, session_id, summary, previous_summary, summarized_messages):
+        # 확인과 압축을 스크립트 하나로 원자적으로 처리 (다른 워커의 요약 / 턴 추가와 섞이지 않음)
+        compacted = await self._compact_if_unchanged(
+            keys=[self._key(session_id), self._summary_key(session_id)],
+            args=[
+                summary,
+                previous_summary or "",
+                json.dumps([[message["role"], message["content"]] for message in summarized_messages], ensure_ascii=False),
+                self.idle_ttl_seconds
+            ]
+        )
+        self.round_trips += 1
+        return bool(compacted)
+
+    async def count(self, session_id):
+        length = await self._redis.llen(self._key(session_id))
+        self.round_trips += 1
+        return length or None
+
+    async def clear(self, session_id):
+        await self._redis.delete(self._key(session_id), self._summary_key(session_id))
+        self.round_trips += 1
+
+    async def close(self):
+        await self._redis.aclose()
+
+    def get_stats(self):
+        return {"backend": self.name, "round_trips": self.round_trips}
+
+
+def create_memory_backend(
+    backend: str,
+    redis_url: str,
+    max_sessions: int,
+    max_bytes: int,
+    idle_ttl_seconds: float,
+    journal=None,
+    journal_sync_seconds: float = 1.0
+) -> ChatMemoryBackend:
+    """
+    설정에 맞는 메모리 저장소 생성 (redis 패키지가 없으면 프로세스 메모리 저장소 사용)
+
+    Args:
+        backend: "memory" 또는 "redis"
+        redis_url: Redis URL (backend가 redis일 때 사용)
+        max_sessions: 프로세스 메모리 저장소 최대 세션 수
+        max_bytes: 프로세스 메모리 저장소 바이트 예산
+        idle_ttl_seconds: 유휴 세션 만료 시간
+        journal: 프로세스 메모리 저장소용 ChatMemoryJournal (None이면 저널 없음)
+        journal_sync_seconds: 저널 fsync 주기
+
+    Returns:
+        ChatMemoryBackend: 메모리 저장소
+    """
+    if backend == "redis":
+        try:
+            memory_backend = RedisMemoryBackend.from_url(redis_url, idle_ttl_seconds)
+            logger.info("Redis 대화 메모리 저장소 사용")
+            return memory_backend
+        except ImportError:
+            logger.warning("redis 패키지가 설치되어 있지 않아 프로세스 메모리 저장소를 사용합니다. (pip install redis)")
+
+    return InProcessMemoryBackend(max_sessions, max_bytes, idle_ttl_seconds, journal, journal_sync_seconds)
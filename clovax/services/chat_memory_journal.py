@@ -0,0 +1,424 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.chat_memory_backend import SessionHistory
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 레코드 종류
+OP_TURN = "turn"
+OP_COMPACT = "compact"
+OP_SNAPSHOT = "snapshot"
+OP_CLEAR = "clear"
+
+
+class _IndexEntry:
+    """세션 하나의 저널 레코드 위치 목록 [offset, length, offset, length, ...]과 마지막 기록 시각"""
+
+    __slots__ = ("spans", "updated_at")
+
+    def __init__(self):
+        self.spans: List[int] = []
+        self.updated_at = 0.0
+
+
+class ChatMemoryJournal:
+    """
+    대화 메모리 추가 전용(append-only) 저널
+
+    모든 변경(턴 추가, 요약 압축, 삭제)을 한 줄 레코드로 파일 끝에 기록하고,
+    주기적으로 flush + fsync 한다. 레코드 형식은 `"세션ID"\\t종류\\t시각\\tJSON\\n` 이다.
+
+    시작 시에는 파일을 mmap으로 훑어 줄 앞부분(세션 ID, 시각)만 읽어 세션별 레코드 위치 색인을 만들고,
+    내용(JSON)은 해당 세션이 처음 사용될 때만 읽어 복원한다.
+    파일이 커지면 세션마다 스냅샷 한 줄로 다시 쓰는 압축(compaction)을 백그라운드 스레드에서 수행한다.
+    """
+
+    def __init__(self, path: str, idle_ttl_seconds: float, compact_min_bytes: int):
+        """
+        Args:
+            path: 저널 파일 경로
+            idle_ttl_seconds: 마지막 기록 후 세션 유지 시간 (지나면 복원/압축 시 제외, 0이면 만료 없음)
+            compact_min_bytes: 압축을 시작하는 최소 파일 크기
+        """
+        self.path = path
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.compact_min_bytes = compact_min_bytes
+
+        self._index: Dict[str, _IndexEntry] = {}
+        self._file = None
+        self._read_fd: Optional[int] = None
+        self._size = 0
+        self._flushed_size = 0
+        self._compacted_size = 0
+        self._compacting = False
+        self._cleared_during_compaction: Set[str] = set()
+
+        self.hydrated_sessions = 0
+        self.expired_sessions = 0
+        self.compactions = 0
+        self.corrupt_records = 0
+        self.last_index_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # 열기 / 닫기
+    # ------------------------------------------------------------------
+
+    def open(self) -> bool:
+        """
+        저널 파일을 열고 색인 생성 (동기, 스레드에서 호출)
+
+        Returns:
+            bool: 사용 가능 여부 (다른 프로세스가 사용 중이면 False)
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._file = open(self.path, "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                logger.warning(f"다른 프로세스가 대화 메모리 저널을 사용 중이어서 저널을 비활성화합니다: {self.path}")
+                self._file.close()
+                self._file = None
+                return False
+
+        self._read_fd = os.open(self.path, os.O_RDONLY)
+        started_at = time.monotonic()
+        self._index, self._size = self._build_index(self._read_fd)
+        self.last_index_seconds = time.monotonic() - started_at
+        # 비정상 종료로 잘린 마지막 줄은 잘라냄 (남겨 두면 이후 추가되는 레코드의 위치가 색인과 어긋남)
+        file_size = os.fstat(self._file.fileno()).st_size
+        if file_size > self._size:
+            logger.warning(f"대화 메모리 저널 끝의 잘린 레코드 {file_size - self._size} bytes를 제거합니다: {self.path}")
+            os.ftruncate(self._file.fileno(), self._size)
+        self._flushed_size = self._size
+        # 재시작 직후 파일이 최소 크기를 넘으면 한 번 압축
+        self._compacted_size = 0
+        logger.info(
+            f"대화 메모리 저널 색인 완료: 세션 {len(self._index)}개, "
+            f"{self._size} bytes, {self.last_index_seconds:.2f}초"
+        )
+        return True
+
+    def close(self):
+        """버퍼 기록 후 파일 닫기"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        if self._read_fd is not None:
+            os.close(self._read_fd)
+            self._read_fd = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    # ------------------------------------------------------------------
+    # 색인
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _build_index(fd: int) -> Tuple[Dict[str, _IndexEntry], int]:
+        """파일을 mmap으로 훑어 세션별 레코드 위치 색인 생성 (JSON 본문은 파싱하지 않음)"""
+        index: Dict[str, _IndexEntry] = {}
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return index, 0
+
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset < size:
+                end = data.find(b"\n", offset)
+                if end == -1:
+                    # 마지막 줄이 잘린 경우(비정상 종료) 무시
+                    break
+                header = data[offset:min(end, offset + 512)].split(b"\t", 3)
+                if len(header) >= 3:
+                    try:
+                        session_id = json.loads(header[0])
+                        op = header[1].decode()
+                        timestamp = float(header[2])
+                    except ValueError:
+                        offset = end + 1
+                        continue
+
+                    if op == OP_CLEAR:
+                        index.pop(session_id, None)
+                    else:
+                        entry = index.get(session_id)
+                        if entry is None or op == OP_SNAPSHOT:
+                            entry = index[session_id] = _IndexEntry()
+                        entry.spans.append(offset)
+                        entry.spans.append(end + 1 - offset)
+                        entry.updated_at = timestamp
+                offset = end + 1
+            return index, offset
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._index
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+
+    def _write(self, session_id: str, op: str, payload: Any):
+        if self._file is None:
+            return
+        now = time.time()
+        line = (
+            f"{json.dumps(session_id, ensure_ascii=False)}\t{op}\t{now:.3f}\t"
+            f"{json.dumps(payload, ensure_ascii=False)}\n"
+        ).encode("utf-8")
+        offset = self._size
+        self._file.write(line)
+        self._size += len(line)
+
+        if op == OP_CLEAR:
+            self._index.pop(session_id, None)
+            if self._compacting:
+                self._cleared_during_compaction.add(session_id)
+            return
+        entry = self._index.get(session_id)
+        if entry is None or op == OP_SNAPSHOT:
+            entry = self._index[session_id] = _IndexEntry()
+        entry.spans.append(offset)
+        entry.spans.append(len(line))
+        entry.updated_at = now
+
+    def record_turn(self, session_id: str, user_message: str, assistant_message: str, max_messages: int, max_tokens: Optional[int]):
+        """턴 추가 기록 (복원 시 같은 한도로 다시 잘라냄)"""
+        self._write(session_id, OP_TURN, [user_message, assistant_message, max_messages, max_tokens])
+
+    def record_compact(self, session_id: str, summary: str, summarized_count: int):
+        """요약 압축 기록"""
+        self._write(session_id, OP_COMPACT, [summary, summarized_count])
+
+    def record_clear(self, session_id: str):
+        """세션 삭제 기록"""
+        self._write(session_id, OP_CLEAR, None)
+
+    def flush(self):
+        """버퍼에 쌓인 레코드를 파일에 쓰기 (OS 페이지 캐시까지, 이벤트 루프에서 호출)"""
+        if self._file is None:
+            return
+        self._file.flush()
+        self._flushed_size = self._size
+
+    def sync(self):
+        """버퍼를 파일에 쓰고 디스크에 반영 (동기)"""
+        if self._file is None:
+            return
+        self.flush()
+        os.fsync(self._file.fileno())
+
+    async def sync_async(self):
+        """flush 후 fsync는 스레드에서 실행하여 이벤트 루프를 막지 않음"""
+        if self._file is None:
+            return
+        self.flush()
+        await asyncio.to_thread(os.fsync, self._file.fileno())
+
+    # ------------------------------------------------------------------
+    # 복원
+    # ------------------------------------------------------------------
+
+    def load(self, session_id: str) -> Optional[SessionHistory]:
+        """
+        색인된 레코드를 읽어 세션 복원 (세션이 처음 사용될 때 호출)
+
+        Returns:
+            Optional[SessionHistory]: 저널에 없거나 유휴 만료되었으면 None
+        """
+        entry = self._index.get(session_id)
+        if entry is None or self._read_fd is None:
+            return None
+
+        if self.idle_ttl_seconds > 0 and time.time() - entry.updated_at > self.idle_ttl_seconds:
+            del self._index[session_id]
+            self.expired_sessions += 1
+            return None
+
+        # 아직 파일에 쓰이지 않은 레코드가 있으면 먼저 flush
+        if entry.spans[-2] + entry.spans[-1] > self._flushed_size:
+            self.flush()
+
+        history = self._replay(self._read_fd, entry.spans)
+        self.hydrated_sessions += 1
+        return history
+
+    def _replay(self, fd: int, spans: List[int]) -> SessionHistory:
+        """레코드를 순서대로 적용해 세션 복원 (손상된 레코드는 건너뜀)"""
+        history = SessionHistory()
+        for i in range(0, len(spans), 2):
+            line = os.pread(fd, spans[i + 1], spans[i])
+            try:
+                _, op, _, body = line.rstrip(b"\n").split(b"\t", 3)
+                payload = json.loads(body)
+                op = op.decode()
+
+                if op == OP_TURN:
+                    user_message, assistant_message, max_messages, max_tokens = payload
+                    history.append("user", user_message)
+                    history.append("assistant", assistant_message)
+                    history.trim(max_tokens, max_messages)
+                elif op == OP_COMPACT:
+                    summary, summarized_count = payload
+                    history.pop_front(summarized_count)
+                    history.summary = summary
+                elif op == OP_SNAPSHOT:
+                    snapshot = SessionHistory()
+                    for role, content in payload["messages"]:
+                        snapshot.append(role, content)
+                    snapshot.summary = payload.get("summary")
+                    history = snapshot
+            except (ValueError, TypeError, KeyError) as e:
+                self.corrupt_records += 1
+                logger.warning(f"손상된 대화 메모리 저널 레코드를 건너뜁니다 (offset {spans[i]}): {str(e)}")
+        return history
+
+    # ------------------------------------------------------------------
+    # 압축
+    # ------------------------------------------------------------------
+
+    def needs_compaction(self) -> bool:
+        """파일이 최소 크기를 넘고 직전 압축 후 크기의 2배 이상이면 압축 필요"""
+        return (
+            self._file is not None
+            and not self._compacting
+            and self._size >= self.compact_min_bytes
+            and self._size >= 2 * self._compacted_size
+        )
+
+    async def compact(self):
+        """
+        세션마다 스냅샷 한 줄로 저널 다시 쓰기
+
+        압축 시작 시점(cut)까지의 내용은 스레드에서 새 파일로 다시 쓰고, 그동안 추가된 레코드(cut 이후)는
+        교체 직전에 이벤트 루프에서 새 파일 끝에 이어 붙인다.
+        """
+        if self._compacting or self._file is None:
+            return
+        self._compacting = True
+        try:
+            self.flush()
+            cut = self._size
+            spans_by_session = {
+                session_id: list(entry.spans)
+                for session_id, entry in self._index.items()
+            }
+            updated_at = {session_id: entry.updated_at for session_id, entry in self._index.items()}
+
+            tmp_path = f"{self.path}.compact"
+            new_index, new_size = await asyncio.to_thread(
+                self._write_snapshots, tmp_path, spans_by_session, updated_at, cut
+            )
+
+            # cut 이후에 추가된 레코드를 새 파일 끝에 복사하고 파일 교체 (루프에서 동기 실행)
+            self.flush()
+            tail = os.pread(self._read_fd, self._size - cut, cut) if self._size > cut else b""
+            with open(tmp_path, "ab") as tmp:
+                tmp.write(tail)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            shift = new_size - cut
+            for session_id, entry in self._index.items():
+                # 압축 중 삭제 후 다시 생성된 세션은 스냅샷 없이 cut 이후 레코드만 사용
+                merged = None if session_id in self._cleared_during_compaction else new_index.get(session_id)
+                if merged is None:
+                    merged = new_index[session_id] = _IndexEntry()
+                for i in range(0, len(entry.spans), 2):
+                    if entry.spans[i] >= cut:
+                        merged.spans.append(entry.spans[i] + shift)
+                        merged.spans.append(entry.spans[i + 1])
+                merged.updated_at = entry.updated_at
+            # 압축 중 삭제된 세션, 만료되어 남은 레코드가 없는 세션 제외
+            for session_id in [
+                sid for sid, entry in new_index.items()
+                if sid not in self._index or not entry.spans
+            ]:
+                del new_index[session_id]
+
+            os.replace(tmp_path, self.path)
+            self._reopen()
+            self._index = new_index
+            self._size = self._flushed_size = self._compacted_size = new_size + len(tail)
+            self.compactions += 1
+            logger.info(f"대화 메모리 저널 압축 완료: {cut} -> {self._size} bytes, 세션 {len(self._index)}개")
+        except Exception as e:
+            logger.error(f"대화 메모리 저널 압축 실패: {str(e)}")
+        finally:
+            self._compacting = False
+            self._cleared_during_compaction.clear()
+
+    def _write_snapshots(
+        self,
+        tmp_path: str,
+        spans_by_session: Dict[str, List[int]],
+        updated_at: Dict[str, float],
+        cut: int
+    ) -> Tuple[Dict[str, _IndexEntry], int]:
+        """cut 이전 레코드로 세션별 상태를 복원해 스냅샷 파일 작성 (스레드에서 실행)"""
+        new_index: Dict[str, _IndexEntry] = {}
+        offset = 0
+        now = time.time()
+        with open(tmp_path, "wb") as tmp:
+            for session_id, spans in spans_by_session.items():
+                if self.idle_ttl_seconds > 0 and now - updated_at[session_id] > self.idle_ttl_seconds:
+                    continue
+                # 압축 시작 후 추가된 레코드는 교체 직전에 이어 붙이므로 제외
+                while spans and spans[-2] >= cut:
+                    del spans[-2:]
+                if not spans:
+                    continue
+                history = self._replay(self._read_fd, spans)
+                payload = {
+                    "messages": [[m["role"], m["content"]] for m in history.messages[history.head:]],
+                    "summary": history.summary
+                }
+                line = (
+                    f"{json.dumps(session_id, ensure_ascii=False)}\t{OP_SNAPSHOT}\t{updated_at[session_id]:.3f}\t"
+                    f"{json.dumps(payload, ensure_ascii=False)}\n"
+                ).encode("utf-8")
+                tmp.write(line)
+                entry = new_index[session_id] = _IndexEntry()
+                entry.spans.extend((offset, len(line)))
+                entry.updated_at = updated_at[session_id]
+                offset += len(line)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        return new_index, offset
+
+    def _reopen(self):
+        """교체된 파일로 쓰기/읽기 핸들 다시 열기 (잠금 유지)"""
+        old_file, old_fd = self._file, self._read_fd
+        self._file = open(self.path, "ab")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._read_fd = os.open(self.path, os.O_RDONLY)
+        old_file.close()
+        os.close(old_fd)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """저널 지표 반환"""
+        return {
+            "journal_sessions": len(self._index),
+            "journal_bytes": self._size,
+            "journal_hydrated_sessions": self.hydrated_sessions,
+            "journal_expired_sessions": self.expired_sessions,
+            "journal_compactions": self.compactions,
+            "journal_corrupt_records": self.corrupt_records,
+            "journal_index_seconds": round(self.last_index_seconds, 3)
+        }
@@ -1,128 +1,464 @@
-from typing import Dict, List, Any, Optional
-from langchain.memory import (
-    ConversationBufferWindowMemory,
-    ConversationSummaryBufferMemory,
-    ConversationTokenBufferMemory
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional, Set, Tuple
+from core.config import settings
+from services.chat_memory_backend import ChatMemoryBackend, create_memory_backend
+from services.chat_memory_journal import ChatMemoryJournal
+from services.chat_semantic_memory import SemanticTurnIndex, last_user_text
+from services.chat_session_store import SessionStore
+from services.clova_chat_service import clova_service
+from services.rag_embedding_service import clova_embedding_service
+from services.token_estimator import estimate_messages_tokens, get_context_tokens
+
+logger = logging.getLogger(__name__)
+
+# summary 메모리: 오래된 대화를 누적 요약에 합치는 프롬프트
+SUMMARY_SYSTEM_PROMPT = (
+    "당신은 대화 요약 도우미입니다. 기존 요약과 이어지는 대화를 합쳐 하나의 간결한 요약을 작성하세요. "
+    "사용자의 목적, 선호, 중요한 사실과 결정 사항, 아직 해결되지 않은 질문을 빠짐없이 남기고 "
+    "인사말이나 반복되는 내용은 생략하세요. 요약문만 출력하세요."
 )
-from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
+
+
+class SessionBusyError(Exception):
+    """같은 세션의 다른 요청이 대화 내역을 사용 중 (reject 모드 또는 대기 시간 초과)"""
+
+
+class _SessionLock:
+    """세션별 잠금과 대기/보유 중인 요청 수 (0이 되면 잠금 객체 제거)"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
 
 
 class ChatMemoryService:
     """CLOVAX API를 위한 멀티턴 대화 메모리 서비스"""
-    
-    def __init__(self):
-        # 세션별 메모리를 저장하는 딕셔너리
-        self._session_memories: Dict[str, ConversationBufferWindowMemory] = {}
-        
-    def get_or_create_memory(
-        self, 
-        session_id: str, 
-        memory_type: str = "buffer_window",
-        k: int = 10
-    ) -> ConversationBufferWindowMemory:
-        """세션 ID에 따른 메모리 인스턴스 생성 또는 반환"""
-        if session_id not in self._session_memories:
-            if memory_type == "buffer_window":
-                # 최근 K개의 대화만 저장
-                memory = ConversationBufferWindowMemory(
-                    k=k,
-                    return_messages=True,
-                    memory_key="chat_history"
-                )
-            elif memory_type == "token_buffer":
-                # 토큰 수 기준으로 대화 저장
-                if llm is None:
-                    llm = OpenAI()
-                memory = ConversationTokenBufferMemory(
-                    max_token_limit=2000,
-                    return_messages=True,
-                    memory_key="chat_history",
-                    llm=llm
-                )
+
+    def __init__(self, backend: Optional[ChatMemoryBackend] = None, k: int = 10):
+        # 세션별 대화 저장소 (CHAT_MEMORY_BACKEND: memory=워커별, redis=워커 간 공유)
+        self.backend = backend or create_memory_backend(
+            backend=settings.CHAT_MEMORY_BACKEND,
+            redis_url=settings.CHAT_MEMORY_REDIS_URL,
+            max_sessions=settings.CHAT_MEMORY_MAX_SESSIONS,
+            max_bytes=settings.CHAT_MEMORY_MAX_BYTES,
+            idle_ttl_seconds=settings.CHAT_MEMORY_IDLE_TTL_SECONDS,
+            journal=self._create_journal(),
+            journal_sync_seconds=settings.CHAT_MEMORY_JOURNAL_SYNC_SECONDS
+        )
+        # buffer_window: 최근 k턴(2k개 메시지)만 유지
+        self.k = k
+        # 진행 중인 요약 작업 (세션당 하나)
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        self.summaries_completed = 0
+        self.summaries_failed = 0
+        self.summaries_skipped = 0
+        # semantic: 세션별 턴 임베딩 색인 (워커별 메모리, 최대 세션 수 / 바이트 예산 / 유휴 TTL 제한)
+        self._semantic_indexes: SessionStore[SemanticTurnIndex] = SessionStore(
+            max_sessions=settings.CHAT_MEMORY_MAX_SESSIONS,
+            max_bytes=settings.CHAT_MEMORY_SEMANTIC_MAX_BYTES,
+            idle_ttl_seconds=settings.CHAT_MEMORY_IDLE_TTL_SECONDS
+        )
+        self._embedding_tasks: Set[asyncio.Task] = set()
+        self.turns_embedded = 0
+        self.turn_embeddings_failed = 0
+        self.turns_reindexed = 0
+        self.semantic_recalls = 0
+        self.semantic_recalled_turns = 0
+        # 세션별 잠금 (대화 내역 조회 ~ 새 턴 저장 구간 보호)
+        self._session_locks: Dict[str, _SessionLock] = {}
+        self.lock_acquisitions = 0
+        self.lock_contentions = 0
+        self.lock_rejections = 0
+        self.lock_wait_seconds = 0.0
+        self.lock_max_wait_seconds = 0.0
+
+    @staticmethod
+    def _create_journal() -> Optional[ChatMemoryJournal]:
+        """프로세스 메모리 저장소 + CHAT_MEMORY_JOURNAL_PATH 설정 시 저널 생성 (파일은 startup에서 열림)"""
+        if settings.CHAT_MEMORY_BACKEND != "memory" or not settings.CHAT_MEMORY_JOURNAL_PATH:
+            return None
+        return ChatMemoryJournal(
+            path=settings.CHAT_MEMORY_JOURNAL_PATH,
+            idle_ttl_seconds=settings.CHAT_MEMORY_IDLE_TTL_SECONDS,
+            compact_min_bytes=settings.CHAT_MEMORY_JOURNAL_COMPACT_MIN_BYTES
+        )
+
+    def _max_messages(self, memory_type: str) -> int:
+        if memory_type in ("token_buffer", "summary"):
+            return settings.CHAT_MEMORY_TOKEN_BUFFER_MAX_MESSAGES
+        if memory_type == "semantic":
+            # 임베딩 색인은 워커별 메모리이므로 저장소에 색인 한도만큼 원문을 유지 (재시작 / 다른 워커에서 색인 재구성)
+            # 프롬프트에는 최근 턴과 검색된 턴만 포함
+            return 2 * settings.CHAT_MEMORY_SEMANTIC_MAX_TURNS
+        return 2 * self.k
+
+    @staticmethod
+    def _history_token_budget(model_name: Optional[str], completion_tokens: Optional[int] = None) -> int:
+        """모델 컨텍스트 윈도우에서 응답 토큰을 뺀 대화 내역 토큰 예산"""
+        reserve = completion_tokens or settings.CHAT_MEMORY_COMPLETION_RESERVE_TOKENS
+        return max(0, get_context_tokens(model_name) - reserve)
+
+    async def acquire_session(self, session_id: str):
+        """
+        세션 잠금 획득 (다른 세션 요청과는 독립적으로 동작)
+
+        같은 세션의 요청이 진행 중이면 CHAT_MEMORY_SESSION_CONFLICT 설정에 따라
+        serialize는 CHAT_MEMORY_SESSION_LOCK_TIMEOUT까지 기다리고, reject는 바로 SessionBusyError를 발생시킨다.
+        잠금은 이 워커 프로세스 안에서만 유효하다. (redis 저장소로 여러 워커를 띄우면 다른 워커의 같은 세션 요청과는 직렬화되지 않음)
+
+        Raises:
+            SessionBusyError: 거절되었거나 대기 시간 초과
+        """
+        entry = self._session_locks.get(session_id)
+        if entry is None:
+            entry = self._session_locks[session_id] = _SessionLock()
+        entry.users += 1
+
+        try:
+            if not entry.lock.locked():
+                # 사용 중인 요청이 없으면 대기 없이 바로 획득
+                await entry.lock.acquire()
             else:
-                # 기본값: buffer_window
-                memory = ConversationBufferWindowMemory(
-                    k=k,
-                    return_messages=True,
-                    memory_key="chat_history"
-                )
-            
-            self._session_memories[session_id] = memory
-            
-        return self._session_memories[session_id]
-    
-    def add_message_to_memory(
-        self, 
-        session_id: str, 
-        user_message: str, 
+                self.lock_contentions += 1
+                if settings.CHAT_MEMORY_SESSION_CONFLICT == "reject":
+                    self.lock_rejections += 1
+                    raise SessionBusyError("같은 세션의 이전 요청이 처리 중입니다. 잠시 후 다시 시도해주세요.")
+
+                started_at = time.monotonic()
+                try:
+                    await asyncio.wait_for(entry.lock.acquire(), settings.CHAT_MEMORY_SESSION_LOCK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.lock_rejections += 1
+                    raise SessionBusyError("같은 세션의 이전 요청이 끝나지 않아 요청을 처리할 수 없습니다.")
+
+                waited = time.monotonic() - started_at
+                self.lock_wait_seconds += waited
+                self.lock_max_wait_seconds = max(self.lock_max_wait_seconds, waited)
+            self.lock_acquisitions += 1
+        except BaseException:
+            self._release_entry(session_id, entry)
+            raise
+
+    def release_session(self, session_id: str):
+        """acquire_session으로 획득한 세션 잠금 해제"""
+        entry = self._session_locks.get(session_id)
+        if entry is None:
+            return
+        entry.lock.release()
+        self._release_entry(session_id, entry)
+
+    def _release_entry(self, session_id: str, entry: _SessionLock):
+        entry.users -= 1
+        if entry.users == 0:
+            self._session_locks.pop(session_id, None)
+
+    @asynccontextmanager
+    async def session_lock(self, session_id: str) -> AsyncIterator[None]:
+        """세션 잠금 컨텍스트 (acquire_session / release_session)"""
+        await self.acquire_session(session_id)
+        try:
+            yield
+        finally:
+            self.release_session(session_id)
+
+    async def add_message_to_memory(
+        self,
+        session_id: str,
+        user_message: str,
         assistant_message: str,
-        memory_type: str = "buffer_window"
+        memory_type: str = "buffer_window",
+        model_name: Optional[str] = None
     ):
-        """대화 내용을 메모리에 추가"""
-        memory = self.get_or_create_memory(session_id, memory_type)
-        
-        # langchain 메모리에 대화 내용 저장
-        memory.chat_memory.add_user_message(user_message)
-        memory.chat_memory.add_ai_message(assistant_message)
-    
-    def get_messages_for_clovax(
-        self, 
-        session_id: str, 
+        """
+        대화 내용을 메모리에 추가
+
+        token_buffer는 모델 컨텍스트 윈도우 예산을 넘는 오래된 턴을 제거하고,
+        summary는 턴 수가 기준을 넘으면 오래된 턴의 요약을 백그라운드로 예약하고,
+        semantic은 턴 임베딩을 백그라운드로 예약한다.
+        """
+        max_tokens = None
+        if memory_type == "token_buffer":
+            max_tokens = self._history_token_budget(model_name)
+
+        message_count = await self.backend.append_turn(
+            session_id=session_id,
+            user_message=user_message,
+            assistant_message=assistant_message,
+            memory_type=memory_type,
+            max_messages=self._max_messages(memory_type),
+            max_tokens=max_tokens
+        )
+
+        if memory_type == "summary" and message_count >= 2 * settings.CHAT_MEMORY_SUMMARY_TRIGGER_TURNS:
+            self._schedule_summary(session_id)
+        elif memory_type == "semantic":
+            self._schedule_turn_embeddings(session_id, [(user_message, assistant_message)])
+
+    def _get_semantic_index(self, session_id: str) -> SemanticTurnIndex:
+        index = self._semantic_indexes.get(session_id)
+        if index is None:
+            index = SemanticTurnIndex(
+                dimension=clova_embedding_service.get_embedding_dimension(),
+                max_turns=settings.CHAT_MEMORY_SEMANTIC_MAX_TURNS
+            )
+            self._semantic_indexes.put(session_id, index, index.size_bytes())
+        return index
+
+    def _schedule_turn_embeddings(self, session_id: str, turns: List[Tuple[str, str]]):
+        """턴 번호를 대화 순서대로 바로 발급하고 임베딩은 백그라운드 태스크로 예약 (응답 지연 없음)"""
+        if not turns:
+            return
+        index = self._get_semantic_index(session_id)
+        seqs = [index.reserve_seq(user_message, assistant_message) for user_message, assistant_message in turns]
+        task = asyncio.create_task(self._embed_turns(session_id, index, list(zip(seqs, turns))))
+        self._embedding_tasks.add(task)
+        task.add_done_callback(self._embedding_tasks.discard)
+
+    def _sync_semantic_index(self, session_id: str, history: List[Dict[str, Any]]):
+        """
+        저장소의 대화 내역 중 이 워커의 색인에 없는 턴 임베딩 예약 (semantic)
+
+        색인은 워커별 메모리에만 있으므로 재시작 후나 다른 워커가 저장한 턴은 저장소 원문으로 다시 색인한다.
+        색인이 마지막으로 본 턴 이후의 턴만 추가하고, 그 턴을 찾을 수 없으면 색인을 새로 만든다.
+        """
+        index = self._semantic_indexes.get(session_id)
+        if len(history) < 2:
+            if index is not None:
+                self._semantic_indexes.pop(session_id)
+            return
+        if index is not None and index.last_turn == (history[-2]["content"], history[-1]["content"]):
+            return
+
+        turns = [
+            (history[i]["content"], history[i + 1]["content"])
+            for i in range(len(history) % 2, len(history) - 1, 2)
+        ]
+        start = 0
+        if index is not None:
+            start = next((i + 1 for i in range(len(turns) - 1, -1, -1) if turns[i] == index.last_turn), None)
+            if start is None:
+                self._semantic_indexes.pop(session_id)
+                start = 0
+        self.turns_reindexed += len(turns) - start
+        self._schedule_turn_embeddings(session_id, turns[start:])
+
+    async def _embed_turns(self, session_id: str, index: SemanticTurnIndex, turns: List[Tuple[int, Tuple[str, str]]]):
+        """턴들을 임베딩하여 세션 색인에 추가 (재색인 시 여러 턴을 동시에 요청)"""
+        await asyncio.gather(*(
+            self._embed_turn(session_id, index, seq, user_message, assistant_message)
+            for seq, (user_message, assistant_message) in turns
+        ))
+
+    async def _embed_turn(self, session_id: str, index: SemanticTurnIndex, seq: int, user_message: str, assistant_message: str):
+        """턴(사용자 메시지 + AI 응답)을 임베딩하여 세션 색인에 추가"""
+        try:
+            embedding = await clova_embedding_service.aembed_query(
+                f"{user_message}\n{assistant_message}",
+                use_cache=False
+            )
+            if not embedding.any():
+                raise ValueError("임베딩 결과가 비어 있습니다")
+
+            # 임베딩 중 세션이 삭제/만료되었거나 색인이 새로 만들어졌으면 버림
+            if self._semantic_indexes.peek(session_id) is not index:
+                return
+            added_bytes = index.add(seq, embedding, user_message, assistant_message)
+            self._semantic_indexes.add_size(session_id, added_bytes)
+            self.turns_embedded += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 실패한 턴은 검색 대상에서만 빠지고 최근 턴으로는 계속 포함됨
+            self.turn_embeddings_failed += 1
+            logger.error(f"대화 턴 임베딩 실패 - 세션: {session_id}, 오류: {str(e)}")
+
+    async def _recall_turns(self, session_id: str, current_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """최근 턴을 제외한 과거 턴 중 현재 질문과 관련된 턴 검색 (semantic)"""
+        index = self._semantic_indexes.get(session_id)
+        if index is None:
+            return []
+        before_seq = index.next_seq - settings.CHAT_MEMORY_SEMANTIC_RECENT_TURNS
+        # 최근 턴 외에 검색할 턴이 없으면 질문 임베딩 호출 생략
+        if not any(seq < before_seq for seq in index.seqs):
+            return []
+        question = last_user_text(current_messages)
+        if question is None:
+            return []
+
+        query_vector = await clova_embedding_service.aembed_query(question)
+        recalled = index.search(
+            query_vector,
+            top_k=settings.CHAT_MEMORY_SEMANTIC_TOP_K,
+            before_seq=before_seq,
+            min_score=settings.CHAT_MEMORY_SEMANTIC_MIN_SCORE
+        )
+        self.semantic_recalls += 1
+        self.semantic_recalled_turns += len(recalled) // 2
+        return recalled
+
+    def _schedule_summary(self, session_id: str):
+        """요약 작업을 백그라운드 태스크로 예약 (응답 지연 없음, 세션당 동시에 하나)"""
+        if session_id in self._summary_tasks:
+            return
+        task = asyncio.create_task(self._summarize_session(session_id))
+        self._summary_tasks[session_id] = task
+        task.add_done_callback(lambda _: self._summary_tasks.pop(session_id, None))
+
+    async def _summarize_session(self, session_id: str):
+        """오래된 턴을 기존 요약과 합쳐 새 요약으로 압축"""
+        keep_messages = 2 * settings.CHAT_MEMORY_SUMMARY_KEEP_TURNS
+        try:
+            summary, old_messages = await self.backend.get_summary_source(session_id, keep_messages)
+            if not old_messages:
+                return
+
+            transcript = "\n".join(
+                f"{'사용자' if msg['role'] == 'user' else 'AI'}: {msg['content']}"
+                for msg in old_messages
+            )
+            if summary:
+                transcript = f"[기존 요약]\n{summary}\n\n[이어지는 대화]\n{transcript}"
+
+            response = await clova_service.chat_completion(settings.CHAT_MEMORY_SUMMARY_MODEL, {
+                "messages": [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": transcript}
+                ],
+                "maxTokens": settings.CHAT_MEMORY_SUMMARY_MAX_TOKENS,
+                "temperature": 0.3
+            })
+            new_summary = (response.get("result", {}).get("message", {}).get("content") or "").strip()
+            if not new_summary:
+                raise ValueError("요약 결과가 비어 있습니다")
+
+            if not await self.backend.compact(session_id, new_summary, summary, old_messages):
+                # 요약하는 동안 다른 요약 작업(다른 워커 포함)이 먼저 압축했거나 앞쪽 턴이 밀려남 → 다음 턴에서 다시 시도
+                self.summaries_skipped += 1
+                logger.info(f"대화 요약 건너뜀 (요약 중 세션 변경) - 세션: {session_id}")
+                return
+            self.summaries_completed += 1
+            logger.info(f"대화 요약 완료 - 세션: {session_id}, 요약된 메시지: {len(old_messages)}개")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 실패해도 원문 대화는 그대로 남아 있으므로 다음 턴에서 다시 시도
+            self.summaries_failed += 1
+            logger.error(f"대화 요약 실패 - 세션: {session_id}, 오류: {str(e)}")
+
+    async def get_messages_for_clovax(
+        self,
+        session_id: str,
         current_messages: List[Dict[str, Any]],
-        memory_type: str = "buffer_window"
+        memory_type: str = "buffer_window",
+        model_name: Optional[str] = None,
+        completion_tokens: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """CLOVAX API 형식에 맞는 메시지 배열 생성 (이전 대화 포함)"""
-        memory = self.get_or_create_memory(session_id, memory_type)
-        
-        # 메모리에서 이전 대화 내역 가져오기
-        chat_history = memory.chat_memory.messages
-        
-        # CLOVAX API 형식으로 변환
-        clovax_messages = []
-        
-        # system 메시지 먼저 추가 (현재 메시지에서 추출)
-        system_messages = [msg for msg in current_messages if msg.get("role") == "system"]
-        clovax_messages.extend(system_messages)
-        
-        # 이전 대화 내역을 CLOVAX 형식으로 변환하여 추가
-        for msg in chat_history:
-            if isinstance(msg, HumanMessage):
-                clovax_messages.append({
-                    "role": "user",
-                    "content": msg.content
-                })
-            elif isinstance(msg, AIMessage):
-                clovax_messages.append({
-                    "role": "assistant", 
-                    "content": msg.content
-                })
-        
-        # 현재 사용자 메시지 추가 (system 제외)
-        current_user_messages = [
-            msg for msg in current_messages 
-            if msg.get("role") in ["user", "assistant"] and msg.get("role") != "system"
-        ]
-        clovax_messages.extend(current_user_messages)
-        
+        """
+        CLOVAX API 형식에 맞는 메시지 배열 생성 (이전 대화 포함)
+
+        token_buffer는 모델 컨텍스트 윈도우에서 응답 토큰(completion_tokens)과 현재 메시지 토큰을 뺀
+        예산 안에 드는 최근 대화만 포함한다. summary는 누적 요약을 system 메시지에 덧붙인다.
+        semantic은 최근 턴 앞에 현재 질문과 관련된 과거 턴(대화 순서대로)을 포함한다.
+        """
+        max_tokens = None
+        if memory_type == "token_buffer":
+            budget = self._history_token_budget(model_name, completion_tokens)
+            max_tokens = max(0, budget - estimate_messages_tokens(current_messages))
+
+        # 저장소에서 이전 대화 내역 가져오기 (CLOVAX 형식)
+        chat_history = await self.backend.get_history(session_id, memory_type, max_tokens)
+        if memory_type == "semantic":
+            self._sync_semantic_index(session_id, chat_history)
+            recent_count = 2 * settings.CHAT_MEMORY_SEMANTIC_RECENT_TURNS
+            recent = chat_history[-recent_count:] if recent_count > 0 else []
+            chat_history = await self._recall_turns(session_id, current_messages) + recent
+
+        # 현재 메시지를 system / 대화(user, assistant)로 한 번에 분리
+        system_messages = []
+        current_chat_messages = []
+        for msg in current_messages:
+            role = msg.get("role")
+            if role == "system":
+                system_messages.append(msg)
+            elif role in ("user", "assistant"):
+                current_chat_messages.append(msg)
+
+        # 누적 요약은 기존 system 메시지에 합쳐서 전달
+        if chat_history and chat_history[0].get("role") == "system":
+            summary_message = chat_history.pop(0)
+            if system_messages and isinstance(system_messages[0].get("content"), str):
+                system_messages[0] = {
+                    **system_messages[0],
+                    "content": f"{system_messages[0]['content']}\n\n{summary_message['content']}"
+                }
+            else:
+                system_messages.append(summary_message)
+
+        # system 메시지 + 이전 대화 내역 + 현재 대화 메시지
+        clovax_messages = system_messages + chat_history
+        clovax_messages.extend(current_chat_messages)
+
         return clovax_messages
-    
-    def clear_session_memory(self, session_id: str):
+
+    async def clear_session_memory(self, session_id: str):
         """특정 세션의 메모리 삭제"""
-        if session_id in self._session_memories:
-            del self._session_memories[session_id]
-    
-    def get_memory_stats(self, session_id: str) -> Dict[str, Any]:
+        await self.backend.clear(session_id)
+        self._semantic_indexes.pop(session_id)
+
+    async def get_memory_stats(self, session_id: str) -> Dict[str, Any]:
         """메모리 상태 정보 반환"""
-        if session_id not in self._session_memories:
+        message_count = await self.backend.count(session_id)
+        if message_count is None:
             return {"message_count": 0, "exists": False}
-        
-        memory = self._session_memories[session_id]
+
         return {
-            "message_count": len(memory.chat_memory.messages),
+            "message_count": message_count,
             "exists": True,
-            "memory_type": type(memory).__name__
+            "memory_type": self.backend.name
         }
 
+    def get_store_stats(self) -> Dict[str, Any]:
+        """세션 저장소 지표 반환 (세션 수, 바이트, 적중/제거 횟수, 요약 작업)"""
+        return {
+            **self.backend.get_stats(),
+            "summaries_running": len(self._summary_tasks),
+            "summaries_completed": self.summaries_completed,
+            "summaries_failed": self.summaries_failed,
+            "summaries_skipped": self.summaries_skipped,
+            "semantic_sessions": len(self._semantic_indexes),
+            "semantic_bytes": self._semantic_indexes.total_bytes,
+            "semantic_evictions": self._semantic_indexes.evictions,
+            "turns_embedding": len(self._embedding_tasks),
+            "turns_embedded": self.turns_embedded,
+            "turn_embeddings_failed": self.turn_embeddings_failed,
+            "turns_reindexed": self.turns_reindexed,
+            "semantic_recalls": self.semantic_recalls,
+            "semantic_recalled_turns": self.semantic_recalled_turns,
+            "session_locks_held": len(self._session_locks),
+            "lock_acquisitions": self.lock_acquisitions,
+            "lock_contentions": self.lock_contentions,
+            "lock_rejections": self.lock_rejections,
+            "lock_average_wait_ms": round(self.lock_wait_seconds / self.lock_contentions * 1000, 1) if self.lock_contentions else 0.0,
+            "lock_max_wait_ms": round(self.lock_max_wait_seconds * 1000, 1)
+        }
+
+    async def startup(self):
+        """애플리케이션 시작 시 저장소 준비 (저널 색인 생성 등)"""
+        await self.backend.start()
+
+    async def aclose(self):
+        """애플리케이션 종료 시 진행 중인 요약/임베딩 작업 취소 및 저장소 연결 정리"""
+        tasks = [*self._summary_tasks.values(), *self._embedding_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.backend.close()
+
 
 # 싱글턴 인스턴스
-chat_memory_service = ChatMemoryService()
\ No newline at end of file
+chat_memory_service = ChatMemoryService()
@@ -0,0 +1,140 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.chat_memory_backend import MESSAGE_OVERHEAD_BYTES, SESSION_OVERHEAD_BYTES
+from services.vector_similarity import cosine_scores, top_k_indices
+
+
+class SemanticTurnIndex:
+    """
+    세션 하나의 턴 임베딩 색인 (semantic 메모리 타입)
+
+    턴(사용자 메시지 + AI 응답)마다 정규화된 float32 벡터 한 줄을 행렬에 쌓아 두고,
+    질문 벡터와의 내적(코사인 유사도) 한 번으로 관련 턴을 찾는다.
+    턴 번호(seq)는 저장 시점에 바로 발급하므로 임베딩이 늦게 끝나도 대화 순서가 유지된다.
+    행렬은 max_turns까지만 늘리고, 가득 차면 가장 오래된 턴의 행을 새 턴으로 덮어쓴다.
+    """
+
+    __slots__ = ("vectors", "count", "seqs", "turns", "next_seq", "max_turns", "last_turn")
+
+    def __init__(self, dimension: int, max_turns: int):
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.count = 0
+        self.seqs: List[int] = []
+        self.turns: List[Tuple[Dict[str, str], Dict[str, str]]] = []
+        self.next_seq = 0
+        self.max_turns = max_turns
+        # 마지막으로 번호를 발급한 턴 (user, assistant) 원문 (저장소 대화 내역과 색인 동기화에 사용)
+        self.last_turn: Optional[Tuple[str, str]] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reserve_seq(self, user_message: str, assistant_message: str) -> int:
+        """새 턴 번호 발급 (턴 저장 시 동기적으로 호출)"""
+        seq = self.next_seq
+        self.next_seq += 1
+        self.last_turn = (user_message, assistant_message)
+        return seq
+
+    def add(self, seq: int, vector: List[float], user_message: str, assistant_message: str) -> int:
+        """
+        임베딩된 턴 추가 후 변경된 추정 바이트 반환 (max_turns를 넘으면 가장 오래된 턴 제거)
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return 0
+
+        turn = (
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": assistant_message}
+        )
+        added_bytes = self._turn_bytes(user_message, assistant_message)
+
+        if self.count >= self.max_turns:
+            # 가득 차면 가장 오래된 턴의 행을 덮어씀 (행 순서는 seqs로 관리하므로 당기지 않음)
+            oldest = int(np.argmin(self.seqs))
+            added_bytes -= self._turn_bytes(self.turns[oldest][0]["content"], self.turns[oldest][1]["content"])
+            self.vectors[oldest] = vector / norm
+            self.seqs[oldest] = seq
+            self.turns[oldest] = turn
+            return added_bytes
+
+        if self.count == len(self.vectors):
+            vector_bytes = self.vectors.nbytes
+            capacity = min(self.max_turns, max(8, 2 * len(self.vectors)))
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.count] = self.vectors[:self.count]
+            self.vectors = grown
+            added_bytes += self.vectors.nbytes - vector_bytes
+
+        self.vectors[self.count] = vector / norm
+        self.seqs.append(seq)
+        self.turns.append(turn)
+        self.count += 1
+        return added_bytes
+
+    def search(self, query_vector: List[float], top_k: int, before_seq: int, min_score: float) -> List[Dict[str, Any]]:
+        """
+        질문과 가장 관련 있는 턴을 대화 순서대로 반환
+
+        Args:
+            query_vector: 질문 임베딩
+            top_k: 최대 턴 수
+            before_seq: 이 번호 이전의 턴만 검색 (최근 턴은 원문으로 따로 포함)
+            min_score: 최소 코사인 유사도
+
+        Returns:
+            List[Dict[str, Any]]: {"role", "content"} 메시지 목록
+        """
+        if self.count == 0 or top_k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+
+        scores = cosine_scores(query / norm, self.vectors[:self.count], normalized=True)
+        scores[np.asarray(self.seqs) >= before_seq] = -np.inf
+        top = top_k_indices(scores, top_k)
+        selected = sorted(
+            (self.seqs[i], i) for i in top
+            if scores[i] >= min_score
+        )
+
+        messages = []
+        for _, i in selected:
+            messages.extend(self.turns[i])
+        return messages
+
+    @staticmethod
+    def _turn_bytes(user_message: str, assistant_message: str) -> int:
+        return (
+            len(user_message.encode("utf-8")) + len(assistant_message.encode("utf-8"))
+            + 2 * MESSAGE_OVERHEAD_BYTES
+        )
+
+    def size_bytes(self) -> int:
+        """색인 전체의 추정 바이트 (벡터 행렬 + 턴 원문)"""
+        return SESSION_OVERHEAD_BYTES + self.vectors.nbytes + sum(
+            self._turn_bytes(user["content"], assistant["content"])
+            for user, assistant in self.turns
+        )
+
+
+def last_user_text(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """현재 메시지 중 마지막 사용자 메시지의 텍스트 (content 배열이면 텍스트 항목만)"""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(
+                item.get("text", "")
+                for item in content
+                if isinstance(item, dict) and item.get("type") == "text"
+            )
+        return content if isinstance(content, str) and content.strip() else None
+    return None
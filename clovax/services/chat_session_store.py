@@ -0,0 +1,134 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class _Entry(Generic[V]):
+    __slots__ = ("value", "size", "last_access")
+
+    def __init__(self, value: V, size: int, last_access: float):
+        self.value = value
+        self.size = size
+        self.last_access = last_access
+
+
+class SessionStore(Generic[V]):
+    """
+    세션 수와 바이트 예산이 제한된 LRU + 유휴 TTL 세션 저장소
+
+    최근 사용 순서로 정렬된 OrderedDict를 사용하므로 가장 오래 사용되지 않은 세션이
+    항상 앞쪽에 있다. 유휴 만료 검사와 LRU 제거 모두 앞쪽에서부터 필요한 만큼만 진행한다.
+    """
+
+    def __init__(self, max_sessions: int, max_bytes: int, idle_ttl_seconds: float):
+        """
+        Args:
+            max_sessions: 최대 세션 수
+            max_bytes: 전체 세션이 사용할 수 있는 최대 바이트 (추정치 합계)
+            idle_ttl_seconds: 마지막 사용 후 세션 유지 시간 (0이면 만료 없음)
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._entries: "OrderedDict[str, _Entry[V]]" = OrderedDict()
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def get(self, session_id: str) -> Optional[V]:
+        """
+        세션 조회 (조회 시 최근 사용으로 갱신)
+
+        Returns:
+            Optional[V]: 세션 값 (없거나 유휴 만료되었으면 None)
+        """
+        self._expire_idle()
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry.last_access = time.monotonic()
+        self._entries.move_to_end(session_id)
+        return entry.value
+
+    def peek(self, session_id: str) -> Optional[V]:
+        """최근 사용 순서와 통계를 바꾸지 않고 조회"""
+        entry = self._entries.get(session_id)
+        return entry.value if entry is not None else None
+
+    def put(self, session_id: str, value: V, size: int = 0):
+        """세션 저장 후 제한을 넘으면 오래된 세션부터 제거"""
+        self.pop(session_id)
+        self._entries[session_id] = _Entry(value, size, time.monotonic())
+        self.total_bytes += size
+        self._enforce_limits()
+
+    def add_size(self, session_id: str, delta: int):
+        """세션 크기 추정치 변경 (메시지 추가/삭제 후 호출)"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return
+        entry.size += delta
+        self.total_bytes += delta
+        self._enforce_limits()
+
+    def pop(self, session_id: str) -> Optional[V]:
+        """세션 삭제"""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry.size
+        return entry.value
+
+    def _expire_idle(self):
+        if self.idle_ttl_seconds <= 0:
+            return
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if entry.last_access > deadline:
+                break
+            self.pop(session_id)
+            self.expirations += 1
+
+    def _enforce_limits(self):
+        self._expire_idle()
+        # 방금 사용한 세션(맨 뒤)은 남겨 둔다
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            session_id, _ = next(iter(self._entries.items()))
+            self.pop(session_id)
+            self.evictions += 1
+            logger.debug(f"메모리 한도 초과로 세션 제거: {session_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """저장소 지표 반환"""
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -1,11 +1,16 @@
-import requests
+import httpx
 import json
 import uuid
 import time
 from typing import Dict, Any, Optional, AsyncGenerator
 from fastapi import HTTPException
 from core.config import settings
+from core.http_client import create_async_client
 from schemas.request.chat_completions_request import ChatRequest
+from services.clova_sse_parser import SSEEvent, SSEParser
+
+# Task API 호출 시 CLOVA Studio로 전달하지 않는 내부 필드
+_INTERNAL_REQUEST_FIELDS = {"sessionId", "memoryType", "memoryK", "useRAG", "ragTopK", "ragThreshold"}
 
 class ClovaService:
     def __init__(self):
@@ -15,6 +20,32 @@ class ClovaService:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # 프로세스 단위로 공유하는 keep-alive 클라이언트 (최초 사용 시 생성)
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """공유 HTTP 클라이언트 반환 (없거나 닫혀 있으면 새로 생성)"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                max_connections=settings.CLOVA_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CLOVA_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.CLOVA_HTTP_KEEPALIVE_EXPIRY,
+                connect_timeout=settings.CLOVA_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.CLOVA_HTTP_READ_TIMEOUT,
+                pool_timeout=settings.CLOVA_HTTP_POOL_TIMEOUT,
+                http2=settings.CLOVA_HTTP2
+            )
+        return self._client
+    
+    async def startup(self):
+        """앱 시작 시 공유 클라이언트 준비"""
+        self._get_client()
+    
+    async def aclose(self):
+        """앱 종료 시 공유 클라이언트 종료"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
     
     def _validate_api_key(self):
         """API 키 유효성 검사"""
@@ -35,9 +66,19 @@ class ClovaService:
     
     async def chat_completion(self, model_name: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """일반 채팅 완성 API 호출"""
+        url = f"{self.base_url}/v3/chat-completions/{model_name}"
+        return await self._post_json(url, request_data)
+    
+    async def chat_completion_with_task(self, chat_request: ChatRequest, task_id: str) -> Dict[str, Any]:
+        """튜닝 작업(Task) 기반 채팅 완성 API 호출"""
+        url = f"{self.base_url}/v3/tasks/{task_id}/chat-completions"
+        request_data = chat_request.model_dump(exclude_none=True, exclude=_INTERNAL_REQUEST_FIELDS)
+        return await self._post_json(url, request_data)
+    
+    async def _post_json(self, url: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """공유 클라이언트로 JSON 요청 후 응답 반환"""
         self._validate_api_key()
         
-        url = f"{self.base_url}/v3/chat-completions/{model_name}"
         headers = self._prepare_headers(request_data.get("requestId"))
         
         # 디버깅용 로깅
@@ -45,7 +86,7 @@ class ClovaService:
         print(f"📤 요청 데이터: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
         
         try:
-            response = requests.post(url, headers=headers, json=request_data)
+            response = await self._get_client().post(url, headers=headers, json=request_data)
             print(f"📥 응답 상태: {response.status_code}")
             print(f"📥 응답 헤더: {dict(response.headers)}")
             
@@ -58,7 +99,7 @@ class ClovaService:
             # CLOVA Studio 응답을 그대로 반환 (이미 올바른 형식)
             return response_data
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"🚫 API 호출 오류: {str(e)}")
             raise HTTPException(
                 status_code=500,
@@ -75,35 +116,48 @@ class ClovaService:
         self, 
         model_name: str, 
         request_data: Dict[str, Any]
-    ) -> AsyncGenerator[str, None]:
-        """스트리밍 채팅 완성 API 호출"""
+    ) -> AsyncGenerator[SSEEvent, None]:
+        """스트리밍 채팅 완성 API 호출 (업스트림 SSE를 한 번만 파싱한 이벤트로 반환)"""
         self._validate_api_key()
         
         url = f"{self.base_url}/v3/chat-completions/{model_name}"
         headers = self._prepare_headers(request_data.get("requestId"))
         headers["Accept"] = "text/event-stream"
         
+        # 스트리밍은 토큰 사이 간격 기준으로 읽기 타임아웃 적용
+        timeout = httpx.Timeout(
+            connect=settings.CLOVA_HTTP_CONNECT_TIMEOUT,
+            read=settings.CLOVA_STREAM_READ_TIMEOUT,
+            write=settings.CLOVA_HTTP_CONNECT_TIMEOUT,
+            pool=settings.CLOVA_HTTP_POOL_TIMEOUT
+        )
+        
         try:
-            response = requests.post(url, headers=headers, json=request_data, stream=True)
-            response.raise_for_status()
-            
-            print(f"🔍 스트리밍 응답 시작: {response.status_code}")
-            
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8')
-                    print(f"📥 스트리밍 라인: {line_str}")
+            async with self._get_client().stream(
+                "POST", url, headers=headers, json=request_data, timeout=timeout
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    print(f"❌ 에러 응답: {response.text}")
+                response.raise_for_status()
+                
+                print(f"🔍 스트리밍 응답 시작: {response.status_code}")
+                
+                parser = SSEParser()
+                async for line_str in self._aiter_lines(response):
+                    if settings.DEBUG:
+                        print(f"📥 스트리밍 라인: {line_str}")
                     
-                    # SSE 형식 그대로 전달
-                    if line_str.startswith('id: ') or line_str.startswith('event: ') or line_str.startswith('data: '):
-                        yield f"{line_str}\n"
-                    elif line_str.strip() == '':
-                        yield "\n"
-                    else:
-                        # 기타 라인도 전달 (디버깅용)
-                        yield f" {line_str}\n"
+                    event = parser.feed_line(line_str)
+                    if event is not None:
+                        yield event
+                
+                # 마지막 빈 줄 없이 끝난 이벤트 처리
+                event = parser.flush()
+                if event is not None:
+                    yield event
                                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"CLOVA Studio API 스트리밍 호출 중 오류가 발생했습니다: {str(e)}"
@@ -113,6 +167,33 @@ class ClovaService:
                 status_code=500,
                 detail=f"스트리밍 응답 처리 중 오류가 발생했습니다: {str(e)}"
             )
+    
+    async def _aiter_lines(self, response: httpx.Response) -> AsyncGenerator[str, None]:
+        """
+        스트리밍 응답을 줄 단위로 읽기
+        
+        소켓에서 도착한 만큼만 읽어 즉시 반환하며, 한 줄이
+        CLOVA_STREAM_MAX_LINE_BYTES를 넘으면 버퍼가 무한정 커지지 않도록 중단한다.
+        소비자가 다음 줄을 요청할 때만 읽으므로 느린 클라이언트는 업스트림 읽기를 늦춘다.
+        """
+        max_line_bytes = settings.CLOVA_STREAM_MAX_LINE_BYTES
+        buffer = bytearray()
+        
+        async for chunk in response.aiter_bytes(settings.CLOVA_STREAM_CHUNK_BYTES):
+            buffer.extend(chunk)
+            while True:
+                newline = buffer.find(b"\n")
+                if newline < 0:
+                    break
+                line = bytes(buffer[:newline])
+                del buffer[:newline + 1]
+                yield line.rstrip(b"\r").decode("utf-8")
+            
+            if len(buffer) > max_line_bytes:
+                raise ValueError(f"스트리밍 라인이 최대 크기({max_line_bytes} bytes)를 초과했습니다")
+        
+        if buffer:
+            yield bytes(buffer).rstrip(b"\r").decode("utf-8")
 
 # 서비스 인스턴스 생성
 clova_service = ClovaService()
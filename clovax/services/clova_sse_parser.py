@@ -0,0 +1,161 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 토큰 조각(delta)을 담는 CLOVA Studio 스트리밍 이벤트 타입
+TOKEN_EVENTS = ("token", "message")
+# 최종 결과(usage, finishReason)를 담는 이벤트 타입
+RESULT_EVENT = "result"
+ERROR_EVENT = "error"
+
+
+@dataclass
+class SSEEvent:
+    """
+    파싱된 SSE 이벤트
+
+    data는 업스트림에서 받은 원문 그대로 보관하고, JSON 파싱 결과에서
+    토큰 조각(delta), 최종 사용량(usage), 종료 이유를 한 번만 추출해 둔다.
+    """
+    id: Optional[str] = None
+    event: Optional[str] = None
+    data: str = ""
+    payload: Optional[Dict[str, Any]] = None
+    delta: str = ""
+    usage: Optional[Dict[str, Any]] = None
+    finish_reason: Optional[str] = None
+
+    @property
+    def is_token(self) -> bool:
+        return (self.event or "message") in TOKEN_EVENTS and bool(self.delta)
+
+    @property
+    def is_result(self) -> bool:
+        return self.event == RESULT_EVENT
+
+    @property
+    def is_error(self) -> bool:
+        return self.event == ERROR_EVENT
+
+    def to_sse(self, include_id: bool = True) -> str:
+        """클라이언트로 전달할 SSE 프레임 (재직렬화 없이 원문 data 사용)"""
+        lines = []
+        if include_id and self.id is not None:
+            lines.append(f"id: {self.id}\n")
+        if self.event is not None:
+            lines.append(f"event: {self.event}\n")
+        for data_line in self.data.split("\n"):
+            lines.append(f"data: {data_line}\n")
+        lines.append("\n")
+        return "".join(lines)
+
+
+class SSEParser:
+    """
+    줄 단위로 입력받아 이벤트 경계(빈 줄)마다 SSEEvent를 반환하는 증분 파서
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._id: Optional[str] = None
+        self._event: Optional[str] = None
+        self._data_lines: List[str] = []
+
+    def feed_line(self, line: str) -> Optional[SSEEvent]:
+        """
+        SSE 한 줄 처리
+
+        Args:
+            line: 줄바꿈이 제거된 SSE 라인
+
+        Returns:
+            Optional[SSEEvent]: 이벤트가 완성되면 이벤트, 아니면 None
+        """
+        if line == "":
+            return self.flush()
+
+        if line.startswith(":"):
+            # 주석(keep-alive) 라인
+            return None
+
+        name, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+
+        if name == "data":
+            self._data_lines.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id":
+            self._id = value
+        # retry 및 알 수 없는 필드는 무시
+        return None
+
+    def flush(self) -> Optional[SSEEvent]:
+        """누적된 필드로 이벤트 생성 (data가 없으면 None)"""
+        if not self._data_lines:
+            self._reset()
+            return None
+
+        event = SSEEvent(id=self._id, event=self._event, data="\n".join(self._data_lines))
+        self._reset()
+        _extract_fields(event)
+        return event
+
+
+def _extract_fields(event: SSEEvent):
+    """data JSON을 한 번만 파싱하여 delta/usage/finish_reason 추출"""
+    try:
+        payload = json.loads(event.data)
+    except (ValueError, TypeError):
+        return
+
+    if not isinstance(payload, dict):
+        return
+
+    event.payload = payload
+    # 구 버전 응답 형식({"result": {...}})도 허용
+    body = payload.get("result") if isinstance(payload.get("result"), dict) else payload
+
+    event.finish_reason = body.get("finishReason")
+    event.usage = body.get("usage")
+
+    if (event.event or "message") in TOKEN_EVENTS:
+        message = body.get("message") or {}
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            event.delta = content
+
+
+@dataclass
+class StreamAccumulator:
+    """
+    스트리밍 토큰 조각을 리스트에 모아 최종 응답을 만드는 버퍼
+    (문자열 반복 연결로 인한 O(n^2) 복사 방지)
+    """
+    parts: List[str] = field(default_factory=list)
+    token_count: int = 0
+    usage: Optional[Dict[str, Any]] = None
+    finish_reason: Optional[str] = None
+
+    def add(self, event: SSEEvent):
+        """이벤트에서 delta와 최종 결과 정보 반영"""
+        if event.is_token:
+            self.parts.append(event.delta)
+            self.token_count += 1
+        if event.usage:
+            self.usage = event.usage
+        if event.finish_reason:
+            self.finish_reason = event.finish_reason
+
+    @property
+    def text(self) -> str:
+        """누적된 전체 응답"""
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
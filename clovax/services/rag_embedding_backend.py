@@ -0,0 +1,670 @@
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from core.config import settings
+from core.http_client import create_async_client
+from .vector_similarity import normalize_rows
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 HTTP 상태 코드 (요청 한도 초과 / 일시적 서버 오류)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# BGE-M3 모델명 / 임베딩 차원 (모든 백엔드 공통, 캐시 키에 사용)
+BGE_M3_MODEL_NAME = "bge-m3"
+BGE_M3_DIMENSION = 1024
+
+# 로컬 백엔드 엔진별 필요 패키지
+_LOCAL_ENGINE_PACKAGES = {
+    "sentence-transformers": ("sentence_transformers",),
+    "onnx": ("onnxruntime", "tokenizers"),
+}
+
+
+class EmbeddingBackendUnavailableError(Exception):
+    """설정 문제로 백엔드를 사용할 수 없음 (API 키 없음, 모델 로드 실패 등 / 재시도해도 실패)"""
+
+
+class EmbeddingTimeoutError(Exception):
+    """모델 호출(HTTP 요청 / 추론) 하나가 제한 시간 안에 끝나지 않음 (대기열 대기 시간은 포함하지 않음)"""
+
+
+class EmbeddingRateLimitError(Exception):
+    """요청 한도 초과 응답 (HTTP 429 또는 429xx 상태 코드)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _AdaptiveTokenBucket:
+    """
+    초당 요청 수를 제한하는 토큰 버킷 (AIMD 방식으로 속도 자동 조절)
+
+    요청 한도 초과 응답을 받으면 속도를 절반으로 줄이고, 성공할 때마다 조금씩 설정 속도까지 회복한다.
+    대기 시간은 슬롯 예약 방식으로 계산하므로 잠금 없이 이벤트 루프 하나에서 안전하게 동작한다.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """토큰 하나를 예약하고 사용 가능해질 때까지 기다릴 시간(초) 반환"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_throttled(self):
+        """요청 한도 초과: 속도 절반으로 감소, 남은 토큰 소진"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+
+    def on_success(self):
+        """성공: 설정 속도까지 조금씩 회복"""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class EmbeddingBackend:
+    """
+    임베딩 백엔드 인터페이스
+
+    embed()는 텍스트 최대 batch_size개를 받아 (N, dimension) float32 행렬을 반환하고, 실패하면 예외를 발생시킨다.
+    request_timeout을 주면 동시 요청 / 속도 제한 / 추론 대기열에서 기다린 시간을 빼고
+    모델 호출 자체가 그 시간을 넘을 때 EmbeddingTimeoutError를 발생시킨다.
+    캐시/중복 제거/청크별 결과 처리는 임베딩 서비스가 담당하므로 백엔드는 모델 호출만 구현한다.
+    """
+
+    name = "base"
+
+    def __init__(self, model_name: str = BGE_M3_MODEL_NAME, dimension: int = BGE_M3_DIMENSION, batch_size: int = 1):
+        self.model_name = model_name
+        self.dimension = dimension
+        self.batch_size = max(1, batch_size)
+
+    @property
+    def model_key(self) -> str:
+        """임베딩 캐시 키 (같은 모델이면 백엔드가 달라도 같은 값)"""
+        return f"{self.model_name}:{self.dimension}"
+
+    async def embed(self, texts: List[str], request_timeout: Optional[float] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    def retry_delay(self) -> float:
+        """실패한 청크를 다시 모아 요청하기 전 대기 시간(초)"""
+        return 0.0
+
+    async def startup(self):
+        """앱 시작 시 준비 작업 (클라이언트 생성, 모델 로드 등)"""
+
+    async def aclose(self):
+        """앱 종료 시 자원 정리"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class ClovaEmbeddingBackend(EmbeddingBackend):
+    """
+    Clova Studio BGE-M3 임베딩 API 백엔드
+
+    API가 요청당 텍스트 하나만 받으므로 batch_size는 1이다.
+    동시 요청 수 / 초당 요청 수를 제한하고, 한도 초과·일시 오류는 백오프 후 재시도한다.
+    API 키가 없어도 생성은 되며 (앱 기동 / 다른 백엔드 사용 가능), 실제 호출 시 오류를 발생시킨다.
+    """
+
+    name = "clova"
+
+    def __init__(self):
+        super().__init__(batch_size=1)
+        self.api_key = os.getenv("CLOVA_STUDIO_API_KEY")
+        self.request_id = os.getenv("CLOVA_STUDIO_REQUEST_ID")
+        self.base_url = "https://clovastudio.stream.ntruss.com"
+        self.endpoint = "/v1/api-tools/embedding/v2"
+
+        # 동시 요청 수 / 초당 요청 수 / 재시도 설정
+        self.max_concurrency = settings.CLOVA_EMBEDDING_MAX_CONCURRENCY
+        self.max_retries = settings.CLOVA_EMBEDDING_MAX_RETRIES
+        self.backoff_base = settings.CLOVA_EMBEDDING_BACKOFF_BASE
+        self.backoff_max = settings.CLOVA_EMBEDDING_BACKOFF_MAX
+        self._rate_limiter = _AdaptiveTokenBucket(
+            rate=settings.CLOVA_EMBEDDING_RATE_PER_SECOND,
+            burst=settings.CLOVA_EMBEDDING_BURST
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+        # 프로세스 단위로 공유하는 keep-alive 클라이언트 (최초 사용 시 생성)
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # 지표 (failures: 실패한 요청 수, 재시도한 요청 포함)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+        if not self.api_key:
+            logger.warning("CLOVA_STUDIO_API_KEY 환경변수가 설정되어 있지 않아 Clova 임베딩 요청은 실패합니다.")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """공유 HTTP 클라이언트 반환 (없거나 닫혀 있으면 새로 생성)"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                max_connections=settings.RAG_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.RAG_HTTP_KEEPALIVE_EXPIRY,
+                connect_timeout=settings.RAG_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.CLOVA_EMBEDDING_READ_TIMEOUT,
+                pool_timeout=settings.RAG_HTTP_POOL_TIMEOUT
+            )
+        return self._client
+
+    async def startup(self):
+        """앱 시작 시 공유 클라이언트 준비"""
+        self._get_client()
+
+    async def aclose(self):
+        """앱 종료 시 공유 클라이언트 종료"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _make_api_request(self, text: str) -> Dict[str, Any]:
+        """
+        Clova Studio 임베딩 API 호출
+
+        Args:
+            text: 입력 텍스트 (최대 8192자)
+
+        Returns:
+            Dict: API 응답
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+        if self.request_id:
+            headers["X-NCP-CLOVASTUDIO-REQUEST-ID"] = self.request_id
+
+        payload = {
+            "text": text
+        }
+
+        response = await self._get_client().post(
+            f"{self.base_url}{self.endpoint}",
+            json=payload,
+            headers=headers
+        )
+        if response.status_code == 429:
+            raise EmbeddingRateLimitError(
+                "임베딩 API 요청 한도 초과 (HTTP 429)",
+                retry_after=self._parse_retry_after(response.headers.get("Retry-After"))
+            )
+        response.raise_for_status()
+        return _json_loads(response.content)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """현재 이벤트 루프용 동시 요청 제한 세마포어 (동기 메서드가 만든 별도 루프와 섞이지 않도록 루프별 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """지수 백오프 + 지터 (Retry-After가 있으면 그 이상 대기)"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        return max(delay, retry_after or 0.0)
+
+    def retry_delay(self) -> float:
+        return self._backoff_delay(self.max_retries)
+
+    async def embed(self, texts: List[str], request_timeout: Optional[float] = None) -> np.ndarray:
+        """텍스트별로 API를 호출하여 (N, 1024) float32 행렬 반환 (batch_size가 1이므로 보통 한 개)"""
+        if not self.api_key:
+            raise EmbeddingBackendUnavailableError("CLOVA_STUDIO_API_KEY 환경변수가 설정되어 있지 않습니다.")
+        vectors = await asyncio.gather(*(self._embed_text(text, request_timeout) for text in texts))
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            matrix[i] = vector
+        return matrix
+
+    async def _embed_text(self, text: str, request_timeout: Optional[float] = None) -> np.ndarray:
+        """
+        텍스트 하나 임베딩 (동시 요청 수 / 초당 요청 수 제한, 한도 초과·일시 오류 시 백오프 재시도)
+
+        Args:
+            text: 입력 텍스트
+            request_timeout: 세마포어 / 속도 제한 대기 후 API 요청 하나의 제한 시간 (넘으면 재시도하지 않음)
+
+        Returns:
+            np.ndarray: (1024,) float32 임베딩 벡터
+        """
+        semaphore = self._get_semaphore()
+        attempt = 0
+
+        while True:
+            retry_after = None
+            try:
+                async with semaphore:
+                    await self._rate_limiter.acquire()
+                    self.requests += 1
+                    try:
+                        response = await asyncio.wait_for(self._make_api_request(text), request_timeout)
+                    except asyncio.TimeoutError:
+                        raise EmbeddingTimeoutError(
+                            f"임베딩 API가 {request_timeout}초 안에 응답하지 않았습니다."
+                        ) from None
+
+                status_code = str(response.get("status", {}).get("code"))
+                if status_code.startswith("429"):
+                    raise EmbeddingRateLimitError(
+                        f"임베딩 API 요청 한도 초과 ({status_code})"
+                    )
+                if status_code != "20000":
+                    raise Exception(f"API 오류: {response.get('status', {}).get('message', 'Unknown error')}")
+
+                result = response.get("result", {})
+                # 파싱된 float 리스트는 바로 float32 배열로 바꿔 버림 (원소당 Python float 객체 대신 4바이트)
+                embedding = np.asarray(result.get("embedding", []), dtype=np.float32)
+
+                if embedding.shape != (self.dimension,):
+                    raise Exception(f"임베딩 차원 불일치 (응답: {embedding.size} / 기대: {self.dimension})")
+
+                self._rate_limiter.on_success()
+                return embedding
+
+            except EmbeddingRateLimitError as e:
+                self.failures += 1
+                self.throttled += 1
+                self._rate_limiter.on_throttled()
+                retry_after = e.retry_after
+                error = e
+            except httpx.HTTPStatusError as e:
+                self.failures += 1
+                if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise
+                error = e
+            except httpx.TransportError as e:
+                self.failures += 1
+                error = e
+            except Exception:
+                # API 오류 응답 / 차원 불일치 / 제한 시간 초과 (재시도하지 않음)
+                self.failures += 1
+                raise
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self._backoff_delay(attempt, retry_after)
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"임베딩 요청 재시도 {attempt}/{self.max_retries} ({delay:.1f}초 후): {str(error)}")
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": round(self._rate_limiter.rate, 2),
+            "max_rate_per_second": self._rate_limiter.max_rate
+        }
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    로컬 CPU BGE-M3 임베딩 백엔드 (네트워크 / API 키 없이 디스크의 모델로 추론)
+
+    engine이 "sentence-transformers"이면 SentenceTransformer 모델 디렉토리를,
+    "onnx"이면 model.onnx + tokenizer.json이 있는 디렉토리를 읽는다.
+    추론은 전용 스레드 하나에서 batch_size개씩 실행하므로 이벤트 루프를 막지 않고,
+    연산 스레드 수는 num_threads로 제한한다. 모델은 startup() 또는 첫 요청 시 한 번 로드한다.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: str, engine: str = "sentence-transformers", batch_size: int = 16,
+                 num_threads: int = 0, max_length: int = 8192):
+        """
+        Args:
+            model_path: 모델 디렉토리 경로
+            engine: "sentence-transformers" 또는 "onnx"
+            batch_size: 한 번에 추론할 최대 텍스트 수
+            num_threads: 추론 연산 스레드 수 (0이면 라이브러리 기본값)
+            max_length: 최대 토큰 수 (넘으면 자름)
+        """
+        if engine not in _LOCAL_ENGINE_PACKAGES:
+            raise ValueError(f"지원하지 않는 로컬 임베딩 엔진입니다: {engine}")
+        super().__init__(batch_size=batch_size)
+        self.model_path = model_path
+        self.engine = engine
+        self.num_threads = num_threads
+        self.max_length = max_length
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embedding")
+        self._load_lock = threading.Lock()
+        self._model = None
+        self._tokenizer = None
+
+        # 지표
+        self.batches = 0
+        self.texts_embedded = 0
+        self.inference_seconds = 0.0
+        self.failures = 0
+
+    @staticmethod
+    def is_available(engine: str) -> bool:
+        """엔진에 필요한 패키지 설치 여부"""
+        packages = _LOCAL_ENGINE_PACKAGES.get(engine, ())
+        return bool(packages) and all(importlib.util.find_spec(package) is not None for package in packages)
+
+    def _load(self):
+        """모델 로드 (추론 스레드에서 한 번만 실행)"""
+        with self._load_lock:
+            if self._model is not None:
+                return
+            try:
+                self._load_model()
+            except Exception as e:
+                raise EmbeddingBackendUnavailableError(f"로컬 임베딩 모델을 불러올 수 없습니다: {str(e)}") from e
+
+    def _load_model(self):
+        """모델 파일 로드 (연산 스레드 수 설정 포함)"""
+        started_at = time.monotonic()
+        if self.engine == "sentence-transformers":
+            import torch
+            from sentence_transformers import SentenceTransformer
+
+            if self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+            model = SentenceTransformer(self.model_path, device="cpu")
+            model.max_seq_length = self.max_length
+        else:
+            import onnxruntime
+            from tokenizers import Tokenizer
+
+            options = onnxruntime.SessionOptions()
+            if self.num_threads > 0:
+                options.intra_op_num_threads = self.num_threads
+                options.inter_op_num_threads = 1
+            model = onnxruntime.InferenceSession(
+                os.path.join(self.model_path, "model.onnx"),
+                sess_options=options,
+                providers=["CPUExecutionProvider"]
+            )
+            tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_length)
+            tokenizer.enable_padding()
+            self._tokenizer = tokenizer
+        self._model = model
+        logger.info(
+            f"로컬 임베딩 모델 로드 완료 ({self.engine}, {self.model_path}, {time.monotonic() - started_at:.1f}초)"
+        )
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """배치 하나 추론 후 정규화된 (N, D) float32 행렬 반환 (추론 스레드에서 실행)"""
+        self._load()
+        if self.engine == "sentence-transformers":
+            vectors = self._model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        else:
+            encodings = self._tokenizer.encode_batch(texts)
+            inputs = {
+                "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+                "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            input_names = {node.name for node in self._model.get_inputs()}
+            outputs = self._model.run(None, {name: value for name, value in inputs.items() if name in input_names})
+            vectors = outputs[0]
+            # last_hidden_state (N, T, D)이면 BGE-M3 dense 임베딩인 [CLS] 토큰 사용
+            if vectors.ndim == 3:
+                vectors = vectors[:, 0]
+            vectors = normalize_rows(vectors)
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(texts), self.dimension):
+            raise ValueError(f"로컬 임베딩 차원 불일치 (결과: {vectors.shape} / 기대: {self.dimension})")
+        return vectors
+
+    async def startup(self):
+        """앱 시작 시 모델 미리 로드 (첫 요청 지연 방지, 실패하면 첫 요청 시 다시 시도)"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._load)
+        except Exception as e:
+            logger.error(f"로컬 임베딩 모델 로드 실패: {str(e)}")
+
+    async def aclose(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embedding")
+
+    async def _run_inference(self, texts: List[str], request_timeout: Optional[float]) -> np.ndarray:
+        """추론 스레드에서 배치 하나 실행 (request_timeout은 앞선 배치를 기다린 시간을 빼고 추론이 시작된 뒤부터 계산)"""
+        loop = asyncio.get_running_loop()
+        if request_timeout is None:
+            return await loop.run_in_executor(self._executor, self._encode, texts)
+
+        started = asyncio.Event()
+
+        def encode() -> np.ndarray:
+            loop.call_soon_threadsafe(started.set)
+            return self._encode(texts)
+
+        future = loop.run_in_executor(self._executor, encode)
+        started_waiter = asyncio.ensure_future(started.wait())
+        try:
+            await asyncio.wait({future, started_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            started_waiter.cancel()
+        try:
+            # 스레드에서 실행 중인 추론은 중단할 수 없으므로 취소하지 않고 기다리기만 멈춤
+            return await asyncio.wait_for(asyncio.shield(future), request_timeout)
+        except asyncio.TimeoutError:
+            raise EmbeddingTimeoutError(f"로컬 임베딩 추론이 {request_timeout}초 안에 끝나지 않았습니다.") from None
+
+    async def embed(self, texts: List[str], request_timeout: Optional[float] = None) -> np.ndarray:
+        started_at = time.monotonic()
+        try:
+            vectors = await self._run_inference(texts, request_timeout)
+        except Exception:
+            self.failures += 1
+            raise
+        self.batches += 1
+        self.texts_embedded += len(texts)
+        self.inference_seconds += time.monotonic() - started_at
+        return vectors
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "local_engine": self.engine,
+            "local_model_loaded": self._model is not None,
+            "local_batch_size": self.batch_size,
+            "local_num_threads": self.num_threads,
+            "local_batches": self.batches,
+            "local_texts_embedded": self.texts_embedded,
+            "local_failures": self.failures,
+            "local_texts_per_second": round(self.texts_embedded / self.inference_seconds, 1) if self.inference_seconds else 0.0
+        }
+
+
+class FallbackEmbeddingBackend(EmbeddingBackend):
+    """
+    주 백엔드 요청이 timeout_seconds 안에 끝나지 않거나 실패하면 대체 백엔드로 임베딩
+
+    제한 시간은 주 백엔드의 요청 하나에만 적용하므로 (동시 요청 / 속도 제한 / 추론 대기열 대기 시간 제외)
+    대량 업로드로 요청이 밀려도 대기 중인 청크가 대체 백엔드로 넘어가지 않는다.
+    배치는 두 백엔드 중 큰 batch_size로 받아 주 백엔드 batch_size개씩 요청하고,
+    실패한 텍스트는 모아서 대체 백엔드 batch_size개씩 한 번에 임베딩한다.
+    두 백엔드의 결과가 같은 캐시 / 벡터 컬렉션에 섞이므로 같은 모델(BGE-M3)이어야 한다.
+    """
+
+    def __init__(self, primary: EmbeddingBackend, fallback: EmbeddingBackend, timeout_seconds: float):
+        if primary.model_key != fallback.model_key:
+            raise ValueError(
+                f"대체 임베딩 백엔드의 모델이 다릅니다 (주: {primary.model_key} / 대체: {fallback.model_key})"
+            )
+        super().__init__(primary.model_name, primary.dimension, max(primary.batch_size, fallback.batch_size))
+        self.name = f"{primary.name}+{fallback.name}"
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout_seconds = timeout_seconds
+
+        self.fallback_timeouts = 0
+        self.fallback_errors = 0
+
+    async def embed(self, texts: List[str], request_timeout: Optional[float] = None) -> np.ndarray:
+        size = self.primary.batch_size
+        starts = range(0, len(texts), size)
+        results = await asyncio.gather(
+            *(self.primary.embed(texts[start:start + size], request_timeout=self.timeout_seconds) for start in starts),
+            return_exceptions=True
+        )
+
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        failed_rows = []
+        last_error = None
+        for start, result in zip(starts, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            rows = range(start, min(start + size, len(texts)))
+            if isinstance(result, BaseException):
+                if isinstance(result, EmbeddingTimeoutError):
+                    self.fallback_timeouts += 1
+                else:
+                    self.fallback_errors += 1
+                last_error = result
+                failed_rows.extend(rows)
+            else:
+                matrix[start:start + len(rows)] = result
+
+        if failed_rows:
+            logger.warning(
+                f"{self.primary.name} 임베딩 {len(failed_rows)}/{len(texts)}개가 {self.timeout_seconds}초 초과 또는 실패하여 "
+                f"{self.fallback.name} 백엔드 사용: {str(last_error) or type(last_error).__name__}"
+            )
+            size = self.fallback.batch_size
+            batches = [failed_rows[start:start + size] for start in range(0, len(failed_rows), size)]
+            vectors = await asyncio.gather(
+                *(self.fallback.embed([texts[row] for row in batch], request_timeout) for batch in batches)
+            )
+            for batch, batch_vectors in zip(batches, vectors):
+                matrix[batch] = batch_vectors
+        return matrix
+
+    async def startup(self):
+        await self.primary.startup()
+        await self.fallback.startup()
+
+    async def aclose(self):
+        await self.primary.aclose()
+        await self.fallback.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.fallback.get_stats(),
+            **self.primary.get_stats(),
+            "backend": self.name,
+            "fallback_timeout_seconds": self.timeout_seconds,
+            "fallback_timeouts": self.fallback_timeouts,
+            "fallback_errors": self.fallback_errors
+        }
+
+
+def _create_local_backend() -> Optional[LocalEmbeddingBackend]:
+    """로컬 백엔드 생성 (모델 경로가 없거나 패키지가 설치되어 있지 않으면 None)"""
+    engine = settings.LOCAL_EMBEDDING_ENGINE
+    if not settings.LOCAL_EMBEDDING_MODEL_PATH:
+        logger.warning("LOCAL_EMBEDDING_MODEL_PATH가 설정되어 있지 않아 로컬 임베딩 백엔드를 사용할 수 없습니다.")
+        return None
+    if not LocalEmbeddingBackend.is_available(engine):
+        packages = " ".join(_LOCAL_ENGINE_PACKAGES.get(engine, (engine,))).replace("_", "-")
+        logger.warning(f"로컬 임베딩 엔진 '{engine}'에 필요한 패키지가 설치되어 있지 않습니다. (pip install {packages})")
+        return None
+    return LocalEmbeddingBackend(
+        model_path=settings.LOCAL_EMBEDDING_MODEL_PATH,
+        engine=engine,
+        batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+        num_threads=settings.LOCAL_EMBEDDING_NUM_THREADS,
+        max_length=settings.LOCAL_EMBEDDING_MAX_LENGTH
+    )
+
+
+def create_embedding_backend(
+    backend: str,
+    fallback_backend: str = "",
+    fallback_timeout_seconds: float = 3.0
+) -> EmbeddingBackend:
+    """
+    설정에 맞는 임베딩 백엔드 생성 (로컬 백엔드를 쓸 수 없으면 Clova 백엔드 사용)
+
+    Args:
+        backend: "clova" 또는 "local"
+        fallback_backend: 주 백엔드가 느리거나 실패할 때 쓸 대체 백엔드 ("clova" / "local", 비우면 사용 안 함)
+        fallback_timeout_seconds: 대체 백엔드로 넘어가기 전 주 백엔드 요청 하나의 제한 시간 (대기열 대기 시간 제외)
+
+    Returns:
+        EmbeddingBackend: 임베딩 백엔드
+    """
+    primary = None
+    if backend == "local":
+        primary = _create_local_backend()
+        if primary is None:
+            logger.warning("Clova 임베딩 백엔드를 사용합니다.")
+    if primary is None:
+        primary = ClovaEmbeddingBackend()
+    logger.info(f"{primary.name} 임베딩 백엔드 사용")
+
+    if not fallback_backend or fallback_backend == primary.name:
+        return primary
+    fallback = _create_local_backend() if fallback_backend == "local" else ClovaEmbeddingBackend()
+    if fallback is None:
+        return primary
+    logger.info(f"{fallback_timeout_seconds}초 초과 또는 실패 시 {fallback.name} 임베딩 백엔드 사용")
+    return FallbackEmbeddingBackend(primary, fallback, fallback_timeout_seconds)
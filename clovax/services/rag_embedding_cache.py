@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite IN (...) 조회당 최대 키 수
+_SQLITE_BATCH_SIZE = 500
+
+
+def content_hash(text: str) -> bytes:
+    """임베딩 캐시 키 (입력 텍스트의 SHA-256)"""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    입력 텍스트 해시 기반 임베딩 캐시 (메모리 LRU + SQLite 디스크)
+
+    키는 (모델 키, 텍스트 SHA-256)이므로 모델명이나 차원이 바뀌면 이전 임베딩은 조회되지 않는다.
+    벡터는 float32 바이트로 저장한다. SQLite 작업은 동기 함수이므로 호출 측에서 스레드로 실행한다.
+    """
+
+    def __init__(self, path: str, model_key: str, max_memory_entries: int):
+        """
+        Args:
+            path: SQLite 파일 경로 (비어 있으면 메모리 캐시만 사용)
+            model_key: 모델 버전 키 (예: "bge-m3:1024")
+            max_memory_entries: 메모리 LRU 최대 항목 수
+        """
+        self.path = path
+        self.model_key = model_key
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        if path:
+            try:
+                self._open()
+            except sqlite3.Error as e:
+                logger.error(f"임베딩 캐시 파일을 열 수 없어 메모리 캐시만 사용합니다: {str(e)}")
+                self._conn = None
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, "
+            "hash BLOB NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "PRIMARY KEY (model, hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _remember(self, key: bytes, vector: bytes):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        캐시 조회 (메모리 → 디스크 순서, 디스크 적중은 메모리에 올림)
+
+        Args:
+            keys: content_hash 키 목록
+
+        Returns:
+            Dict[bytes, np.ndarray]: 적중한 키별 float32 임베딩 벡터 (저장된 바이트를 복사 없이 감싼 읽기 전용 배열)
+        """
+        found: Dict[bytes, bytes] = {}
+        pending: List[bytes] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    pending.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+            disk_found = 0
+            if pending and self._conn is not None:
+                for start in range(0, len(pending), _SQLITE_BATCH_SIZE):
+                    batch = pending[start:start + _SQLITE_BATCH_SIZE]
+                    rows = self._conn.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                        (self.model_key, *batch)
+                    ).fetchall()
+                    for key, vector in rows:
+                        found[key] = vector
+                        self._remember(key, vector)
+                    disk_found += len(rows)
+            self.disk_hits += disk_found
+            self.misses += len(pending) - disk_found
+
+        return {key: np.frombuffer(vector, dtype=np.float32) for key, vector in found.items()}
+
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]):
+        """새 임베딩 저장 (메모리 + 디스크)"""
+        rows = []
+        now = time.time()
+        with self._lock:
+            for key, embedding in items:
+                vector = np.asarray(embedding, dtype=np.float32).tobytes()
+                self._remember(key, vector)
+                rows.append((self.model_key, key, vector, now))
+            if rows and self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector, created_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+            self.writes += len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, float]:
+        """캐시 지표 반환"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "cache_model_key": self.model_key,
+            "cache_memory_entries": len(self._memory),
+            "cache_memory_hits": self.memory_hits,
+            "cache_disk_hits": self.disk_hits,
+            "cache_misses": self.misses,
+            "cache_hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "cache_writes": self.writes
+        }
+
+
+def normalize_query(text: str) -> str:
+    """쿼리 캐시 키용 정규화 (유니코드 NFKC + 앞뒤 공백 제거 + 연속 공백 하나로)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    쿼리 임베딩 LRU + TTL 캐시 (단일 요청 병합)
+
+    같은 쿼리가 동시에 여러 번 들어오면 첫 요청의 API 호출 하나를 함께 기다린다.
+    호출은 별도 태스크로 실행하므로 기다리던 요청 하나가 취소되어도 다른 요청에는 영향이 없다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Args:
+            max_entries: 최대 항목 수
+            ttl_seconds: 저장 후 유지 시간 (0이면 만료 없음)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+        # API 호출 평균 지연 (지수 이동 평균, 적중 시 절약 시간 추정용)
+        self.average_miss_seconds = 0.0
+
+    def _get(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        vector, expires_at = entry
+        if self.ttl_seconds > 0 and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _put(self, key: str, vector: np.ndarray):
+        # 여러 요청이 같은 배열을 공유하므로 읽기 전용으로 고정
+        vector.flags.writeable = False
+        self._entries[key] = (vector, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_embed(self, key: str, embed: Callable[[], Awaitable[np.ndarray]]) -> np.ndarray:
+        """
+        캐시 조회 후 없으면 embed() 호출 결과 저장 (같은 키의 동시 호출은 하나로 병합)
+
+        Args:
+            key: normalize_query로 정규화한 쿼리
+            embed: 캐시 미스 시 임베딩을 만드는 코루틴 함수 (실패하면 예외, 결과는 저장 안 함)
+        """
+        vector = self._get(key)
+        if vector is not None:
+            self.hits += 1
+            self.saved_seconds += self.average_miss_seconds
+            return vector
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self.saved_seconds += self.average_miss_seconds
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.create_task(self._embed(key, embed))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _embed(self, key: str, embed: Callable[[], Awaitable[np.ndarray]]) -> np.ndarray:
+        started_at = time.monotonic()
+        vector = await embed()
+        elapsed = time.monotonic() - started_at
+        self.average_miss_seconds = elapsed if self.average_miss_seconds == 0 else (
+            0.9 * self.average_miss_seconds + 0.1 * elapsed
+        )
+        self._put(key, vector)
+        return vector
+
+    def get_stats(self) -> Dict[str, float]:
+        """쿼리 캐시 지표 반환"""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "query_cache_entries": len(self._entries),
+            "query_cache_hits": self.hits,
+            "query_cache_coalesced": self.coalesced,
+            "query_cache_misses": self.misses,
+            "query_cache_hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "query_cache_saved_ms": round(self.saved_seconds * 1000, 1),
+            "query_average_miss_ms": round(self.average_miss_seconds * 1000, 1)
+        }
@@ -1,57 +1,89 @@
-import httpx
 import asyncio
-from typing import List, Optional, Dict, Any
+import time
+from typing import List, Optional, Dict, Any, Tuple
 import logging
-import os
 import numpy as np
+from dataclasses import dataclass
 from langchain.embeddings.base import Embeddings
+from core.config import settings
+from .rag_embedding_backend import EmbeddingBackend, EmbeddingBackendUnavailableError, create_embedding_backend
+from .rag_embedding_cache import EmbeddingCache, QueryEmbeddingCache, content_hash, normalize_query
+from .vector_similarity import cosine_scores, cosine_similarity_matrix, normalize_rows, stack_embeddings, top_k_similar
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class EmbeddingResult:
+    """청크 하나의 임베딩 결과 (성공 시 embedding, 실패 시 error)"""
+    index: int
+    embedding: Optional[np.ndarray] = None
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.embedding is not None
+
 class ClovaStudioEmbeddingService(Embeddings):
-    """Clova Studio BGE-M3 임베딩 서비스"""
+    """BGE-M3 임베딩 서비스 (Clova Studio API 또는 로컬 CPU 모델 백엔드)"""
     
-    def __init__(self):
-        self.api_key = os.getenv("CLOVA_STUDIO_API_KEY")
-        self.request_id = os.getenv("CLOVA_STUDIO_REQUEST_ID")
-        self.base_url = "https://clovastudio.stream.ntruss.com"
-        self.endpoint = "/v1/api-tools/embedding/v2"
-        self.model_name = "bge-m3"
-        self.embedding_dimension = 1024  # BGE-M3의 임베딩 차원
+    def __init__(self, backend: Optional[EmbeddingBackend] = None):
+        """
+        Args:
+            backend: 임베딩 백엔드 (None이면 EMBEDDING_BACKEND 설정으로 생성)
+        """
+        self.backend = backend or create_embedding_backend(
+            settings.EMBEDDING_BACKEND,
+            settings.EMBEDDING_FALLBACK_BACKEND,
+            settings.EMBEDDING_FALLBACK_TIMEOUT_SECONDS
+        )
+        self.model_name = self.backend.model_name
+        self.embedding_dimension = self.backend.dimension  # BGE-M3의 임베딩 차원
+        
+        # 백엔드 재시도 후에도 실패한 청크를 다시 모아 요청하는 횟수
+        self.retry_rounds = settings.CLOVA_EMBEDDING_RETRY_ROUNDS
         
-        if not self.api_key:
-            raise ValueError("CLOVA_STUDIO_API_KEY 환경변수가 설정되어 있지 않습니다.")
+        # 문서 임베딩 캐시 (텍스트 해시 + 모델 키, 같은 청크는 다시 임베딩하지 않음)
+        self._cache = EmbeddingCache(
+            path=settings.CLOVA_EMBEDDING_CACHE_PATH,
+            model_key=self.backend.model_key,
+            max_memory_entries=settings.CLOVA_EMBEDDING_CACHE_MEMORY_ENTRIES
+        )
+        # 쿼리 임베딩 캐시 (자주 묻는 질문은 임베딩 호출 없이 반환)
+        self._query_cache = QueryEmbeddingCache(
+            max_entries=settings.CLOVA_QUERY_EMBEDDING_CACHE_ENTRIES,
+            ttl_seconds=settings.CLOVA_QUERY_EMBEDDING_CACHE_TTL_SECONDS
+        )
+        
+        # 지표
+        self.documents_embedded = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+    
+    async def startup(self):
+        """앱 시작 시 백엔드 준비 (공유 클라이언트 생성 / 로컬 모델 로드)"""
+        await self.backend.startup()
     
-    async def _make_api_request(self, text: str) -> Dict[str, Any]:
+    async def aclose(self):
+        """앱 종료 시 백엔드 및 캐시 파일 종료"""
+        await self.backend.aclose()
+        await asyncio.to_thread(self._cache.close)
+    
+    async def _embed_batch(self, texts: List[str]) -> np.ndarray:
         """
-        Clova Studio 임베딩 API 호출
+        텍스트 최대 backend.batch_size개 임베딩
         
         Args:
-            text: 입력 텍스트 (최대 8192자)
+            texts: 입력 텍스트 리스트
             
         Returns:
-            Dict: API 응답
+            np.ndarray: (N, 1024) float32 임베딩 행렬
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        
-        if self.request_id:
-            headers["X-NCP-CLOVASTUDIO-REQUEST-ID"] = self.request_id
-        
-        payload = {
-            "text": text
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.base_url}{self.endpoint}",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self.backend.embed([self._truncate_text(text) for text in texts])
+    
+    async def _embed_text(self, text: str) -> np.ndarray:
+        """텍스트 하나 임베딩 ((1024,) float32 벡터)"""
+        return (await self._embed_batch([text]))[0]
     
     def _truncate_text(self, text: str, max_tokens: int = 8000) -> str:
         """
@@ -70,82 +102,135 @@ class ClovaStudioEmbeddingService(Embeddings):
             return text[:max_tokens]
         return text
     
-    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+    async def aembed_documents_with_results(self, texts: List[str]) -> List["EmbeddingResult"]:
+        """
+        여러 문서 임베딩 후 청크별 결과 반환 (실패한 청크도 같은 위치에 오류와 함께 포함)
+        
+        캐시에 있는 텍스트와 같은 배치 안의 중복 텍스트는 다시 임베딩하지 않는다.
+        나머지는 백엔드 batch_size개씩 나눠 동시에 요청하고 (Clova는 텍스트별 API 호출, 로컬은 배치 추론),
+        백엔드 재시도 후에도 실패한 텍스트는 retry_rounds번까지 잠시 쉰 뒤 다시 모아서 요청한다.
+        
+        Args:
+            texts: 입력 텍스트 리스트
+            
+        Returns:
+            List[EmbeddingResult]: texts와 같은 순서의 청크별 결과
+        """
+        if not texts:
+            return []
+        
+        started_at = time.monotonic()
+        
+        keys = [content_hash(text) for text in texts]
+        vectors = await asyncio.to_thread(self._cache.get_many, keys)
+        
+        # 캐시에 없는 텍스트만 (중복 제거 후) 임베딩
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = text
+        embed_calls = len(pending)
+        
+        errors = {}
+        new_vectors = []
+        for round_index in range(self.retry_rounds + 1):
+            if not pending:
+                break
+            if round_index > 0:
+                logger.warning(f"임베딩 실패 {len(pending)}개 청크 재요청 ({round_index}/{self.retry_rounds})")
+                await asyncio.sleep(self.backend.retry_delay())
+            
+            items = list(pending.items())
+            batch_size = self.backend.batch_size
+            batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+            results = await asyncio.gather(
+                *(self._embed_batch([text for _, text in batch]) for batch in batches),
+                return_exceptions=True
+            )
+            failed_texts = {}
+            for batch, result in zip(batches, results):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                for row, (key, text) in enumerate(batch):
+                    if isinstance(result, BaseException):
+                        errors[key] = result
+                        # 설정 문제(API 키 없음 등)는 다시 요청해도 실패하므로 재요청하지 않음
+                        if not isinstance(result, EmbeddingBackendUnavailableError):
+                            failed_texts[key] = text
+                    else:
+                        errors.pop(key, None)
+                        vectors[key] = result[row]
+                        new_vectors.append((key, result[row]))
+            pending = failed_texts
+        
+        if new_vectors:
+            await asyncio.to_thread(self._cache.put_many, new_vectors)
+        
+        embedding_results = []
+        for i, key in enumerate(keys):
+            if key in errors:
+                logger.error(f"문서 {i+1} 임베딩 실패: {str(errors[key])}")
+                embedding_results.append(EmbeddingResult(index=i, error=str(errors[key]) or type(errors[key]).__name__))
+            else:
+                embedding_results.append(EmbeddingResult(index=i, embedding=vectors[key]))
+        
+        elapsed = time.monotonic() - started_at
+        self.last_batch_size = len(texts)
+        self.last_batch_seconds = elapsed
+        self.documents_embedded += len(new_vectors)
+        logger.info(
+            f"총 {len(texts) - len(errors)}개 문서 임베딩 완료 (요청: {len(texts)}개, 임베딩 {embed_calls}개, {elapsed:.1f}초, "
+            f"{len(texts) / elapsed if elapsed > 0 else 0:.1f}개/초, 백엔드: {self.backend.name})"
+        )
+        return embedding_results
+    
+    async def aembed_documents(self, texts: List[str]) -> np.ndarray:
         """
         여러 문서 임베딩 (비동기)
         
+        재시도 후에도 실패한 문서가 있으면 예외를 발생시킨다. (청크별 결과가 필요하면 aembed_documents_with_results)
+        
         Args:
             texts: 입력 텍스트 리스트
             
         Returns:
-            List[List[float]]: 임베딩 벡터 리스트
+            np.ndarray: (N, 1024) float32 임베딩 행렬 (texts와 같은 순서)
         """
-        embeddings = []
-        
-        for i, text in enumerate(texts):
-            try:
-                # 텍스트 자르기
-                truncated_text = self._truncate_text(text)
-                
-                response = await self._make_api_request(truncated_text)
-                
-                if response.get("status", {}).get("code") != "20000":
-                    raise Exception(f"API 오류: {response.get('status', {}).get('message', 'Unknown error')}")
-                
-                result = response.get("result", {})
-                embedding = result.get("embedding", [])
-                
-                if len(embedding) != self.embedding_dimension:
-                    raise Exception(f"임베딩 차원 불일치 (응답: {len(embedding)} / 기대: {self.embedding_dimension})")
-                
-                embeddings.append(embedding)
-                logger.debug(f"문서 {i+1}/{len(texts)} 임베딩 완료 (입력 토큰: {result.get('inputTokens', 'N/A')})")
-                
-                # API 호출 간 딜레이 (rate limit 대응)
-                if i < len(texts) - 1:
-                    await asyncio.sleep(0.1)
-                    
-            except Exception as e:
-                logger.error(f"문서 {i+1} 임베딩 실패: {str(e)}")
-                # 실패한 문서는 결과에서 제외됨
-                pass
-        
-        logger.info(f"총 {len(embeddings)}개 문서 임베딩 완료 (요청: {len(texts)}개)")
-        return embeddings
-    
-    async def aembed_query(self, text: str) -> List[float]:
+        results = await self.aembed_documents_with_results(texts)
+        failed = [result.index for result in results if not result.ok]
+        if failed:
+            raise Exception(f"{len(failed)}개 문서 임베딩 실패 (첫 실패 위치: {failed[0] + 1})")
+        return stack_embeddings([result.embedding for result in results], self.embedding_dimension)
+    
+    async def aembed_query(self, text: str, use_cache: bool = True) -> np.ndarray:
         """
         쿼리 임베딩 (비동기)
         
+        정규화한 쿼리 텍스트 기준으로 캐시하며, 같은 쿼리의 동시 요청은 API 호출 하나로 병합한다.
+        
         Args:
             text: 입력 쿼리 텍스트
+            use_cache: 쿼리 캐시 사용 여부 (반복되지 않는 텍스트는 False)
             
         Returns:
-            List[float]: 임베딩 벡터
+            np.ndarray: (1024,) float32 임베딩 벡터 (캐시와 공유하므로 읽기 전용)
         """
         try:
-            truncated_text = self._truncate_text(text)
-            response = await self._make_api_request(truncated_text)
-            
-            if response.get("status", {}).get("code") != "20000":
-                raise Exception(f"API 오류: {response.get('status', {}).get('message', 'Unknown error')}")
-            
-            result = response.get("result", {})
-            embedding = result.get("embedding", [])
-            
-            if len(embedding) != self.embedding_dimension:
-                raise Exception(f"임베딩 차원 불일치 (응답: {len(embedding)} / 기대: {self.embedding_dimension})")
-            
-            logger.debug(f"쿼리 임베딩 완료 (입력 토큰: {result.get('inputTokens', 'N/A')})")
+            if use_cache:
+                query = normalize_query(text)
+                embedding = await self._query_cache.get_or_embed(query, lambda: self._embed_text(query))
+            else:
+                embedding = await self._embed_text(text)
+            logger.debug("쿼리 임베딩 완료")
             return embedding
             
         except Exception as e:
             logger.error(f"쿼리 임베딩 실패: {str(e)}")
-            return [0.0] * self.embedding_dimension
+            return np.zeros(self.embedding_dimension, dtype=np.float32)
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
-        여러 문서 임베딩 (동기)
+        여러 문서 임베딩 (동기, LangChain Embeddings 인터페이스라 리스트로 반환)
         
         Args:
             texts: 입력 텍스트 리스트
@@ -159,11 +244,11 @@ class ClovaStudioEmbeddingService(Embeddings):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
         
-        return loop.run_until_complete(self.aembed_documents(texts))
+        return loop.run_until_complete(self.aembed_documents(texts)).tolist()
     
     def embed_query(self, text: str) -> List[float]:
         """
-        쿼리 임베딩 (동기)
+        쿼리 임베딩 (동기, LangChain Embeddings 인터페이스라 리스트로 반환)
         
         Args:
             text: 입력 쿼리 텍스트
@@ -177,7 +262,7 @@ class ClovaStudioEmbeddingService(Embeddings):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
         
-        return loop.run_until_complete(self.aembed_query(text))
+        return loop.run_until_complete(self.aembed_query(text)).tolist()
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
@@ -190,19 +275,48 @@ class ClovaStudioEmbeddingService(Embeddings):
         Returns:
             float: 코사인 유사도 (0~1)
         """
-        vec1_np = np.array(vec1)
-        vec2_np = np.array(vec2)
+        similarity = float(cosine_scores(vec1, [vec2])[0])
+        # -1~1 범위를 0~1로 변환
+        return (similarity + 1) / 2
+    
+    def batch_cosine_similarity(self, query: List[float], documents, normalized: bool = False) -> np.ndarray:
+        """
+        쿼리 하나와 문서 N개의 코사인 유사도 (float32 행렬 곱 한 번)
         
-        dot_product = np.dot(vec1_np, vec2_np)
-        norm1 = np.linalg.norm(vec1_np)
-        norm2 = np.linalg.norm(vec2_np)
+        Args:
+            query: 쿼리 벡터
+            documents: (N, 1024) 문서 벡터 (리스트 또는 float32 행렬)
+            normalized: 입력이 이미 정규화되어 있으면 True (normalize_embeddings 결과 재사용)
+            
+        Returns:
+            np.ndarray: (N,) 코사인 유사도 (-1~1)
+        """
+        return cosine_scores(query, documents, normalized)
+    
+    def similarity_matrix(self, queries, documents, normalized: bool = False) -> np.ndarray:
+        """
+        쿼리 Q개 × 문서 N개의 코사인 유사도 행렬 (문서 행렬을 나눠 곱하여 중간 메모리 제한)
         
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        Returns:
+            np.ndarray: (Q, N) 코사인 유사도 (-1~1)
+        """
+        return cosine_similarity_matrix(queries, documents, normalized)
+    
+    def top_k_similar(self, queries, documents, k: int, normalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        쿼리마다 가장 유사한 문서 k개의 위치와 유사도 (전체 유사도 행렬 없이 청크별 argpartition)
         
-        similarity = dot_product / (norm1 * norm2)
-        # -1~1 범위를 0~1로 변환
-        return (similarity + 1) / 2
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (Q, k) 문서 위치, (Q, k) 코사인 유사도 (내림차순)
+        """
+        return top_k_similar(queries, documents, k, normalized)
+    
+    @staticmethod
+    def normalize_embeddings(embeddings) -> np.ndarray:
+        """
+        임베딩을 정규화된 (N, D) float32 행렬로 변환 (반복 비교할 후보는 한 번만 정규화해 재사용)
+        """
+        return normalize_rows(embeddings)
     
     def get_embedding_dimension(self) -> int:
         """
@@ -213,6 +327,23 @@ class ClovaStudioEmbeddingService(Embeddings):
         """
         return self.embedding_dimension
     
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        임베딩 요청 지표 반환
+        
+        Returns:
+            Dict[str, Any]: 백엔드 지표 (Clova: 요청/재시도/한도 초과 횟수, 로컬: 배치 수/처리량), 마지막 배치 처리량, 문서/쿼리 캐시 적중률
+        """
+        return {
+            **self.backend.get_stats(),
+            "documents_embedded": self.documents_embedded,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_seconds": round(self.last_batch_seconds, 3),
+            "last_batch_per_second": round(self.last_batch_size / self.last_batch_seconds, 1) if self.last_batch_seconds else 0.0,
+            **self._cache.get_stats(),
+            **self._query_cache.get_stats()
+        }
+    
     def get_model_name(self) -> str:
         """
         모델명 반환
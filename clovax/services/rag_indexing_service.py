@@ -1,8 +1,9 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import chromadb
 from chromadb.config import Settings
 from langchain.schema import Document
 from langchain_community.vectorstores import Chroma
+from .vector_similarity import MatrixLike, VectorLike, as_float32_matrix
 import logging
 import os
 import uuid
@@ -63,16 +64,46 @@ class ChromaIndexingService:
             logger.error(f"컬렉션 초기화 실패: {str(e)}")
             raise
 
+    def _prepare_documents(self,
+                           documents: List[Document],
+                           document_source: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        문서에서 저장할 텍스트와 메타데이터 추출
+
+        Args:
+            documents: 문서 리스트
+            document_source: 문서 출처 (예: 파일명)
+
+        Returns:
+            Tuple[List[str], List[Dict[str, Any]]]: (텍스트 리스트, 메타데이터 리스트)
+        """
+        indexed_at = datetime.now().isoformat()
+        texts = []
+        metadatas = []
+
+        for doc in documents:
+            metadata = doc.metadata.copy()
+            metadata.update({
+                'document_source': document_source,
+                'indexed_at': indexed_at,
+                'embedding_model': 'bge-m3',
+                'similarity_metric': 'cosine'
+            })
+            metadatas.append(metadata)
+            texts.append(doc.page_content)
+
+        return texts, metadatas
+
     def add_documents(self, 
                      documents: List[Document], 
-                     embeddings: List[List[float]],
+                     embeddings: MatrixLike,
                      document_source: str = "unknown") -> List[str]:
         """
         문서와 임베딩을 컬렉션에 추가
 
         Args:
             documents: 문서 리스트
-            embeddings: 임베딩 벡터 리스트
+            embeddings: (N, 1024) float32 임베딩 행렬 (또는 벡터 리스트)
             document_source: 문서 출처 (예: 파일명)
 
         Returns:
@@ -86,23 +117,11 @@ class ChromaIndexingService:
             doc_ids = [str(uuid.uuid4()) for _ in range(len(documents))]
 
             # 메타데이터 및 텍스트 추출
-            metadatas = []
-            texts = []
-
-            for doc in documents:
-                metadata = doc.metadata.copy()
-                metadata.update({
-                    'document_source': document_source,
-                    'indexed_at': datetime.now().isoformat(),
-                    'embedding_model': 'bge-m3',
-                    'similarity_metric': 'cosine'
-                })
-                metadatas.append(metadata)
-                texts.append(doc.page_content)
+            texts, metadatas = self._prepare_documents(documents, document_source)
 
             # ChromaDB에 추가
             self.collection.add(
-                embeddings=embeddings,
+                embeddings=as_float32_matrix(embeddings),
                 documents=texts,
                 metadatas=metadatas,
                 ids=doc_ids
@@ -115,15 +134,54 @@ class ChromaIndexingService:
             logger.error(f"문서 인덱싱 실패: {str(e)}")
             raise
 
+    def upsert_documents(self,
+                         documents: List[Document],
+                         embeddings: MatrixLike,
+                         ids: List[str],
+                         document_source: str = "unknown") -> List[str]:
+        """
+        지정한 ID로 문서와 임베딩을 추가하거나 덮어쓰기 (같은 청크를 다시 색인해도 중복되지 않음)
+
+        Args:
+            documents: 문서 리스트
+            embeddings: (N, 1024) float32 임베딩 행렬 (또는 벡터 리스트)
+            ids: 문서 ID 리스트 (청크마다 고정된 값)
+            document_source: 문서 출처 (예: 파일명)
+
+        Returns:
+            List[str]: 추가된 문서의 ID 리스트
+        """
+        if not (len(documents) == len(embeddings) == len(ids)):
+            raise ValueError("문서, 임베딩, ID의 개수가 일치하지 않습니다.")
+        if not documents:
+            return []
+
+        try:
+            texts, metadatas = self._prepare_documents(documents, document_source)
+
+            self.collection.upsert(
+                embeddings=as_float32_matrix(embeddings),
+                documents=texts,
+                metadatas=metadatas,
+                ids=ids
+            )
+
+            logger.info(f"{len(documents)}개의 문서를 컬렉션 '{self.collection_name}'에 저장 완료")
+            return ids
+
+        except Exception as e:
+            logger.error(f"문서 인덱싱 실패: {str(e)}")
+            raise
+
     def search_similar_documents(self, 
-                               query_embedding: List[float], 
+                               query_embedding: VectorLike, 
                                top_k: int = 5,
                                filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         유사 문서 검색
 
         Args:
-            query_embedding: 쿼리 임베딩 벡터
+            query_embedding: 쿼리 임베딩 벡터 (float32 배열 또는 리스트)
             top_k: 반환할 문서 개수
             filter_metadata: 메타데이터 필터
 
@@ -133,7 +191,7 @@ class ChromaIndexingService:
         try:
             # ChromaDB에서 검색
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=as_float32_matrix(query_embedding),
                 n_results=top_k,
                 where=filter_metadata
             )
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from langchain.schema import Document
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_upload_key(file_content: bytes, document_source: str, chunking_params: Dict[str, Any]) -> str:
+    """
+    업로드 식별 키 (파일 내용 + 문서 출처 + 청킹 설정의 SHA-256)
+
+    같은 파일을 같은 설정으로 다시 올리면 같은 키가 되어 이전 진행 상황을 이어 사용한다.
+    """
+    digest = hashlib.sha256(file_content)
+    digest.update(document_source.encode("utf-8"))
+    digest.update(json.dumps(chunking_params, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chunk_id(upload_key: str, chunk_index: int) -> str:
+    """청크별 고정 문서 ID (재시도/재업로드 시 upsert로 덮어씀)"""
+    return f"{upload_key[:32]}-{chunk_index}"
+
+
+class IngestCheckpoint:
+    """업로드 하나의 색인 진행 상황 (분할된 청크 목록 + 색인 완료된 청크 번호)"""
+
+    def __init__(self, upload_key: str, document_source: str, document_count: int,
+                 chunks: List[Document], done: Optional[Set[int]] = None):
+        self.upload_key = upload_key
+        self.document_source = document_source
+        self.document_count = document_count
+        self.chunks = chunks
+        self.done = done or set()
+
+    @property
+    def pending_indices(self) -> List[int]:
+        return [i for i in range(len(self.chunks)) if i not in self.done]
+
+
+class IngestCheckpointStore:
+    """
+    업로드별 색인 진행 상황 파일 저장소
+
+    분할된 청크는 `<키>.chunks.json`에 한 번만 쓰고, 색인이 끝난 청크 번호는 배치마다
+    `<키>.done`에 한 줄씩 추가한다. 색인이 중간에 실패해도 같은 파일을 다시 올리면
+    분할을 건너뛰고 남은 청크만 임베딩/색인한다.
+    디렉토리는 처음 기록할 때 만들고, 마지막 기록 후 ttl_seconds가 지난 진행 상황은
+    다시 올려도 이어 쓰지 않으며 새 업로드를 기록할 때 함께 삭제한다.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = 0):
+        """
+        Args:
+            directory: 저장 디렉토리 경로
+            ttl_seconds: 마지막 기록 후 진행 상황 유지 시간 (0이면 만료 없음)
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def _chunks_path(self, upload_key: str) -> str:
+        return os.path.join(self.directory, f"{upload_key}.chunks.json")
+
+    def _done_path(self, upload_key: str) -> str:
+        return os.path.join(self.directory, f"{upload_key}.done")
+
+    def _last_written_at(self, upload_key: str) -> float:
+        """진행 상황 파일의 마지막 기록 시각 (청크 목록 / 임시 파일 / 완료 기록 중 최근 값)"""
+        last = 0.0
+        chunks_path = self._chunks_path(upload_key)
+        for path in (chunks_path, f"{chunks_path}.tmp", self._done_path(upload_key)):
+            try:
+                last = max(last, os.path.getmtime(path))
+            except FileNotFoundError:
+                pass
+        return last
+
+    def _is_expired(self, last_written_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - last_written_at > self.ttl_seconds
+
+    def load(self, upload_key: str) -> Optional[IngestCheckpoint]:
+        """저장된 진행 상황 조회 (없거나 손상되었거나 만료되었으면 None)"""
+        chunks_path = self._chunks_path(upload_key)
+        if not os.path.exists(chunks_path):
+            return None
+        if self._is_expired(self._last_written_at(upload_key), time.time()):
+            self.delete(upload_key)
+            return None
+        try:
+            with open(chunks_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            done = set()
+            if os.path.exists(self._done_path(upload_key)):
+                with open(self._done_path(upload_key), "r", encoding="utf-8") as f:
+                    # 마지막 줄이 잘렸으면(비정상 종료) 무시
+                    done = {int(line) for line in f if line.strip().isdigit() and line.endswith("\n")}
+            return IngestCheckpoint(
+                upload_key=upload_key,
+                document_source=data["document_source"],
+                document_count=data["document_count"],
+                chunks=[Document(page_content=chunk["text"], metadata=chunk["metadata"]) for chunk in data["chunks"]],
+                done=done
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"색인 체크포인트를 읽을 수 없어 처음부터 진행합니다: {chunks_path} ({str(e)})")
+            return None
+
+    def create(self, checkpoint: IngestCheckpoint):
+        """분할된 청크 목록 저장 (임시 파일에 쓴 뒤 교체, 만료된 다른 진행 상황 정리)"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.purge_expired()
+        path = self._chunks_path(checkpoint.upload_key)
+        tmp_path = f"{path}.tmp"
+        data = {
+            "document_source": checkpoint.document_source,
+            "document_count": checkpoint.document_count,
+            "chunks": [{"text": doc.page_content, "metadata": doc.metadata} for doc in checkpoint.chunks]
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        try:
+            os.remove(self._done_path(checkpoint.upload_key))
+        except FileNotFoundError:
+            pass
+
+    def mark_done(self, checkpoint: IngestCheckpoint, indices: List[int]):
+        """색인 완료된 청크 번호 추가 기록"""
+        if not indices:
+            return
+        with open(self._done_path(checkpoint.upload_key), "a", encoding="utf-8") as f:
+            f.write("".join(f"{i}\n" for i in indices))
+            f.flush()
+            os.fsync(f.fileno())
+        checkpoint.done.update(indices)
+
+    def delete(self, upload_key: str):
+        """색인 완료 후 진행 상황 삭제"""
+        for path in (self._chunks_path(upload_key), self._done_path(upload_key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def purge_expired(self) -> int:
+        """
+        ttl_seconds 동안 기록이 없는(중단 후 다시 올리지 않은) 진행 상황 삭제
+
+        Returns:
+            int: 삭제한 업로드 수
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+
+        now = time.time()
+        upload_keys = {name.split(".", 1)[0] for name in names if name.endswith((".chunks.json", ".done", ".tmp"))}
+        purged = 0
+        for upload_key in upload_keys:
+            if not self._is_expired(self._last_written_at(upload_key), now):
+                continue
+            self.delete(upload_key)
+            # 비정상 종료로 남은 임시 파일
+            try:
+                os.remove(f"{self._chunks_path(upload_key)}.tmp")
+            except FileNotFoundError:
+                pass
+            purged += 1
+        if purged:
+            logger.info(f"만료된 색인 체크포인트 {purged}개 삭제")
+        return purged
+
+
+# 싱글톤 인스턴스
+ingest_checkpoint_store = IngestCheckpointStore(
+    settings.RAG_INGEST_CHECKPOINT_DIR,
+    ttl_seconds=settings.RAG_INGEST_CHECKPOINT_TTL_SECONDS
+)
@@ -5,6 +5,8 @@ from langchain.schema import Document
 import logging
 import os
 from dataclasses import dataclass
+from core.config import settings
+from core.http_client import create_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +28,35 @@ class ClovaTextSplitterService:
         self.base_url = "https://clovastudio.stream.ntruss.com"
         self.endpoint = "/v1/api-tools/segmentation"
         
+        # 프로세스 단위로 공유하는 keep-alive 클라이언트 (최초 사용 시 생성)
+        self._client: Optional[httpx.AsyncClient] = None
+        
         if not self.api_key:
             logger.warning("CLOVA_STUDIO_API_KEY 환경 변수가 설정되지 않았습니다.")
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """공유 HTTP 클라이언트 반환 (없거나 닫혀 있으면 새로 생성)"""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client(
+                max_connections=settings.RAG_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.RAG_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.RAG_HTTP_KEEPALIVE_EXPIRY,
+                connect_timeout=settings.RAG_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.CLOVA_SEGMENTATION_READ_TIMEOUT,
+                pool_timeout=settings.RAG_HTTP_POOL_TIMEOUT
+            )
+        return self._client
+    
+    async def startup(self):
+        """앱 시작 시 공유 클라이언트 준비"""
+        self._get_client()
+    
+    async def aclose(self):
+        """앱 종료 시 공유 클라이언트 종료"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
     async def _make_api_request(self, text: str, config: ChunkingConfig) -> Dict[str, Any]:
         """
         Clova Studio 분할 서비스 API 요청
@@ -57,14 +85,13 @@ class ClovaTextSplitterService:
             "postProcessMinSize": config.post_process_min_size
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}{self.endpoint}",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._get_client().post(
+            f"{self.base_url}{self.endpoint}",
+            json=payload,
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def split_text_async(self, text: str, config: Optional[ChunkingConfig] = None) -> List[str]:
         """
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Any, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayStream:
+    """
+    하나의 스트리밍 생성에 대한 SSE 이벤트 링 버퍼
+
+    업스트림 생성(producer)은 클라이언트 연결과 분리된 태스크로 실행되고,
+    클라이언트(subscriber)는 버퍼에서 이벤트를 읽는다. 재연결한 클라이언트는
+    Last-Event-ID 이후의 이벤트부터 다시 받거나 진행 중인 생성에 그대로 붙는다.
+    """
+
+    def __init__(self, stream_id: str, max_events: int):
+        self.stream_id = stream_id
+        self.max_events = max_events
+        # frames[i]는 seq (base_seq + i)의 프레임
+        self.frames: List[str] = []
+        self.base_seq = 0
+        self.next_seq = 0
+        self.done = False
+        self.subscribers = 0
+        self.started_at = time.monotonic()
+        self.updated_at = self.started_at
+        self.first_token_seq: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._cancel_handle: Optional[asyncio.TimerHandle] = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.stream_id}:{seq}"
+
+    def append(self, frame: str) -> int:
+        """SSE 프레임(id 제외) 추가 후 대기 중인 구독자 깨우기"""
+        seq = self.next_seq
+        self.next_seq += 1
+        self.frames.append(frame)
+        if len(self.frames) >= self.max_events * 2:
+            # 오래된 프레임을 모아서 잘라 append를 상수 시간으로 유지
+            overflow = len(self.frames) - self.max_events
+            del self.frames[:overflow]
+            self.base_seq += overflow
+        self.updated_at = time.monotonic()
+        self._notify()
+        return seq
+
+    def finish(self):
+        """생성 종료 표시"""
+        self.done = True
+        self.updated_at = time.monotonic()
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def can_resume_from(self, last_seq: int) -> bool:
+        """last_seq 다음 이벤트가 아직 버퍼에 남아 있는지 여부"""
+        return self.base_seq <= last_seq + 1 <= self.next_seq
+
+    def read_after(self, last_seq: int) -> List[Tuple[int, str]]:
+        """last_seq 이후 이벤트 목록"""
+        start = max(last_seq + 1, self.base_seq)
+        if start >= self.next_seq:
+            return []
+        offset = start - self.base_seq
+        return list(enumerate(self.frames[offset:], start))
+
+    async def wait_for_change(self, timeout: Optional[float] = None):
+        """새 이벤트 또는 종료까지 대기"""
+        changed = self._changed
+        if timeout is None:
+            await changed.wait()
+        else:
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def mark_first_token(self):
+        """첫 토큰 프레임 위치 기록 (TTFT 측정용, append 직후 호출)"""
+        if self.first_token_seq is None:
+            self.first_token_seq = self.next_seq - 1
+
+    async def subscribe(
+        self,
+        last_seq: int = -1,
+        flush_window_ms: float = 0,
+        flush_max_bytes: int = 0
+    ) -> AsyncGenerator[List[Tuple[int, str]], None]:
+        """
+        last_seq 이후 이벤트를 묶음 단위로 반환 (생성이 끝나면 종료)
+
+        직전 전송 후 flush_window_ms가 지난 뒤 도착한 이벤트는 즉시 보내고(첫 토큰 지연 없음),
+        그 안에 연달아 도착한 이벤트는 창이 끝나거나 flush_max_bytes에 도달할 때까지 모아 한 번에 보낸다.
+        마지막 구독자가 떠나면 재연결 대기 시간 후에도 구독자가 없을 때 생성을 취소한다.
+        """
+        window = flush_window_ms / 1000
+        pending: List[Tuple[int, str]] = []
+        pending_bytes = 0
+        last_flush = float("-inf")
+        
+        self.subscribers += 1
+        self._clear_scheduled_cancel()
+        try:
+            while True:
+                new_events = self.read_after(last_seq)
+                if new_events:
+                    last_seq = new_events[-1][0]
+                    pending.extend(new_events)
+                    pending_bytes += sum(len(frame) for _, frame in new_events)
+                finished = self.done and last_seq + 1 >= self.next_seq
+
+                if pending:
+                    now = time.monotonic()
+                    flush_at = last_flush + window
+                    if finished or now >= flush_at or (flush_max_bytes and pending_bytes >= flush_max_bytes):
+                        yield pending
+                        pending = []
+                        pending_bytes = 0
+                        last_flush = time.monotonic()
+                        continue
+                    await self.wait_for_change(flush_at - now)
+                    continue
+
+                if finished:
+                    break
+                await self.wait_for_change()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self._schedule_cancel(settings.STREAM_RESUME_GRACE_SECONDS)
+
+    def _schedule_cancel(self, delay: float):
+        self._clear_scheduled_cancel()
+        if delay <= 0:
+            self._cancel_if_abandoned()
+            return
+        loop = asyncio.get_running_loop()
+        self._cancel_handle = loop.call_later(delay, self._cancel_if_abandoned)
+
+    def _clear_scheduled_cancel(self):
+        if self._cancel_handle is not None:
+            self._cancel_handle.cancel()
+            self._cancel_handle = None
+
+    def _cancel_if_abandoned(self):
+        self._cancel_handle = None
+        if self.subscribers == 0 and not self.done and self.task is not None:
+            logger.info(f"구독자가 없어 스트리밍 생성 취소: {self.stream_id}")
+            self.task.cancel()
+
+
+class StreamReplayRegistry:
+    """
+    스트림 ID별 ReplayStream 보관소 (TTL 만료 시 제거)
+
+    보관 중인 스트림이 max_streams개에 도달하면 새 스트림을 만들기 전에 종료된 스트림을 오래된 순으로 제거한다.
+    진행 중인 스트림은 제거하지 않으므로 모두 진행 중이면 일시적으로 max_streams를 넘을 수 있다.
+    """
+
+    def __init__(self, ttl_seconds: float, max_events: int, max_streams: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[str, ReplayStream]" = OrderedDict()
+        self._last_sweep = 0.0
+        self.resumed_streams = 0
+        self.expired_streams = 0
+        self.evicted_streams = 0
+
+    def start(self, producer: Callable[[ReplayStream], Awaitable[None]]) -> ReplayStream:
+        """
+        새 스트림을 만들고 producer를 백그라운드 태스크로 실행
+
+        Args:
+            producer: ReplayStream에 프레임을 추가하는 코루틴 함수
+
+        Returns:
+            ReplayStream: 생성된 스트림
+        """
+        self._sweep()
+        self._evict_finished()
+        stream = ReplayStream(uuid.uuid4().hex, self.max_events)
+        self._streams[stream.stream_id] = stream
+
+        async def run():
+            try:
+                await producer(stream)
+            finally:
+                stream.finish()
+
+        stream.task = asyncio.create_task(run())
+        return stream
+
+    def resolve(self, last_event_id: Optional[str]) -> Optional[Tuple[ReplayStream, int]]:
+        """
+        Last-Event-ID로 재개할 스트림과 마지막 수신 seq 찾기
+
+        Returns:
+            Optional[Tuple[ReplayStream, int]]: 재개 불가능하면 None
+        """
+        if not last_event_id:
+            return None
+        self._sweep()
+
+        stream_id, _, seq_str = last_event_id.strip().rpartition(":")
+        stream = self._streams.get(stream_id)
+        if stream is None or not seq_str.isdigit():
+            return None
+
+        last_seq = int(seq_str)
+        if not stream.can_resume_from(last_seq):
+            logger.info(f"재개 구간이 버퍼에서 밀려나 재개 불가: {last_event_id}")
+            return None
+
+        self.resumed_streams += 1
+        return stream, last_seq
+
+    def _sweep(self):
+        """종료 후 TTL이 지난 스트림 제거 (오래된 순으로 검사)"""
+        now = time.monotonic()
+        if now - self._last_sweep < 1.0:
+            return
+        self._last_sweep = now
+        expired = [
+            stream_id for stream_id, stream in self._streams.items()
+            if stream.done and stream.subscribers == 0 and now - stream.updated_at > self.ttl_seconds
+        ]
+        for stream_id in expired:
+            del self._streams[stream_id]
+        self.expired_streams += len(expired)
+
+    def _evict_finished(self):
+        """새 스트림을 넣을 자리가 생길 때까지 종료된 스트림을 오래된 순으로 제거"""
+        overflow = len(self._streams) - self.max_streams + 1
+        if overflow <= 0:
+            return
+        evicted = [stream_id for stream_id, stream in self._streams.items() if stream.done][:overflow]
+        for stream_id in evicted:
+            del self._streams[stream_id]
+        self.evicted_streams += len(evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """레지스트리 지표 반환"""
+        running = sum(1 for stream in self._streams.values() if not stream.done)
+        return {
+            "buffered_streams": len(self._streams),
+            "running_streams": running,
+            "resumed_streams": self.resumed_streams,
+            "expired_streams": self.expired_streams,
+            "evicted_streams": self.evicted_streams,
+            "max_streams": self.max_streams
+        }
+
+
+# 싱글턴 인스턴스
+stream_replay_registry = StreamReplayRegistry(
+    ttl_seconds=settings.STREAM_REPLAY_TTL_SECONDS,
+    max_events=settings.STREAM_REPLAY_MAX_EVENTS,
+    max_streams=settings.STREAM_REPLAY_MAX_STREAMS
+)
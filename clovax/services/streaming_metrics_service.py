@@ -0,0 +1,71 @@
+from typing import Dict, Any, Optional
+
+
+class StreamingMetrics:
+    """스트리밍 채팅 완성 지표 (프로세스 단위 카운터)"""
+
+    def __init__(self):
+        self.completed_generations = 0
+        self.completed_tokens = 0
+        self.cancelled_generations = 0
+        self.cancelled_streamed_tokens = 0
+        self.estimated_tokens_saved = 0
+        # 프레임 묶음 전송 지표
+        self.answers = 0
+        self.frames = 0
+        self.events = 0
+        self.ttft_samples = 0
+        self.ttft_total_seconds = 0.0
+
+    def record_completion(self, completion_tokens: int):
+        """정상 완료된 스트리밍 기록"""
+        self.completed_generations += 1
+        self.completed_tokens += completion_tokens
+
+    def record_cancellation(self, streamed_tokens: int, max_tokens: Optional[int] = None):
+        """
+        클라이언트 연결 종료로 취소된 스트리밍 기록
+
+        절약한 토큰 수는 요청의 최대 토큰 수(없으면 완료된 응답의 평균 토큰 수)에서
+        취소 시점까지 생성된 토큰 수를 뺀 추정치이다.
+        """
+        self.cancelled_generations += 1
+        self.cancelled_streamed_tokens += streamed_tokens
+
+        expected_tokens = self._average_completion_tokens()
+        if max_tokens:
+            expected_tokens = min(expected_tokens, max_tokens) if expected_tokens else max_tokens
+        self.estimated_tokens_saved += max(0, int(expected_tokens) - streamed_tokens)
+
+    def record_frames(self, frames: int, events: int):
+        """응답 1건에서 클라이언트로 보낸 HTTP 프레임 수와 SSE 이벤트 수 기록"""
+        self.answers += 1
+        self.frames += frames
+        self.events += events
+
+    def record_first_token(self, seconds: float):
+        """요청 시작부터 첫 토큰 프레임 전송까지 걸린 시간(TTFT) 기록"""
+        self.ttft_samples += 1
+        self.ttft_total_seconds += seconds
+
+    def _average_completion_tokens(self) -> float:
+        if not self.completed_generations:
+            return 0.0
+        return self.completed_tokens / self.completed_generations
+
+    def get_stats(self) -> Dict[str, Any]:
+        """지표 반환"""
+        return {
+            "completed_generations": self.completed_generations,
+            "average_completion_tokens": round(self._average_completion_tokens(), 1),
+            "cancelled_generations": self.cancelled_generations,
+            "cancelled_streamed_tokens": self.cancelled_streamed_tokens,
+            "estimated_tokens_saved": self.estimated_tokens_saved,
+            "frames_per_answer": round(self.frames / self.answers, 1) if self.answers else 0.0,
+            "events_per_frame": round(self.events / self.frames, 2) if self.frames else 0.0,
+            "average_ttft_ms": round(self.ttft_total_seconds / self.ttft_samples * 1000, 1) if self.ttft_samples else 0.0
+        }
+
+
+# 싱글턴 인스턴스
+streaming_metrics = StreamingMetrics()
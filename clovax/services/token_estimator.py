@@ -0,0 +1,69 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# 모델별 컨텍스트 윈도우 (입력 + 출력 토큰)
+MODEL_CONTEXT_TOKENS: Dict[str, int] = {
+    "HCX-005": 128000,
+    "HCX-DASH-002": 32000
+}
+# 알 수 없는 모델은 가장 작은 컨텍스트 윈도우 기준
+DEFAULT_CONTEXT_TOKENS = min(MODEL_CONTEXT_TOKENS.values())
+
+# 메시지당 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 한글 음절 / 영문 단어 / 숫자 / 그 외 문자(기호, 한자 등) 단위로 한 번에 분리
+_TOKEN_PATTERN = re.compile(r"([가-힣]+)|([A-Za-z]+)|([0-9]+)|(\S)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    HCX 토크나이저 기준 토큰 수 추정 (외부 토크나이저/LLM 호출 없이 선형 시간)
+
+    - 한글: 음절 3개당 약 2토큰
+    - 영문: 단어당 4글자마다 1토큰 (최소 1)
+    - 숫자: 3자리마다 1토큰
+    - 그 외 공백이 아닌 문자: 글자당 1토큰
+
+    실제 토큰 수보다 약간 크게 추정하여 컨텍스트 윈도우를 넘지 않도록 한다.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for hangul, latin, digits, other in _TOKEN_PATTERN.findall(text):
+        if hangul:
+            tokens += (len(hangul) * 2 + 2) // 3
+        elif latin:
+            tokens += (len(latin) + 3) // 4
+        elif digits:
+            tokens += (len(digits) + 2) // 3
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """
+    CLOVAX 메시지 하나의 토큰 수 추정 (content가 배열이면 텍스트 항목만 계산)
+    """
+    content = message.get("content", "")
+    if isinstance(content, list):
+        content = " ".join(
+            item.get("text", "")
+            for item in content
+            if isinstance(item, dict) and item.get("type") == "text"
+        )
+    elif not isinstance(content, str):
+        content = str(content)
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """메시지 목록 전체의 토큰 수 추정"""
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def get_context_tokens(model_name: Optional[str]) -> int:
+    """모델의 컨텍스트 윈도우 크기"""
+    return MODEL_CONTEXT_TOKENS.get(model_name or "", DEFAULT_CONTEXT_TOKENS)
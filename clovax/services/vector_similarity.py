@@ -0,0 +1,155 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+VectorLike = Union[Sequence[float], np.ndarray]
+MatrixLike = Union[Sequence[Sequence[float]], np.ndarray]
+
+# 여러 쿼리 × 여러 문서 계산 시 한 번에 곱할 문서 행 수 (중간 결과 메모리 = 쿼리 수 × 이 값 × 4바이트)
+DEFAULT_CHUNK_ROWS = 4096
+
+
+def as_float32_matrix(vectors: MatrixLike) -> np.ndarray:
+    """벡터 목록을 (N, D) float32 행렬로 변환 (이미 float32 행렬이면 복사하지 않음)"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return matrix
+
+
+def stack_embeddings(vectors: Sequence[VectorLike], dimension: int) -> np.ndarray:
+    """벡터 목록을 미리 할당한 (N, D) float32 행렬에 한 행씩 복사 (비어 있으면 (0, D))"""
+    matrix = np.empty((len(vectors), dimension), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        matrix[i] = vector
+    return matrix
+
+
+def normalize_rows(vectors: MatrixLike) -> np.ndarray:
+    """
+    행마다 L2 정규화한 float32 행렬 반환 (영벡터 행은 0으로 유지)
+
+    정규화된 행렬끼리의 내적이 곧 코사인 유사도이므로, 문서 행렬은 한 번만 정규화해 두고 재사용한다.
+    """
+    matrix = as_float32_matrix(vectors)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    점수가 높은 순서대로 상위 k개 위치 반환 (argpartition으로 O(N) 선택 후 k개만 정렬)
+
+    Args:
+        scores: 1차원 점수 배열
+        k: 반환할 개수
+
+    Returns:
+        np.ndarray: 점수 내림차순 위치 배열
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def cosine_scores(query: VectorLike, documents: MatrixLike, normalized: bool = False) -> np.ndarray:
+    """
+    쿼리 하나와 문서 N개의 코사인 유사도 (-1~1)
+
+    Args:
+        query: 쿼리 벡터 (D,)
+        documents: 문서 행렬 (N, D)
+        normalized: 입력이 이미 정규화되어 있으면 True (정규화 생략)
+
+    Returns:
+        np.ndarray: (N,) float32 유사도
+    """
+    query_vector = np.asarray(query, dtype=np.float32).reshape(-1)
+    matrix = as_float32_matrix(documents)
+    if not normalized:
+        norm = float(np.linalg.norm(query_vector))
+        if norm == 0.0:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+        query_vector = query_vector / norm
+        matrix = normalize_rows(matrix)
+    return matrix @ query_vector
+
+
+def cosine_similarity_matrix(
+    queries: MatrixLike,
+    documents: MatrixLike,
+    normalized: bool = False,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> np.ndarray:
+    """
+    쿼리 Q개 × 문서 N개의 코사인 유사도 행렬 (Q, N)
+
+    문서 행렬을 chunk_rows 행씩 나눠 정규화/곱셈하므로 중간 결과는 결과 행렬 외에 Q × chunk_rows 만큼만 사용한다.
+    """
+    query_matrix = as_float32_matrix(queries)
+    document_matrix = as_float32_matrix(documents)
+    if not normalized:
+        query_matrix = normalize_rows(query_matrix)
+
+    result = np.empty((query_matrix.shape[0], document_matrix.shape[0]), dtype=np.float32)
+    for start in range(0, document_matrix.shape[0], chunk_rows):
+        chunk = document_matrix[start:start + chunk_rows]
+        if not normalized:
+            chunk = normalize_rows(chunk)
+        np.matmul(query_matrix, chunk.T, out=result[:, start:start + chunk.shape[0]])
+    return result
+
+
+def top_k_similar(
+    queries: MatrixLike,
+    documents: MatrixLike,
+    k: int,
+    normalized: bool = False,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    쿼리마다 가장 유사한 문서 k개 (전체 유사도 행렬을 만들지 않는 제한 메모리 버전)
+
+    문서 행렬을 chunk_rows 행씩 곱하면서 청크별 상위 k개만 남겨 합치므로 메모리는 Q × (chunk_rows + k)에 비례한다.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (Q, k') 문서 위치와 (Q, k') 유사도 (유사도 내림차순, k' = min(k, N))
+    """
+    query_matrix = as_float32_matrix(queries)
+    document_matrix = as_float32_matrix(documents)
+    if not normalized:
+        query_matrix = normalize_rows(query_matrix)
+
+    query_count = query_matrix.shape[0]
+    k = min(k, document_matrix.shape[0])
+    best_indices = np.empty((query_count, 0), dtype=np.int64)
+    best_scores = np.empty((query_count, 0), dtype=np.float32)
+    if k <= 0:
+        return best_indices, best_scores
+
+    for start in range(0, document_matrix.shape[0], chunk_rows):
+        chunk = document_matrix[start:start + chunk_rows]
+        if not normalized:
+            chunk = normalize_rows(chunk)
+        scores = query_matrix @ chunk.T
+        chunk_k = min(k, scores.shape[1])
+        if chunk_k < scores.shape[1]:
+            chunk_top = np.argpartition(-scores, chunk_k - 1, axis=1)[:, :chunk_k]
+        else:
+            chunk_top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        candidate_scores = np.concatenate([best_scores, np.take_along_axis(scores, chunk_top, axis=1)], axis=1)
+        candidate_indices = np.concatenate([best_indices, chunk_top + start], axis=1)
+        if candidate_scores.shape[1] > k:
+            keep = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+            candidate_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+            candidate_indices = np.take_along_axis(candidate_indices, keep, axis=1)
+        best_scores, best_indices = candidate_scores, candidate_indices
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 앱과 같이 clovax 디렉토리 기준으로 import (from services... / from core...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+from services.chat_memory_journal import ChatMemoryJournal
+
+
+def _open(path):
+    journal = ChatMemoryJournal(str(path), idle_ttl_seconds=0, compact_min_bytes=1 << 30)
+    assert journal.open()
+    return journal
+
+
+def _contents(history):
+    return [message["content"] for message in history.messages[history.head:]]
+
+
+def test_torn_tail_is_truncated_across_restarts(tmp_path):
+    path = tmp_path / "chat_memory.journal"
+
+    journal = _open(path)
+    journal.record_turn("a", "hi", "hello", 20, None)
+    journal.close()
+    # 비정상 종료로 마지막 레코드가 줄 중간에서 잘림
+    with open(path, "ab") as f:
+        f.write(b'"a"\tturn\t1.000\t["torn')
+
+    journal = _open(path)
+    journal.record_turn("b", "question", "answer", 20, None)
+    assert _contents(journal.load("a")) == ["hi", "hello"]
+    journal.close()
+
+    journal = _open(path)
+    journal.record_turn("a", "again", "sure", 20, None)
+    journal.close()
+
+    journal = _open(path)
+    assert _contents(journal.load("a")) == ["hi", "hello", "again", "sure"]
+    assert _contents(journal.load("b")) == ["question", "answer"]
+    assert journal.corrupt_records == 0
+    journal.close()
+
+
+def test_corrupt_record_is_skipped(tmp_path):
+    path = tmp_path / "chat_memory.journal"
+
+    journal = _open(path)
+    journal.record_turn("a", "hi", "hello", 20, None)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b'"a"\tturn\t1.000\t{not json\n')
+
+    journal = _open(path)
+    journal.record_turn("a", "again", "sure", 20, None)
+    assert _contents(journal.load("a")) == ["hi", "hello", "again", "sure"]
+    assert journal.corrupt_records == 1
+    journal.close()
@@ -0,0 +1,56 @@
+import asyncio
+
+from services.stream_replay_service import StreamReplayRegistry
+
+
+def test_max_streams_evicts_oldest_finished_stream():
+    async def run():
+        registry = StreamReplayRegistry(ttl_seconds=3600, max_events=16, max_streams=3)
+        release = asyncio.Event()
+
+        async def finished(stream):
+            stream.append("data: done\n\n")
+
+        async def running(stream):
+            await release.wait()
+
+        oldest = registry.start(finished)
+        active = registry.start(running)
+        newer = registry.start(finished)
+        await asyncio.sleep(0)
+        assert oldest.done and newer.done and not active.done
+
+        latest = registry.start(finished)
+        await asyncio.sleep(0)
+        # 진행 중인 스트림은 남기고 가장 오래된 종료 스트림만 제거
+        assert registry.resolve(oldest.event_id(0)) is None
+        assert registry.resolve(newer.event_id(0)) is not None
+        assert registry.resolve(latest.event_id(0)) is not None
+        assert oldest.stream_id not in registry._streams
+        assert active.stream_id in registry._streams
+        assert registry.get_stats()["buffered_streams"] == 3
+        assert registry.evicted_streams == 1
+
+        release.set()
+        await active.task
+
+    asyncio.run(run())
+
+
+def test_running_streams_are_never_evicted():
+    async def run():
+        registry = StreamReplayRegistry(ttl_seconds=3600, max_events=16, max_streams=2)
+        release = asyncio.Event()
+
+        async def running(stream):
+            await release.wait()
+
+        streams = [registry.start(running) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert registry.get_stats()["buffered_streams"] == 3
+        assert registry.evicted_streams == 0
+
+        release.set()
+        await asyncio.gather(*(stream.task for stream in streams))
+
+    asyncio.run(run())
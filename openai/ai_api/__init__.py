@@ -4,7 +4,7 @@ AI API 모듈
 - OpenAI API 서비스 클래스
 """
 
-from .openai_service import OpenAIService
+from .openai_service import OpenAIService, AsyncOpenAIService
 from .api_server import app
 
 __version__ = "1.0.0"
@@ -13,5 +13,6 @@ __description__ = "OpenAI GPT API 웹 서비스 모듈"
 # 공개 API 정의
 __all__ = [
     'OpenAIService',
+    'AsyncOpenAIService',
     'app'
 ] 
\ No newline at end of file
@@ -9,12 +9,17 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import asyncio
+import hashlib
 import json
+import os
+import time
 import uuid
 import logging
+from contextlib import aclosing
 from datetime import datetime
 
-from .openai_service import OpenAIService
+from .openai_service import OpenAIService, AsyncOpenAIService
+from .session_registry import StreamSessionRegistry
 from ..prompt import GENERAL_CHAT_CONFIG, get_config
 
 # 로깅 설정
@@ -38,9 +43,29 @@ app.add_middleware(
 
 # OpenAI 서비스 인스턴스
 openai_service = OpenAIService()
+# 채팅 엔드포인트용 비동기 서비스 (커넥션 풀 공유, 동시 요청 수 제한)
+async_openai_service = AsyncOpenAIService()
 
-# 스트리밍 세션 관리
-streaming_sessions: Dict[str, Dict[str, Any]] = {}
+# 스트리밍 세션 관리 (최대 개수 + TTL 제한, STREAM_SESSION_REDIS_URL 설정 시 워커 간 공유)
+streaming_sessions = StreamSessionRegistry(
+    max_sessions=int(os.getenv("STREAM_SESSION_MAX", "10000")),
+    ttl_seconds=float(os.getenv("STREAM_SESSION_TTL_SECONDS", "300")),
+    sweep_interval_seconds=float(os.getenv("STREAM_SESSION_SWEEP_SECONDS", "30")),
+    redis_url=os.getenv("STREAM_SESSION_REDIS_URL") or None
+)
+
+# 스트리밍 프레임 묶음 전송 설정 (0이면 청크마다 즉시 전송)
+STREAM_FLUSH_WINDOW_MS = float(os.getenv("STREAM_FLUSH_WINDOW_MS", "30"))
+STREAM_FLUSH_MAX_BYTES = int(os.getenv("STREAM_FLUSH_MAX_BYTES", "4096"))
+
+# 스트리밍 지표
+stream_metrics: Dict[str, float] = {
+    "answers": 0,
+    "frames": 0,
+    "chunks": 0,
+    "ttft_samples": 0,
+    "ttft_total_seconds": 0.0
+}
 
 class ChatRequest(BaseModel):
     message: str
@@ -64,11 +89,25 @@ class StreamingChatRequest(BaseModel):
     model: Optional[str] = "gpt-3.5-turbo"
     temperature: Optional[float] = GENERAL_CHAT_CONFIG["temperature"]
     max_tokens: Optional[int] = GENERAL_CHAT_CONFIG["max_tokens"]
+    # True: CONTENT 이벤트에 새로 생성된 부분(delta)만 전송, False: 누적 전체 내용 전송 (기존 클라이언트 호환)
+    delta_mode: Optional[bool] = False
 
 class StreamingStartResponse(BaseModel):
     stream_id: str
     status: str
 
+@app.on_event("startup")
+async def startup_event():
+    """공유 OpenAI 클라이언트 준비 및 스트리밍 세션 만료 스윕 시작"""
+    await async_openai_service.startup()
+    await streaming_sessions.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """OpenAI 커넥션 풀 및 스트리밍 세션 레지스트리 정리"""
+    await async_openai_service.aclose()
+    await streaming_sessions.close()
+
 @app.get("/")
 async def root():
     """루트 엔드포인트 - 서비스 상태 확인"""
@@ -120,7 +159,7 @@ async def chat(request: ChatRequest):
         messages.append({"role": "user", "content": request.message})
         
         # OpenAI API 호출
-        response = openai_service.chat_with_history(
+        response = await async_openai_service.chat_with_history(
             messages=messages,
             model=request.model,
             temperature=request.temperature,
@@ -146,11 +185,11 @@ async def start_streaming_chat(request: StreamingChatRequest):
         logger.info(f"스트리밍 채팅 시작 - Stream ID: {stream_id}")
         
         # 스트리밍 세션 정보 저장
-        streaming_sessions[stream_id] = {
-            "request": request,
+        await streaming_sessions.create(stream_id, {
+            "request": request.model_dump(),
             "status": "started",
             "created_at": datetime.now().isoformat()
-        }
+        })
         
         return StreamingStartResponse(
             stream_id=stream_id,
@@ -164,15 +203,16 @@ async def start_streaming_chat(request: StreamingChatRequest):
 @app.get("/chat/stream/{stream_id}")
 async def stream_chat(stream_id: str):
     """스트리밍 채팅 응답 - SSE 형태로 실시간 응답"""
-    if stream_id not in streaming_sessions:
+    session = await streaming_sessions.take(stream_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="스트리밍 세션을 찾을 수 없습니다")
     
-    session = streaming_sessions[stream_id]
-    request = session["request"]
+    request = StreamingChatRequest(**session["request"])
     
     async def generate_stream():
         try:
             logger.info(f"스트리밍 응답 시작 - Stream ID: {stream_id}")
+            started_at = time.monotonic()
             
             # 시작 이벤트
             yield f"event: chunk\ndata: {json.dumps({'type': 'START', 'stream_id': stream_id}, ensure_ascii=False)}\n\n"
@@ -192,33 +232,100 @@ async def stream_chat(stream_id: str):
             messages.append({"role": "user", "content": request.message})
             
             # 스트리밍 응답 생성
-            full_content = ""
+            # 직전 전송 후 STREAM_FLUSH_WINDOW_MS가 지나 도착한 청크는 즉시 보내고(첫 토큰 지연 없음),
+            # 그 안에 연달아 도착한 청크는 창이 끝나거나 STREAM_FLUSH_MAX_BYTES에 도달할 때 한 프레임으로 전송
+            # (다음 청크가 늦어져도 창이 끝나면 모아 둔 내용을 바로 전송)
+            delta_mode = bool(request.delta_mode)
+            content_parts: List[str] = []
+            pending_parts: List[str] = []
+            window = STREAM_FLUSH_WINDOW_MS / 1000
+            last_flush = float("-inf")
+            pending_bytes = 0
+            frames = 0
+            chunks = 0
             
-            for chunk in openai_service.chat_stream_with_history(
+            def flush_event() -> str:
+                nonlocal frames, pending_parts, pending_bytes, last_flush
+                now = time.monotonic()
+                if frames == 0:
+                    stream_metrics["ttft_samples"] += 1
+                    stream_metrics["ttft_total_seconds"] += now - started_at
+                event = _content_event(delta_mode, content_parts, pending_parts, frames)
+                frames += 1
+                pending_parts = []
+                pending_bytes = 0
+                last_flush = now
+                return event
+            
+            upstream = async_openai_service.chat_stream_with_history(
                 messages=messages,
                 model=request.model,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens
-            ):
-                if stream_id not in streaming_sessions:
-                    # 세션이 중단된 경우
-                    break
-                
-                if chunk.get("content"):
-                    full_content += chunk["content"]
-                    
-                    # 콘텐츠 청크 전송
-                    yield f"event: chunk\ndata: {json.dumps({'type': 'CONTENT', 'content': full_content}, ensure_ascii=False)}\n\n"
-                    
-                    # 잠시 대기 (브라우저가 처리할 시간)
-                    await asyncio.sleep(0.01)
+            )
+            # 중단/연결 종료 시 업스트림 스트림을 즉시 닫아 동시 요청 슬롯 반환
+            async with aclosing(upstream):
+                # 다음 청크 읽기는 태스크로 유지 (창 타이머가 끝나도 취소하지 않고 계속 기다림)
+                next_chunk = None
+                try:
+                    while True:
+                        if next_chunk is None:
+                            next_chunk = asyncio.ensure_future(upstream.__anext__())
+                        timeout = max(0.0, last_flush + window - time.monotonic()) if pending_parts else None
+                        done, _ = await asyncio.wait({next_chunk}, timeout=timeout)
+                        if not done:
+                            # 창 안에 다음 청크가 오지 않음 → 모아 둔 내용 전송
+                            yield flush_event()
+                            continue
+                        
+                        try:
+                            chunk = next_chunk.result()
+                        except StopAsyncIteration:
+                            next_chunk = None
+                            break
+                        next_chunk = None
+                        
+                        if await streaming_sessions.is_stopped(stream_id):
+                            # 세션이 중단된 경우
+                            break
+                        
+                        if chunk.get("content"):
+                            content_parts.append(chunk["content"])
+                            pending_parts.append(chunk["content"])
+                            pending_bytes += len(chunk["content"].encode("utf-8"))
+                            chunks += 1
+                            
+                            if time.monotonic() - last_flush >= window or pending_bytes >= STREAM_FLUSH_MAX_BYTES:
+                                # 콘텐츠 청크 전송
+                                yield flush_event()
+                finally:
+                    # 읽던 청크가 남아 있으면 취소 후 업스트림 종료 (실행 중인 제너레이터는 닫을 수 없음)
+                    if next_chunk is not None:
+                        next_chunk.cancel()
+                        await asyncio.gather(next_chunk, return_exceptions=True)
+            
+            # 묶여서 아직 전송되지 않은 내용 전송 (delta 모드) / END 이벤트에 포함 (전체 모드)
+            if delta_mode and pending_parts:
+                yield flush_event()
             
-            # 완료 이벤트
-            yield f"event: chunk\ndata: {json.dumps({'type': 'END', 'content': full_content}, ensure_ascii=False)}\n\n"
+            stream_metrics["answers"] += 1
+            stream_metrics["frames"] += frames
+            stream_metrics["chunks"] += chunks
             
-            # 세션 정리
-            if stream_id in streaming_sessions:
-                del streaming_sessions[stream_id]
+            # 완료 이벤트 (delta 모드는 재조립 검증용 UTF-8 바이트 수와 체크섬만 전송)
+            # 글자 수는 언어마다 세는 단위가 달라(JS/Java는 UTF-16) 이모지 등에서 어긋나므로 바이트 수 사용
+            full_content = "".join(content_parts)
+            if delta_mode:
+                encoded = full_content.encode("utf-8")
+                end_data = {
+                    'type': 'END',
+                    'seq': frames,
+                    'byte_length': len(encoded),
+                    'checksum': hashlib.sha256(encoded).hexdigest()
+                }
+            else:
+                end_data = {'type': 'END', 'content': full_content}
+            yield f"event: chunk\ndata: {json.dumps(end_data, ensure_ascii=False)}\n\n"
             
             logger.info(f"스트리밍 응답 완료 - Stream ID: {stream_id}")
             
@@ -227,10 +334,10 @@ async def stream_chat(stream_id: str):
             
             # 오류 이벤트
             yield f"event: chunk\ndata: {json.dumps({'type': 'ERROR', 'error': str(e)}, ensure_ascii=False)}\n\n"
-            
-            # 세션 정리
-            if stream_id in streaming_sessions:
-                del streaming_sessions[stream_id]
+        
+        finally:
+            # 세션 정리 (클라이언트 연결 종료 포함)
+            streaming_sessions.finish(stream_id)
     
     return StreamingResponse(
         generate_stream(),
@@ -242,16 +349,42 @@ async def stream_chat(stream_id: str):
         }
     )
 
+def _content_event(delta_mode: bool, content_parts: List[str], pending_parts: List[str], seq: int) -> str:
+    """CONTENT 이벤트 생성 (delta 모드: 새 부분 + 순번, 전체 모드: 누적 전체 내용)"""
+    if delta_mode:
+        data = {'type': 'CONTENT', 'delta': "".join(pending_parts), 'seq': seq}
+    else:
+        data = {'type': 'CONTENT', 'content': "".join(content_parts)}
+    return f"event: chunk\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.delete("/chat/stream/{stream_id}")
 async def stop_streaming_chat(stream_id: str):
     """스트리밍 채팅 중단"""
-    if stream_id in streaming_sessions:
-        del streaming_sessions[stream_id]
+    if await streaming_sessions.stop(stream_id):
         logger.info(f"스트리밍 중단 - Stream ID: {stream_id}")
         return {"message": "스트리밍이 중단되었습니다", "stream_id": stream_id}
     else:
         raise HTTPException(status_code=404, detail="스트리밍 세션을 찾을 수 없습니다")
 
+@app.get("/metrics")
+async def get_metrics():
+    """스트리밍 지표 반환 (응답당 프레임 수, 평균 TTFT)"""
+    answers = stream_metrics["answers"]
+    frames = stream_metrics["frames"]
+    ttft_samples = stream_metrics["ttft_samples"]
+    return {
+        "streaming": {
+            "answers": int(answers),
+            "frames_per_answer": round(frames / answers, 1) if answers else 0.0,
+            "chunks_per_frame": round(stream_metrics["chunks"] / frames, 2) if frames else 0.0,
+            "average_ttft_ms": round(stream_metrics["ttft_total_seconds"] / ttft_samples * 1000, 1) if ttft_samples else 0.0,
+            "flush_window_ms": STREAM_FLUSH_WINDOW_MS,
+            "flush_max_bytes": STREAM_FLUSH_MAX_BYTES
+        },
+        "openai": async_openai_service.get_stats(),
+        "stream_sessions": streaming_sessions.get_stats()
+    }
+
 @app.get("/models")
 async def get_available_models():
     """사용 가능한 모델 목록 반환"""
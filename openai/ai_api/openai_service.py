@@ -8,9 +8,11 @@ OpenAI API 서비스 클래스
 
 import os
 import json
-from typing import List, Dict, Optional
+import asyncio
+from typing import Any, AsyncGenerator, List, Dict, Optional
 from datetime import datetime
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import httpx
 import logging
 from ..prompt import GENERAL_CHAT_CONFIG, CONVERSATION_TITLE_CONFIG
 
@@ -342,4 +344,192 @@ class OpenAIService:
             "total_messages": total_messages,
             "user_messages": user_messages,
             "ai_messages": ai_messages
-        } 
\ No newline at end of file
+        }
+
+
+class AsyncOpenAIService:
+    """
+    AsyncOpenAI 기반 비동기 채팅 서비스 클래스 (FastAPI용)
+    - 프로세스 전체에서 하나의 커넥션 풀(httpx.AsyncClient)을 공유
+    - 세마포어로 OpenAI 동시 요청 수 제한 (스트리밍은 응답이 끝날 때까지 슬롯 점유)
+    """
+    
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        비동기 OpenAI 서비스 초기화
+        
+        Args:
+            api_key: OpenAI API 키 (없으면 환경변수에서 가져옴)
+        """
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("OpenAI API 키가 필요합니다. 환경변수 OPENAI_API_KEY를 설정하거나 직접 전달하세요.")
+        
+        # 기본 설정 (OpenAIService와 동일)
+        self.default_model = os.getenv('DEFAULT_MODEL', "gpt-3.5-turbo")
+        self.default_max_tokens = int(os.getenv('DEFAULT_MAX_TOKENS', str(GENERAL_CHAT_CONFIG["max_tokens"])))
+        self.default_temperature = float(os.getenv('DEFAULT_TEMPERATURE', str(GENERAL_CHAT_CONFIG["temperature"])))
+        
+        # 커넥션 풀 / 동시성 설정
+        self.max_connections = int(os.getenv('OPENAI_MAX_CONNECTIONS', "100"))
+        self.max_keepalive_connections = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', "20"))
+        self.max_concurrency = int(os.getenv('OPENAI_MAX_CONCURRENCY', "50"))
+        self.timeout = float(os.getenv('OPENAI_TIMEOUT', "120"))
+        self.max_retries = int(os.getenv('OPENAI_MAX_RETRIES', "2"))
+        
+        self._client: Optional[AsyncOpenAI] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_requests = 0
+    
+    def _get_client(self) -> AsyncOpenAI:
+        """공유 AsyncOpenAI 클라이언트 반환 (최초 호출 시 생성)"""
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5.0)
+            )
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=http_client,
+                max_retries=self.max_retries
+            )
+        return self._client
+    
+    async def startup(self):
+        """애플리케이션 시작 시 클라이언트 미리 생성"""
+        self._get_client()
+    
+    async def aclose(self):
+        """애플리케이션 종료 시 커넥션 풀 정리"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    async def _acquire(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.total_requests += 1
+    
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+    
+    async def chat_with_history(self, 
+                                messages: List[Dict[str, str]], 
+                                model: str = None,
+                                max_tokens: int = None,
+                                temperature: float = None) -> Dict[str, Any]:
+        """
+        외부 메시지 히스토리를 사용한 비동기 채팅
+        
+        Args:
+            messages: 메시지 히스토리 리스트 [{"role": "user", "content": "..."}, ...]
+            model: 사용할 AI 모델
+            max_tokens: 최대 토큰 수
+            temperature: 창의성 정도
+            
+        Returns:
+            AI 응답과 메타데이터를 포함한 딕셔너리
+        """
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = temperature or self.default_temperature
+        
+        await self._acquire()
+        try:
+            response = await self._get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+        except Exception as e:
+            logger.error(f"채팅 요청 오류: {str(e)}")
+            raise Exception(f"AI 응답 생성 중 오류가 발생했습니다: {str(e)}")
+        finally:
+            self._release()
+        
+        return {
+            "content": response.choices[0].message.content,
+            "model": model,
+            "usage": {
+                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
+                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
+                "total_tokens": response.usage.total_tokens if response.usage else 0
+            }
+        }
+    
+    async def chat_stream_with_history(self, 
+                                       messages: List[Dict[str, str]], 
+                                       model: str = None,
+                                       max_tokens: int = None,
+                                       temperature: float = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        외부 메시지 히스토리를 사용한 비동기 스트리밍 채팅
+        
+        소비자가 중간에 반복을 멈추면(aclose) 업스트림 스트림도 닫아 생성을 중단한다.
+        
+        Args:
+            messages: 메시지 히스토리 리스트
+            model: 사용할 AI 모델
+            max_tokens: 최대 토큰 수
+            temperature: 창의성 정도
+            
+        Yields:
+            AI 응답 조각들의 딕셔너리 (chat_stream_with_history와 동일한 형식)
+        """
+        model = model or self.default_model
+        max_tokens = max_tokens or self.default_max_tokens
+        temperature = temperature or self.default_temperature
+        
+        await self._acquire()
+        stream = None
+        try:
+            try:
+                stream = await self._get_client().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content is not None:
+                        yield {
+                            "content": chunk.choices[0].delta.content,
+                            "model": model,
+                            "finished": False
+                        }
+            except Exception as e:
+                logger.error(f"스트리밍 채팅 오류: {str(e)}")
+                raise Exception(f"스트리밍 응답 생성 중 오류가 발생했습니다: {str(e)}")
+            
+            # 스트리밍 완료 표시
+            yield {
+                "content": "",
+                "model": model,
+                "finished": True
+            }
+        finally:
+            if stream is not None:
+                await stream.close()
+            self._release()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """동시 요청 지표 반환"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "total_requests": self.total_requests
+        }
@@ -0,0 +1,246 @@
+"""
+스트리밍 세션 레지스트리
+- POST /chat/stream 으로 생성된 스트리밍 세션 보관 (최대 개수 + TTL 제한)
+- 백그라운드 스윕으로 소비되지 않은 세션 만료
+- 선택적으로 Redis 공유 백엔드 사용 (다른 워커에서 시작한 스트림 소비 가능)
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Redis 키 접두사
+PENDING_KEY_PREFIX = "chat:stream:pending:"
+ACTIVE_KEY_PREFIX = "chat:stream:active:"
+STOP_KEY_PREFIX = "chat:stream:stop:"
+
+
+class StreamSessionRegistry:
+    """
+    스트리밍 세션 레지스트리
+
+    세션은 두 단계로 관리된다.
+    - pending: 생성 후 아직 GET /chat/stream/{id} 로 소비되지 않은 세션 (최대 개수 + TTL)
+    - active: 이 워커에서 응답을 스트리밍 중인 세션 (중단 요청 확인용)
+
+    redis_url이 주어지면 pending 세션을 Redis에 저장하여 어느 워커에서든 소비할 수 있고,
+    스트리밍 중인 세션은 active 키(TTL, 중단 확인 시마다 갱신)로 표시하여
+    다른 워커에서 받은 중단 요청도 stop 키로 전달된다.
+    Redis 사용 시 pending 세션 만료는 키 TTL에 맡기므로 pending 개수 / 만료 / 제거 지표는 집계하지 않는다.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 300,
+        sweep_interval_seconds: float = 30,
+        redis_url: Optional[str] = None
+    ):
+        """
+        레지스트리 초기화
+
+        Args:
+            max_sessions: 워커당 보관할 최대 pending 세션 수 (초과 시 오래된 순으로 제거)
+            ttl_seconds: 소비되지 않은 세션 유지 시간 (초)
+            sweep_interval_seconds: 만료 세션 정리 주기 (초)
+            redis_url: 공유 백엔드 Redis URL (없으면 프로세스 메모리 사용)
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        # stream_id -> (세션 데이터, 생성 시각)
+        self._pending: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # stream_id -> 마지막 중단 요청 확인 시각
+        self._active: Dict[str, float] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        # finish()에서 시작한 Redis active 키 삭제 태스크
+        self._cleanup_tasks = set()
+        self._redis = self._create_redis(redis_url) if redis_url else None
+
+        self.created = 0
+        self.consumed = 0
+        self.expired = 0
+        self.evicted = 0
+        self.stopped = 0
+
+    def _create_redis(self, redis_url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            logger.warning("redis 패키지가 설치되어 있지 않아 메모리 세션 레지스트리를 사용합니다. (pip install redis)")
+            return None
+        logger.info("Redis 스트리밍 세션 레지스트리 사용")
+        return redis_asyncio.from_url(redis_url, decode_responses=True)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def start(self):
+        """백그라운드 만료 스윕 시작"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        """스윕 중단 및 Redis 연결 정리"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        if self._redis is not None:
+            if self._cleanup_tasks:
+                await asyncio.gather(*self._cleanup_tasks, return_exceptions=True)
+            await self._redis.aclose()
+
+    async def create(self, stream_id: str, data: Dict[str, Any]):
+        """
+        pending 세션 등록
+
+        Args:
+            stream_id: 스트리밍 ID
+            data: JSON 직렬화 가능한 세션 데이터
+        """
+        self.created += 1
+        if self._redis is not None:
+            await self._redis.set(PENDING_KEY_PREFIX + stream_id, json.dumps(data, ensure_ascii=False), ex=int(self.ttl_seconds))
+            return
+
+        self._pending[stream_id] = (data, time.monotonic())
+        while len(self._pending) > self.max_sessions:
+            # 가장 오래된 세션 제거
+            self._pending.popitem(last=False)
+            self.evicted += 1
+
+    async def take(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        """
+        pending 세션을 꺼내 이 워커의 active 세션으로 전환
+
+        Returns:
+            Optional[Dict[str, Any]]: 세션 데이터 (없거나 만료되었으면 None)
+        """
+        if self._redis is not None:
+            raw = await self._redis.getdel(PENDING_KEY_PREFIX + stream_id)
+            data = json.loads(raw) if raw else None
+        else:
+            entry = self._pending.pop(stream_id, None)
+            data = None
+            if entry is not None:
+                data, created_at = entry
+                if time.monotonic() - created_at > self.ttl_seconds:
+                    self.expired += 1
+                    data = None
+
+        if data is None:
+            return None
+        if self._redis is not None:
+            await self._redis.set(ACTIVE_KEY_PREFIX + stream_id, "1", ex=int(self.ttl_seconds))
+        self.consumed += 1
+        self._active[stream_id] = time.monotonic()
+        return data
+
+    async def is_stopped(self, stream_id: str) -> bool:
+        """
+        스트리밍 중인 세션의 중단 여부 (Redis 사용 시 다른 워커의 중단 요청은 최대 1초마다 확인)
+        """
+        checked_at = self._active.get(stream_id)
+        if checked_at is None:
+            return True
+        if self._redis is None:
+            return False
+
+        now = time.monotonic()
+        if now - checked_at < 1.0:
+            return False
+        self._active[stream_id] = now
+        # 스트리밍 중인 동안 active 키 유지
+        await self._redis.expire(ACTIVE_KEY_PREFIX + stream_id, int(self.ttl_seconds))
+        if await self._redis.exists(STOP_KEY_PREFIX + stream_id):
+            self._active.pop(stream_id, None)
+            return True
+        return False
+
+    async def stop(self, stream_id: str) -> bool:
+        """
+        세션 중단 (pending이면 삭제, 스트리밍 중이면 중단 표시)
+
+        Returns:
+            bool: 세션이 존재했는지 여부
+        """
+        found = False
+        if stream_id in self._active:
+            del self._active[stream_id]
+            found = True
+        elif self._redis is not None:
+            if await self._redis.delete(PENDING_KEY_PREFIX + stream_id):
+                found = True
+            elif await self._redis.exists(ACTIVE_KEY_PREFIX + stream_id):
+                # 다른 워커에서 스트리밍 중이므로 중단 키 설정
+                await self._redis.set(STOP_KEY_PREFIX + stream_id, "1", ex=int(self.ttl_seconds))
+                found = True
+        elif self._pending.pop(stream_id, None) is not None:
+            found = True
+
+        if found:
+            self.stopped += 1
+        return found
+
+    def finish(self, stream_id: str):
+        """스트리밍 종료 후 active 세션 정리"""
+        self._active.pop(stream_id, None)
+        if self._redis is not None:
+            task = asyncio.create_task(self._redis.delete(ACTIVE_KEY_PREFIX + stream_id, STOP_KEY_PREFIX + stream_id))
+            self._cleanup_tasks.add(task)
+            task.add_done_callback(self._cleanup_tasks.discard)
+
+    def sweep(self) -> int:
+        """
+        TTL이 지난 pending 세션 제거 (생성 순서대로 검사하여 만료되지 않은 세션에서 중단)
+
+        Returns:
+            int: 제거된 세션 수
+        """
+        deadline = time.monotonic() - self.ttl_seconds
+        removed = 0
+        while self._pending:
+            stream_id, (_, created_at) = next(iter(self._pending.items()))
+            if created_at > deadline:
+                break
+            del self._pending[stream_id]
+            removed += 1
+        self.expired += removed
+        return removed
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            removed = self.sweep()
+            if removed:
+                logger.info(f"만료된 스트리밍 세션 정리: {removed}개")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """레지스트리 지표 반환"""
+        stats = {
+            "backend": self.backend,
+            "active_sessions": len(self._active),
+            "created": self.created,
+            "consumed": self.consumed,
+            "stopped": self.stopped,
+            "ttl_seconds": self.ttl_seconds
+        }
+        if self._redis is None:
+            stats.update({
+                "pending_sessions": len(self._pending),
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "max_sessions": self.max_sessions
+            })
+        return stats